@@ -9,6 +9,8 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".
 
 from app.db.base import Base  # Import your Base from base.py
 from app.models.user import User  # Import your models here # noqa: F401
+from app.models.login_throttle import LoginThrottleBucket  # noqa: F401
+from app.models.revoked_token import RevokedToken  # noqa: F401
 
 # this is the Alembic Config object, which provides
 # access to values within the .ini file in use.
@@ -0,0 +1,35 @@
+"""add login throttle buckets table
+
+Shared token buckets for the "postgres" LOGIN_THROTTLE_BACKEND.
+
+Revision ID: 1c7404026a0e
+Revises: e1f6a2d8c4b7
+Create Date: 2026-10-17 22:10:01.058721
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1c7404026a0e'
+down_revision: Union[str, None] = 'e1f6a2d8c4b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'login_throttle_buckets',
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('tokens', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.Float(), nullable=False),
+        sa.Column('allowed', sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint('key'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('login_throttle_buckets')
@@ -0,0 +1,50 @@
+"""add users token_version
+
+The login lookup reads the version too, so it is added to the covering
+username index to keep that lookup index-only.
+
+Revision ID: 34050aa9463a
+Revises: 266df96381b8
+Create Date: 2026-10-17 22:15:30.755488
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '34050aa9463a'
+down_revision: Union[str, None] = '266df96381b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+USERNAME_INCLUDE = ['username', 'id', 'hashed_password', 'is_active', 'is_deleted']
+
+
+def _rebuild_username_index(include: list[str]) -> None:
+    # Build the replacement next to the old index so logins stay index-only throughout.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_lower_username_live_new',
+            'users',
+            [sa.text('lower(username)')],
+            unique=True,
+            postgresql_where=sa.text('is_deleted = false'),
+            postgresql_include=include,
+            postgresql_concurrently=True,
+        )
+        op.drop_index('ix_users_lower_username_live', table_name='users', postgresql_concurrently=True)
+    op.execute('ALTER INDEX ix_users_lower_username_live_new RENAME TO ix_users_lower_username_live')
+
+
+def upgrade() -> None:
+    # A constant default makes this a catalog-only change; existing rows are not rewritten.
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+    _rebuild_username_index(USERNAME_INCLUDE + ['token_version'])
+
+
+def downgrade() -> None:
+    _rebuild_username_index(USERNAME_INCLUDE)
+    op.drop_column('users', 'token_version')
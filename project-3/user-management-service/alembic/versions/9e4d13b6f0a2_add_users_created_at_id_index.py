@@ -0,0 +1,35 @@
+"""add users (created_at, id) index for keyset pagination
+
+Revision ID: 9e4d13b6f0a2
+Revises: 5b2c0e7a9d41
+Create Date: 2026-10-17 09:40:51.102377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4d13b6f0a2'
+down_revision: Union[str, None] = '5b2c0e7a9d41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY avoids blocking writes on a large table; it cannot run inside a transaction.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_created_at_id',
+            'users',
+            ['created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_created_at_id', table_name='users', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,40 @@
+"""add users pending deletion index
+
+Partial index over the users awaiting the purge, which otherwise scans the
+whole table for every batch.
+
+Revision ID: b1c5eb11f769
+Revises: 34050aa9463a
+Create Date: 2026-10-17 22:28:52.027713
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b1c5eb11f769'
+down_revision: Union[str, None] = '34050aa9463a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY avoids blocking writes on a large table; it cannot run inside a transaction.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_pending_deletion',
+            'users',
+            ['deletion_requested_at'],
+            unique=False,
+            postgresql_where=sa.text('is_active = false AND is_deleted = false'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_pending_deletion', table_name='users', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,50 @@
+"""add partial, case-insensitive lookup indexes on users
+
+Revision ID: c7a85f1e3b29
+Revises: 9e4d13b6f0a2
+Create Date: 2026-10-17 11:05:37.640912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7a85f1e3b29'
+down_revision: Union[str, None] = '9e4d13b6f0a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY avoids blocking writes on a large table; it cannot run inside a transaction.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_lower_username_live',
+            'users',
+            [sa.text('lower(username)')],
+            unique=False,
+            postgresql_include=['username', 'id', 'hashed_password', 'is_active', 'is_deleted'],
+            postgresql_where=sa.text('is_deleted = false'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_users_lower_email_live',
+            'users',
+            [sa.text('lower(email)')],
+            unique=False,
+            postgresql_where=sa.text('is_deleted = false'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+    # Let the planner see the visibility map so the login lookup can be an index-only scan.
+    op.execute('ANALYZE users')
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_lower_email_live', table_name='users', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_users_lower_username_live', table_name='users', postgresql_concurrently=True, if_exists=True)
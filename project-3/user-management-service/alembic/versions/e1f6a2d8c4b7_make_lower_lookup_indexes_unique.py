@@ -0,0 +1,50 @@
+"""make the lower(email)/lower(username) indexes unique
+
+Registration relies on these indexes, rather than a SELECT beforehand, to
+reject case-insensitive duplicates. The upgrade fails if live users already
+differ only by case; resolve those rows first.
+
+Revision ID: e1f6a2d8c4b7
+Revises: c7a85f1e3b29
+Create Date: 2026-10-17 12:21:09.557301
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1f6a2d8c4b7'
+down_revision: Union[str, None] = 'c7a85f1e3b29'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+USERNAME_INCLUDE = ['username', 'id', 'hashed_password', 'is_active', 'is_deleted']
+
+
+def _swap_index(name: str, expression: str, unique: bool, **kwargs) -> None:
+    # Build the replacement next to the old index so lookups stay indexed throughout.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            f'{name}_new',
+            'users',
+            [sa.text(expression)],
+            unique=unique,
+            postgresql_where=sa.text('is_deleted = false'),
+            postgresql_concurrently=True,
+            **kwargs,
+        )
+        op.drop_index(name, table_name='users', postgresql_concurrently=True)
+    op.execute(f'ALTER INDEX {name}_new RENAME TO {name}')
+
+
+def upgrade() -> None:
+    _swap_index('ix_users_lower_username_live', 'lower(username)', True, postgresql_include=USERNAME_INCLUDE)
+    _swap_index('ix_users_lower_email_live', 'lower(email)', True)
+
+
+def downgrade() -> None:
+    _swap_index('ix_users_lower_email_live', 'lower(email)', False)
+    _swap_index('ix_users_lower_username_live', 'lower(username)', False, postgresql_include=USERNAME_INCLUDE)
@@ -1,40 +1,120 @@
 from typing import Annotated
 
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from fastapi import Depends, HTTPException, Request, Security, status
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from jose import JWTError
 
 from app.core.config import settings
-from app.core.security import ALGORITHM  # Import ALGORITHM
-from app.crud import crud_user
-from app.db.session import get_db
+from app.core.login_throttle import login_throttle
+from app.core.security import admin_key_matches, decode_access_token
+from app.core.tracing import traced
+from app.db.session import get_session
 from app.models.user import User
-from app.services.user_service import UserNotFoundException
+from app.schemas.user import TokenIdentity
+from app.services.token_service import is_token_revoked_async
+from app.services.user_service import (
+    AnySession,
+    UserNotFoundException,
+    get_token_version_cached,
+    get_user_by_username_cached,
+)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/token")
+admin_key_scheme = APIKeyHeader(name="X-Admin-Key", auto_error=False)
 
 
-def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)],
-    db: Annotated[Session, Depends(get_db)],
-) -> User:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+async def _verified_claims(token: str, db: AnySession) -> dict:
+    """Return the claims of a validly signed, unrevoked access token with a subject."""
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[ALGORITHM]
-        )  # Use ALGORITHM directly
-        username: str | None = payload.get("sub")
-        if username is None:
-            raise credentials_exception
+        payload = decode_access_token(token)
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    if payload.get("sub") is None or await is_token_revoked_async(db, payload.get("jti")):
+        raise _credentials_exception()
+    return payload
+
 
-    user = crud_user.get_user_by_username(db, username=username)
+@traced("get_current_user")
+async def get_current_user(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: Annotated[AnySession, Depends(get_session)],
+) -> User:
+    payload = await _verified_claims(token, db)
+    user = await get_user_by_username_cached(db, username=payload["sub"])
     if user is None or not user.is_active:
         raise UserNotFoundException()
+    # Tokens issued before the version claim existed carry no "ver".
+    if payload.get("ver", user.token_version) != user.token_version:
+        raise _credentials_exception()
     return user
+
+
+@traced("get_current_identity")
+async def get_current_identity(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: Annotated[AnySession, Depends(get_session)],
+) -> TokenIdentity:
+    """Authenticate for endpoints that only need to know who the caller is.
+
+    With `settings.STATELESS_AUTH` the identity comes from the token's claims
+    and only the user's token version is looked up, normally from the user
+    cache; otherwise it is taken from `get_current_user`.
+    """
+    if not settings.STATELESS_AUTH:
+        user = await get_current_user(token, db)
+        return TokenIdentity(id=user.id, username=user.username, token_version=user.token_version)
+
+    payload = await _verified_claims(token, db)
+    if "uid" not in payload or "ver" not in payload:
+        # Issued before these claims existed; fall back to loading the user.
+        user = await get_current_user(token, db)
+        return TokenIdentity(id=user.id, username=user.username, token_version=user.token_version)
+    if not payload.get("active"):
+        raise UserNotFoundException()
+    identity = TokenIdentity(id=payload["uid"], username=payload["sub"], token_version=payload["ver"])
+    # Deactivation and deletion bump the version too, so a match means the user is still active.
+    if await get_token_version_cached(db, identity.id) != identity.token_version:
+        raise _credentials_exception()
+    return identity
+
+
+def require_admin(admin_key: Annotated[str | None, Security(admin_key_scheme)]):
+    """Allow the request only if it carries the configured `X-Admin-Key`."""
+    if not admin_key_matches(admin_key):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+
+
+def client_ip(request: Request) -> str | None:
+    """Return the client's address, looking through `settings.TRUSTED_PROXY_HOPS` proxies.
+
+    Each trusted proxy appends its peer's address to X-Forwarded-For, so the
+    client is the entry that many places from the right; entries further left
+    come from the client itself and could be forged.
+    """
+    hops = settings.TRUSTED_PROXY_HOPS
+    if hops > 0:
+        forwarded = [
+            address.strip()
+            for header in request.headers.getlist("x-forwarded-for")
+            for address in header.split(",")
+            if address.strip()
+        ]
+        if forwarded:
+            return forwarded[-min(hops, len(forwarded))]
+    return request.client.host if request.client else None
+
+
+async def throttle_login(request: Request, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
+    """Reject the login attempt with 429 once its username or client IP is out of tokens.
+
+    Runs before the endpoint body, so throttled attempts never reach a password verification.
+    """
+    await login_throttle.check_async(form_data.username, client_ip(request))
@@ -1,35 +1,63 @@
-"""API endpoints for user authentication (registration and login).
+"""API endpoints for user authentication (registration, login and logout).
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Annotated
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
 
 from app import schemas
+from app.api.v1.dependencies import get_current_identity, oauth2_scheme, throttle_login
 from app.core import security
-from app.crud import crud_user
-from app.db.session import get_db
-from app.services import user_service
+from app.db.session import get_session
+from app.schemas import serialization
+from app.services import token_service, user_service
+from app.services.user_service import AnySession
 
 router = APIRouter()
 
 @router.post("/register", response_model=schemas.user.UserRead, status_code=status.HTTP_201_CREATED)
-def register_user(user: schemas.user.UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: schemas.user.UserCreate, db: AnySession = Depends(get_session)):
     """Register a new user.
     """
-    return user_service.create_user_service(db=db, user=user)
+    created = await user_service.create_user_service_async(db=db, user=user)
+    return serialization.user_read.response(created, status_code=status.HTTP_201_CREATED)
 
-@router.post("/token", response_model=schemas.user.Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+@router.post("/token", response_model=schemas.user.Token, dependencies=[Depends(throttle_login)])
+async def login_for_access_token(
+    background_tasks: BackgroundTasks,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AnySession = Depends(get_session),
+):
     """Log in a user to get a JWT access token.
+
+    Attempts are throttled per username and client IP before the password
+    is checked. Outdated password hashes are upgraded after the response is sent.
     """
-    user = crud_user.get_user_by_username(db, username=form_data.username)
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    user = await user_service.authenticate_user_async(
+        db,
+        username=form_data.username,
+        password=form_data.password,
+        background_tasks=background_tasks,
+    )
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     access_token = security.create_access_token(
-        data={"sub": user.username},
+        data={
+            "sub": user.username,
+            "uid": str(user.id),
+            "active": user.is_active,
+            "ver": user.token_version,
+        },
     )
-    return {"access_token": access_token, "token_type": "bearer"}
+    token = schemas.user.Token.model_construct(access_token=access_token, token_type="bearer")
+    return serialization.model_response(token)
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(get_current_identity)])
+async def logout(token: Annotated[str, Depends(oauth2_scheme)], db: AnySession = Depends(get_session)):
+    """Revoke the bearer token used for this request.
+    """
+    await token_service.revoke_token_async(db, security.decode_access_token(token))
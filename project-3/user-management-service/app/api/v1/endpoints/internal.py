@@ -0,0 +1,84 @@
+"""Internal, admin-only endpoints for operating the service.
+"""
+from typing import Literal
+
+import anyio.to_thread
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse
+
+from app.api.v1.dependencies import require_admin
+from app.core.login_throttle import login_throttle
+from app.core.profiling import profile_store
+from app.core.revocation import revocation_filter
+from app.db.pool import threadpool_size
+from app.db.session import async_engine, engine
+from app.db.statement_stats import statement_stats
+from app.services.purge_worker import purge_worker
+
+router = APIRouter(prefix="/internal", dependencies=[Depends(require_admin)])
+
+@router.get("/pool")
+async def read_pool_metrics():
+    """Report connection pool and worker-threadpool usage.
+    """
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    return {
+        "sync_pool": engine.pool.stats(),
+        "async_pool": async_engine.sync_engine.pool.stats(),
+        "threadpool": {
+            "configured_size": threadpool_size(),
+            "total_tokens": limiter.total_tokens,
+            "borrowed_tokens": limiter.borrowed_tokens,
+            "tasks_waiting": limiter.statistics().tasks_waiting,
+        },
+    }
+
+@router.get("/purge")
+async def read_purge_metrics():
+    """Report deletion purge runs and rows processed.
+    """
+    return purge_worker.stats()
+
+@router.get("/login-throttle")
+async def read_login_throttle_metrics():
+    """Report throttled login attempts and the password verifications they avoided.
+    """
+    return login_throttle.stats()
+
+@router.get("/revocations")
+async def read_revocation_metrics():
+    """Report the revoked-token Bloom filter and how many checks it answered without I/O.
+    """
+    return revocation_filter.stats()
+
+@router.get("/statements")
+async def read_statement_stats(
+    order_by: Literal["total_time", "calls", "mean_time", "max_time", "rows"] = "total_time",
+    limit: int = Query(20, ge=1, le=1000),
+):
+    """Report the SQL statements this process ran, by normalized text, heaviest first.
+
+    Times are in milliseconds.
+    """
+    return statement_stats.stats(order_by=order_by, limit=limit)
+
+@router.delete("/statements", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_statement_stats():
+    """Discard the collected statement statistics.
+    """
+    statement_stats.clear()
+
+@router.get("/profiles")
+async def list_profiles():
+    """List the stored request profiles, newest first.
+    """
+    return {"profiles": await anyio.to_thread.run_sync(profile_store.artifacts)}
+
+@router.get("/profiles/{name}")
+async def read_profile(name: str):
+    """Download a stored request profile; open ``.speedscope.json`` files in https://www.speedscope.app.
+    """
+    path = profile_store.path(name)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return FileResponse(path, media_type="application/json", filename=name)
@@ -1,60 +1,152 @@
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, Response, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, Query, Response, status
+from fastapi.responses import StreamingResponse
 
 from app.api.v1 import dependencies
-from app.db.session import get_db
+from app.db.session import engine, get_session
 from app.models.user import User
+from app.schemas import serialization
 from app.schemas import user as user_schema
-from app.schemas.user import PasswordUpdate, UserDelete, UserUpdate
-from app.services import user_service
+from app.schemas.user import (
+    BulkUserCreate,
+    BulkUserCreateResponse,
+    PasswordUpdate,
+    TokenIdentity,
+    UserDelete,
+    UserPage,
+    UserUpdate,
+)
+from app.services import user_export, user_service
+from app.services.user_service import AnySession
 
 router = APIRouter()
 
 
+@router.get("/users", response_model=UserPage, dependencies=[Depends(dependencies.require_admin)])
+async def list_users(
+    cursor: str | None = None,
+    limit: int = Query(50, ge=1, le=500),
+    is_active: bool | None = None,
+    is_deleted: bool | None = None,
+    deletion_requested: bool | None = Query(None, description="Filter on whether deletion_requested_at is set"),
+    db: AnySession = Depends(get_session),
+):
+    """
+    List users oldest first, one keyset-paginated page at a time.
+
+    Pass the returned `next_cursor` back as `cursor` to fetch the next page;
+    it is `null` on the last page.
+    """
+    page = await user_service.list_users_async(
+        db,
+        limit,
+        cursor=cursor,
+        is_active=is_active,
+        is_deleted=is_deleted,
+        deletion_requested=deletion_requested,
+    )
+    return serialization.model_response(page)
+
+
 @router.get("/users/me", response_model=user_schema.UserRead)
-def read_users_me(
+async def read_users_me(
     current_user: Annotated[User, Depends(dependencies.get_current_user)],
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
-    """Get current user."""
-    return current_user
+    """Get current user.
+
+    Responds with an `ETag`; a request whose `If-None-Match` still matches it
+    gets an empty 304 instead of the profile.
+    """
+    etag = user_service.user_etag(current_user)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if user_service.etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return serialization.user_read.response(current_user, headers=headers)
 
 
 @router.put("/users/me", response_model=user_schema.UserRead)
-def update_users_me(
+async def update_users_me(
     user_update: UserUpdate,
-    current_user: Annotated[User, Depends(dependencies.get_current_user)],
-    db: Session = Depends(get_db),
+    identity: Annotated[TokenIdentity, Depends(dependencies.get_current_identity)],
+    if_match: Annotated[str | None, Header()] = None,
+    db: AnySession = Depends(get_session),
 ):
     """
     Update current user's profile information.
+
+    With `If-Match` set to an ETag from an earlier read, the update only
+    applies if the profile has not changed since (412 otherwise).
     """
-    updated_user = user_service.update_user_profile(db, current_user.id, user_update)
-    return updated_user
+    updated_user = await user_service.update_user_profile_async(
+        db,
+        identity.id,
+        user_update,
+        expected_updated_at=user_service.expected_updated_at(if_match, identity.id),
+    )
+    return serialization.user_read.response(updated_user, headers={"ETag": user_service.user_etag(updated_user)})
 
 
 @router.put("/users/me/password", status_code=status.HTTP_204_NO_CONTENT)
-def change_password(
+async def change_password(
     password_update: PasswordUpdate,
     current_user: Annotated[User, Depends(dependencies.get_current_user)],
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_session),
 ):
     """
     Change the authenticated user's password.
     """
-    user_service.change_user_password_service(db, current_user, password_update)
+    await user_service.change_user_password_service_async(db, current_user, password_update)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 @router.delete("/users/me", status_code=status.HTTP_204_NO_CONTENT)
-def delete_users_me(
+async def delete_users_me(
     user_delete: user_schema.UserDelete,
     current_user: Annotated[User, Depends(dependencies.get_current_user)],
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_session),
 ):
     """
     Delete current user's account.
     """
-    user_service.delete_user_account(db, current_user.id, user_delete.current_password)
+    await user_service.delete_user_account_async(db, current_user, user_delete.current_password)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.post(
+    "/users/bulk",
+    response_model=BulkUserCreateResponse,
+    dependencies=[Depends(dependencies.require_admin)],
+)
+async def bulk_register_users(
+    bulk_create: BulkUserCreate,
+    db: AnySession = Depends(get_session),
+):
+    """
+    Register a batch of users, reporting a per-item result.
+
+    Items that collide with existing users or earlier items in the batch are
+    reported as failures without rolling back the rest.
+    """
+    return serialization.model_response(await user_service.bulk_create_users_async(db, bulk_create.users))
+
+
+@router.get("/users/export", dependencies=[Depends(dependencies.require_admin)])
+def export_users(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    columns: str | None = Query(None, description="Comma-separated columns; defaults to all but hashed_password"),
+    gzip: bool = False,
+    include_deleted: bool = False,
+):
+    """
+    Stream every user as NDJSON or CSV through a server-side cursor.
+    """
+    selected = user_export.parse_columns(columns)
+    filename = f"users.{format}" + (".gz" if gzip else "")
+    # The stream opens its own connection: request-scoped sessions are closed before the body is sent.
+    return StreamingResponse(
+        user_export.iter_export(engine.connect, selected, format, compress=gzip, include_deleted=include_deleted),
+        media_type="application/gzip" if gzip else user_export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
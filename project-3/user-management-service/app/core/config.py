@@ -1,5 +1,7 @@
 """Application configuration using Pydantic settings.
 """
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
@@ -10,7 +12,126 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "a_very_secret_key"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Connection pool; THREADPOOL_MAX_WORKERS (AnyIO's worker-thread limit)
+    # defaults to DB_POOL_SIZE + DB_MAX_OVERFLOW so the two stay coordinated
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800
+    THREADPOOL_MAX_WORKERS: int | None = None
+
+    # Shared secret for internal/admin endpoints, sent as the X-Admin-Key header.
+    # Admin endpoints are disabled while it is unset.
+    ADMIN_API_KEY: str | None = None
+
+    # Serve requests through the AsyncEngine/AsyncSession path instead of the threadpool
+    ASYNC_DB: bool = False
+    ASYNC_DATABASE_URL: str | None = None
+
+    # Cache of verified JWT claims, keyed by token digest and bounded by each token's exp
+    TOKEN_CACHE_ENABLED: bool = True
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+
+    # Authorize identity-only endpoints from the access token's claims, checking
+    # just its "ver" claim against the user's cached token version
+    STATELESS_AUTH: bool = False
+
+    # Revoked token ids (jti) are mirrored into a per-worker Bloom filter so only
+    # possible matches are confirmed against revoked_tokens; the filter is topped
+    # up every refresh interval and rebuilt from unexpired rows to drop expired ones
+    TOKEN_REVOCATION_ENABLED: bool = True
+    TOKEN_REVOCATION_REFRESH_SECONDS: float = 5.0
+    TOKEN_REVOCATION_REBUILD_SECONDS: float = 300.0
+    TOKEN_REVOCATION_BLOOM_CAPACITY: int = 100000
+    TOKEN_REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+
+    # Snapshot cache for authenticated user lookups; the invalidation backend is
+    # "local", "postgres" (LISTEN/NOTIFY) or a "package.module:ClassName" path
+    USER_CACHE_ENABLED: bool = True
+    USER_CACHE_TTL_SECONDS: float = 30.0
+    USER_CACHE_MAX_SIZE: int = 10000
+    USER_CACHE_INVALIDATION_BACKEND: str = "postgres"
+    USER_CACHE_INVALIDATION_CHANNEL: str = "user_cache_invalidation"
+
+    # Password hashing executor
+    HASHING_EXECUTOR: Literal["thread", "process"] = "thread"
+    HASHING_MAX_WORKERS: int | None = None
+    HASHING_MAX_QUEUE_SIZE: int = 256
+
+    # Password hashing scheme and cost; run scripts/calibrate_password_hash.py to
+    # pick a cost for a target verify time. Hashes made with another scheme or
+    # cost are upgraded after a successful login when PASSWORD_REHASH_ON_LOGIN is set
+    PASSWORD_HASH_SCHEME: Literal["bcrypt", "argon2"] = "bcrypt"
+    BCRYPT_ROUNDS: int = 12
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+    PASSWORD_REHASH_ON_LOGIN: bool = True
+
+    # Token-bucket throttling of POST /token per username and per client IP,
+    # checked before any password is verified; the backend is "memory" (per
+    # process), "postgres" (shared by all replicas) or a "package.module:ClassName" path
+    LOGIN_THROTTLE_ENABLED: bool = True
+    LOGIN_THROTTLE_BACKEND: str = "memory"
+    LOGIN_THROTTLE_USERNAME_BURST: int = 10
+    LOGIN_THROTTLE_USERNAME_PER_MINUTE: float = 5.0
+    LOGIN_THROTTLE_IP_BURST: int = 50
+    LOGIN_THROTTLE_IP_PER_MINUTE: float = 30.0
+    LOGIN_THROTTLE_MEMORY_MAX_KEYS: int = 100000
+
+    # Reverse proxies in front of the service that append the address of their
+    # peer to X-Forwarded-For (e.g. 1 behind a load balancer). The per-IP login
+    # throttle reads the client address from that header; with 0 it is ignored
+    # and the socket peer is used, which behind a proxy is the proxy itself
+    TRUSTED_PROXY_HOPS: int = 0
+
+    # Prometheus metrics served at GET /metrics; the endpoint is unauthenticated,
+    # so expose it only where the scraper can reach it and clients cannot
+    METRICS_ENABLED: bool = True
+
+    # Process-local statistics per normalized SQL statement, reported by
+    # GET /internal/statements, and a warning for each statement that takes at
+    # least DB_SLOW_QUERY_MS (unset to disable), naming the route that issued it
+    DB_STATEMENT_STATS_ENABLED: bool = True
+    DB_STATEMENT_STATS_MAX_ENTRIES: int = 1000
+    DB_SLOW_QUERY_MS: float | None = 200.0
+
+    # OpenTelemetry tracing (needs the "tracing" extra). Requests continue the
+    # trace in an inbound W3C traceparent header and keep its sampling decision;
+    # new traces are sampled at TRACING_SAMPLE_RATE. Spans are appended to
+    # TRACING_FILE_PATH as JSON lines ("file"), printed ("console") or sent to
+    # TRACING_OTLP_ENDPOINT ("otlp", needs opentelemetry-exporter-otlp-proto-http)
+    TRACING_ENABLED: bool = False
+    TRACING_SAMPLE_RATE: float = 1.0
+    TRACING_EXPORTER: Literal["file", "console", "otlp"] = "file"
+    TRACING_FILE_PATH: str = "traces.jsonl"
+    TRACING_OTLP_ENDPOINT: str | None = None
+    TRACING_SERVICE_NAME: str = "user-management-service"
+
+    # On-demand profiling of single requests that send X-Profile (cpu or memory)
+    # with a valid X-Admin-Key, or a "profile" query value signed with the admin
+    # key; speedscope profiles are kept in PROFILING_DIR, newest PROFILING_MAX_FILES
+    PROFILING_ENABLED: bool = False
+    PROFILING_DIR: str = "profiles"
+    PROFILING_MAX_FILES: int = 50
+    PROFILING_INTERVAL_SECONDS: float = 0.001
+
+    # Background purge of accounts past their deletion grace period; one replica
+    # at a time runs it, elected through a Postgres advisory lock
+    PURGE_ENABLED: bool = True
+    PURGE_INTERVAL_SECONDS: float = 60.0
+    PURGE_BATCH_SIZE: int = 1000
+
     class Config:
         env_file = ".env"
 
+    @property
+    def async_database_url(self) -> str:
+        """Return the asyncpg URL, derived from DATABASE_URL unless set explicitly."""
+        if self.ASYNC_DATABASE_URL:
+            return self.ASYNC_DATABASE_URL
+        scheme, _, rest = self.DATABASE_URL.partition("://")
+        return f"postgresql+asyncpg://{rest}" if scheme.startswith("postgresql") else self.DATABASE_URL
+
 settings = Settings()
@@ -0,0 +1,204 @@
+"""Dedicated, bounded executor for password hashing and verification.
+
+bcrypt is deliberately slow, so running it inline on AnyIO's shared worker
+threads lets a burst of logins starve cheap endpoints. ``PasswordHasher``
+moves that work onto its own thread or process pool, caps how many jobs may
+be pending at once and records how long jobs wait before they start.
+"""
+import asyncio
+import contextvars
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+
+from app.core import security
+from app.core.config import settings
+from app.core.metrics import PASSWORD_HASH_DURATION, registry
+from app.core.tracing import span, tracing_enabled
+
+
+class HashingQueueFullException(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Password hashing is at capacity, please retry",
+            headers={"Retry-After": "1"},
+        )
+
+
+def _hash_job(password: str, submitted_at: float) -> tuple[str, float, float]:
+    """Hash a password in a worker, returning the hash, how long it waited and how long it ran."""
+    started_at = time.monotonic()
+    hashed_password = security.get_password_hash(password)
+    return hashed_password, started_at - submitted_at, time.monotonic() - started_at
+
+
+def _verify_job(plain_password: str, hashed_password: str, submitted_at: float) -> tuple[bool, float, float]:
+    """Verify a password in a worker, returning the result, how long it waited and how long it ran."""
+    started_at = time.monotonic()
+    verified = security.verify_password(plain_password, hashed_password)
+    return verified, started_at - submitted_at, time.monotonic() - started_at
+
+
+# Jobs in a process pool record their durations in the worker's own metrics,
+# which are never scraped, so the parent records them from the job's result.
+_JOB_DURATIONS = {
+    _hash_job: PASSWORD_HASH_DURATION.labels("hash"),
+    _verify_job: PASSWORD_HASH_DURATION.labels("verify"),
+}
+
+
+class PasswordHasher:
+    """Runs password hashing on a bounded, dedicated pool.
+
+    Args:
+        executor_type: ``"thread"`` or ``"process"``. bcrypt releases the GIL,
+            so threads already scale with cores; processes isolate the work
+            completely at the cost of pickling each job.
+        max_workers: Pool size. Defaults to the number of CPUs.
+        max_queue_size: Maximum number of jobs queued or running at once.
+            Submissions beyond this raise ``HashingQueueFullException``.
+    """
+
+    def __init__(self, executor_type: str = "thread", max_workers: int | None = None, max_queue_size: int = 256):
+        if executor_type not in ("thread", "process"):
+            raise ValueError(f"Unknown hashing executor type: {executor_type}")
+        self.executor_type = executor_type
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue_size = max_queue_size
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.executor_type == "process":
+                        # Spawn rather than fork: the server process is multi-threaded.
+                        self._executor = ProcessPoolExecutor(
+                            max_workers=self.max_workers,
+                            mp_context=multiprocessing.get_context("spawn"),
+                        )
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.max_workers,
+                            thread_name_prefix="password-hasher",
+                        )
+        return self._executor
+
+    def _reserve_slot(self):
+        with self._lock:
+            if self._in_flight >= self.max_queue_size:
+                self._rejected += 1
+                raise HashingQueueFullException()
+            self._in_flight += 1
+            self._submitted += 1
+
+    def _release_slot(self, wait: float | None):
+        with self._lock:
+            self._in_flight -= 1
+            if wait is not None:
+                self._completed += 1
+                self._wait_total += wait
+                self._wait_max = max(self._wait_max, wait)
+
+    async def _run(self, fn, *args):
+        self._reserve_slot()
+        wait = None
+        try:
+            with span("password_hasher.job", {"executor": self.executor_type}) as job_span:
+                executor = self._get_executor()
+                if tracing_enabled() and self.executor_type == "thread":
+                    # Run in a copy of this context so the job's spans nest under this one.
+                    future = executor.submit(contextvars.copy_context().run, fn, *args, time.monotonic())
+                else:
+                    future = executor.submit(fn, *args, time.monotonic())
+                result, wait, duration = await asyncio.wrap_future(future)
+                if job_span is not None:
+                    job_span.set_attribute("wait_seconds", wait)
+                    job_span.set_attribute("run_seconds", duration)
+            if self.executor_type == "process":
+                _JOB_DURATIONS[fn].observe(duration)
+            return result
+        finally:
+            self._release_slot(wait)
+
+    async def hash_async(self, password: str) -> str:
+        """Hash a plain password without blocking the event loop."""
+        return await self._run(_hash_job, password)
+
+    async def verify_async(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a plain password against a hash without blocking the event loop."""
+        return await self._run(_verify_job, plain_password, hashed_password)
+
+    async def hash_many_async(self, passwords: list[str]) -> list[str]:
+        """Hash a batch of passwords in parallel across the pool.
+
+        Jobs are submitted in waves of ``max_workers`` so a large batch keeps
+        every worker busy without filling the queue that interactive logins
+        share.
+        """
+        hashes: list[str] = []
+        for start in range(0, len(passwords), self.max_workers):
+            wave = passwords[start:start + self.max_workers]
+            hashes.extend(await asyncio.gather(*(self.hash_async(password) for password in wave)))
+        return hashes
+
+    def stats(self) -> dict:
+        """Return a snapshot of queue depth and wait-time metrics."""
+        with self._lock:
+            return {
+                "executor_type": self.executor_type,
+                "max_workers": self.max_workers,
+                "max_queue_size": self.max_queue_size,
+                "queue_depth": self._in_flight,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "wait_seconds_total": self._wait_total,
+                "wait_seconds_max": self._wait_max,
+                "wait_seconds_mean": self._wait_total / self._completed if self._completed else 0.0,
+            }
+
+    def shutdown(self):
+        """Shut the pool down; it is recreated lazily on next use."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+password_hasher = PasswordHasher(
+    executor_type=settings.HASHING_EXECUTOR,
+    max_workers=settings.HASHING_MAX_WORKERS,
+    max_queue_size=settings.HASHING_MAX_QUEUE_SIZE,
+)
+
+
+def _hashing_queue_depth() -> dict:
+    return {(): password_hasher.stats()["queue_depth"]}
+
+
+def _hashing_wait_seconds() -> dict:
+    return {(): password_hasher.stats()["wait_seconds_total"]}
+
+
+registry.callback(
+    "password_hashing_queue_depth", "Password hashing jobs queued or running.", "gauge", _hashing_queue_depth,
+)
+registry.callback(
+    "password_hashing_wait_seconds_total",
+    "Time password hashing jobs spent waiting for a worker.",
+    "counter",
+    _hashing_wait_seconds,
+)
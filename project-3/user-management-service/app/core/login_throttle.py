@@ -0,0 +1,272 @@
+"""Token-bucket throttling of login attempts, checked before any password is verified.
+
+Every attempt against ``POST /token`` costs a full password verification, so
+credential stuffing turns directly into CPU load. ``LoginThrottle`` keeps one
+bucket per (lower-cased) username and one per client IP; an attempt takes a
+token from each, and once either is empty the request is answered with 429
+and ``Retry-After`` without touching the database or the hashing pool.
+
+Buckets live in a pluggable backend: ``memory`` keeps them per process,
+``postgres`` shares them across workers and replicas through the
+``login_throttle_buckets`` table.
+"""
+import importlib
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException, status
+from sqlalchemy import Engine, case, delete, func
+from sqlalchemy.dialects.postgresql import insert
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.session import engine
+from app.models.login_throttle import LoginThrottleBucket
+
+logger = logging.getLogger(__name__)
+
+# How often stale buckets are dropped from the backend.
+PRUNE_INTERVAL_SECONDS = 60.0
+
+
+class LoginThrottledException(HTTPException):
+    def __init__(self, retry_after: float):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, please retry later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+class RateLimitBackend:
+    """Stores token buckets by key.
+
+    ``take`` refills the bucket for the time elapsed since it was last
+    touched, then removes one token if there is one. It returns ``0.0`` when
+    the attempt is allowed, otherwise the seconds until a token is available.
+    ``blocking`` backends are called from a worker thread.
+    """
+
+    blocking = False
+
+    def take(self, key: str, capacity: float, refill_per_second: float) -> float:
+        raise NotImplementedError
+
+    def prune(self, max_idle_seconds: float):
+        """Drop buckets untouched for ``max_idle_seconds``; they would be full again anyway."""
+
+    def clear(self):
+        pass
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Per-process buckets in a size-bounded LRU.
+
+    Evicting a bucket resets it to full, so ``max_keys`` should comfortably
+    exceed the number of usernames and IPs seen within a refill period.
+    """
+
+    def __init__(self, max_keys: int | None = None, clock=time.monotonic):
+        self.max_keys = max_keys or settings.LOGIN_THROTTLE_MEMORY_MAX_KEYS
+        self._clock = clock
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: float, refill_per_second: float) -> float:
+        now = self._clock()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * refill_per_second)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return 0.0 if allowed else (1 - tokens) / refill_per_second
+
+    def prune(self, max_idle_seconds: float):
+        cutoff = self._clock() - max_idle_seconds
+        with self._lock:
+            # Least recently touched first, so stop at the first live bucket.
+            while self._buckets and next(iter(self._buckets.values()))[1] < cutoff:
+                self._buckets.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class PostgresRateLimitBackend(RateLimitBackend):
+    """Buckets shared through the ``login_throttle_buckets`` table.
+
+    Each attempt is a single ``INSERT ... ON CONFLICT DO UPDATE`` that refills
+    and takes from the bucket under the row lock, so concurrent attempts on
+    any replica cannot overdraw it.
+    """
+
+    blocking = True
+
+    def __init__(self, bind: Engine | None = None):
+        self.bind = bind or engine
+
+    def take(self, key: str, capacity: float, refill_per_second: float) -> float:
+        table = LoginThrottleBucket.__table__
+        now = func.extract("epoch", func.now())
+        refilled = func.least(capacity, table.c.tokens + (now - table.c.updated_at) * refill_per_second)
+        statement = insert(table).values(key=key, tokens=capacity - 1, updated_at=now, allowed=True)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.key],
+            set_={
+                "tokens": refilled - case((refilled >= 1, 1), else_=0),
+                "updated_at": now,
+                "allowed": refilled >= 1,
+            },
+        ).returning(table.c.tokens, table.c.allowed)
+        with self.bind.begin() as connection:
+            tokens, allowed = connection.execute(statement).one()
+        return 0.0 if allowed else (1 - tokens) / refill_per_second
+
+    def prune(self, max_idle_seconds: float):
+        table = LoginThrottleBucket.__table__
+        cutoff = func.extract("epoch", func.now()) - max_idle_seconds
+        with self.bind.begin() as connection:
+            connection.execute(delete(table).where(table.c.updated_at < cutoff))
+
+    def clear(self):
+        with self.bind.begin() as connection:
+            connection.execute(delete(LoginThrottleBucket.__table__))
+
+
+BACKENDS = {
+    "memory": MemoryRateLimitBackend,
+    "postgres": PostgresRateLimitBackend,
+}
+
+
+def _load_backend(name: str) -> type[RateLimitBackend]:
+    """Resolve a backend by short name or ``package.module:ClassName``."""
+    if name in BACKENDS:
+        return BACKENDS[name]
+    module_name, _, class_name = name.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+class LoginThrottle:
+    """Per-username and per-client-IP token buckets for login attempts.
+
+    Args:
+        username_burst: Attempts a username may make back to back.
+        username_per_minute: Rate at which a username's attempts refill.
+        ip_burst: Attempts a client IP may make back to back.
+        ip_per_minute: Rate at which a client IP's attempts refill.
+        backend: ``"memory"``, ``"postgres"`` or a ``package.module:ClassName`` path.
+        enabled: When false every attempt is allowed and nothing is stored.
+    """
+
+    def __init__(
+        self,
+        username_burst: int,
+        username_per_minute: float,
+        ip_burst: int,
+        ip_per_minute: float,
+        backend: str = "memory",
+        enabled: bool = True,
+    ):
+        self.enabled = enabled
+        self.limits = {
+            "username": (float(username_burst), username_per_minute / 60),
+            "ip": (float(ip_burst), ip_per_minute / 60),
+        }
+        self.backend = _load_backend(backend)()
+        # A bucket idle this long has refilled completely.
+        self.max_idle_seconds = max(capacity / rate for capacity, rate in self.limits.values())
+        self._next_prune = 0.0
+        self._lock = threading.Lock()
+        self._checked = 0
+        self._allowed = 0
+        self._rejected = {"username": 0, "ip": 0}
+        self._backend_errors = 0
+
+    def check(self, username: str, client_ip: str | None):
+        """Take a token for the client IP and then the username.
+
+        Raises `LoginThrottledException` if either bucket is empty. The
+        throttle fails open: a backend error is logged and the attempt allowed.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._checked += 1
+        try:
+            self._maybe_prune()
+            for scope, value in (("ip", client_ip), ("username", username.lower())):
+                if value is None:
+                    continue
+                capacity, rate = self.limits[scope]
+                retry_after = self.backend.take(f"{scope}:{value}", capacity, rate)
+                if retry_after > 0:
+                    with self._lock:
+                        self._rejected[scope] += 1
+                    raise LoginThrottledException(retry_after)
+        except LoginThrottledException:
+            raise
+        except Exception:
+            logger.exception("Login throttle backend failed; allowing the attempt")
+            with self._lock:
+                self._backend_errors += 1
+            return
+        with self._lock:
+            self._allowed += 1
+
+    async def check_async(self, username: str, client_ip: str | None):
+        """`check` without blocking the event loop on a database-backed store."""
+        if self.enabled and self.backend.blocking:
+            await run_in_threadpool(self.check, username, client_ip)
+        else:
+            self.check(username, client_ip)
+
+    def _maybe_prune(self):
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_prune:
+                return
+            self._next_prune = now + PRUNE_INTERVAL_SECONDS
+        self.backend.prune(self.max_idle_seconds)
+
+    def clear(self):
+        """Drop every bucket and reset the counters."""
+        self.backend.clear()
+        with self._lock:
+            self._checked = self._allowed = self._backend_errors = 0
+            self._rejected = {"username": 0, "ip": 0}
+
+    def stats(self) -> dict:
+        """Return attempt counters, including the password verifications avoided."""
+        with self._lock:
+            rejected = sum(self._rejected.values())
+            return {
+                "enabled": self.enabled,
+                "backend": type(self.backend).__name__,
+                "checked": self._checked,
+                "allowed": self._allowed,
+                "rejected_username": self._rejected["username"],
+                "rejected_ip": self._rejected["ip"],
+                # Each rejection is a password verification that never ran.
+                "verifications_avoided": rejected,
+                "backend_errors": self._backend_errors,
+            }
+
+
+login_throttle = LoginThrottle(
+    username_burst=settings.LOGIN_THROTTLE_USERNAME_BURST,
+    username_per_minute=settings.LOGIN_THROTTLE_USERNAME_PER_MINUTE,
+    ip_burst=settings.LOGIN_THROTTLE_IP_BURST,
+    ip_per_minute=settings.LOGIN_THROTTLE_IP_PER_MINUTE,
+    backend=settings.LOGIN_THROTTLE_BACKEND,
+    enabled=settings.LOGIN_THROTTLE_ENABLED,
+)
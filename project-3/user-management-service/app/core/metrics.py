@@ -0,0 +1,323 @@
+"""In-process metrics with Prometheus text exposition.
+
+Recording has to stay cheap on paths that run on every request and every SQL
+statement, so metrics never take a lock to record. Each labelled series keeps
+one cell per thread (a plain list reached through ``threading.local``) that
+only its own thread writes; a scrape adds the cells up. When a thread exits,
+its cell is folded into the series' retired totals so short-lived worker
+threads do not accumulate.
+
+A scrape runs concurrently with recording, so a histogram's buckets, sum and
+count may be a few observations apart in one scrape. Prometheus tolerates
+that, and the next scrape catches up.
+"""
+import math
+import threading
+import weakref
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from contextvars import ContextVar
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+
+class _Series:
+    """One labelled series: per-thread cells of ``size`` floats."""
+
+    __slots__ = ("_cells", "_local", "_lock", "_retired", "_size", "__weakref__")
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cells: list[list[float]] = []
+        self._retired = [0.0] * size
+
+    def cell(self) -> list[float]:
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = self._local.cell = [0.0] * self._size
+            with self._lock:
+                self._cells.append(cell)
+            weakref.finalize(threading.current_thread(), _retire, weakref.ref(self), cell)
+            return cell
+
+    def retire(self, cell: list[float]):
+        with self._lock:
+            self._cells.remove(cell)
+            for i, value in enumerate(cell):
+                self._retired[i] += value
+
+    def values(self) -> list[float]:
+        with self._lock:
+            totals = list(self._retired)
+            for cell in self._cells:
+                for i, value in enumerate(cell):
+                    totals[i] += value
+        return totals
+
+
+def _retire(series_ref: weakref.ref, cell: list[float]):
+    series = series_ref()
+    if series is not None:
+        series.retire(cell)
+
+
+class CounterSeries(_Series):
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__(1)
+
+    def inc(self, amount: float = 1.0):
+        self.cell()[0] += amount
+
+
+class GaugeSeries(_Series):
+    """A gauge that only moves by increments, so it can be sharded like a counter."""
+
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__(1)
+
+    def inc(self, amount: float = 1.0):
+        self.cell()[0] += amount
+
+    def dec(self, amount: float = 1.0):
+        self.cell()[0] -= amount
+
+
+class HistogramSeries(_Series):
+    """Cell layout: one count per bucket (the last one is +Inf), then the sum, then the count."""
+
+    __slots__ = ("_bounds",)
+
+    def __init__(self, bounds: tuple[float, ...]):
+        super().__init__(len(bounds) + 3)
+        self._bounds = bounds
+
+    def observe(self, value: float):
+        cell = self.cell()
+        cell[bisect_left(self._bounds, value)] += 1
+        cell[-2] += value
+        cell[-1] += 1
+
+
+class Metric:
+    """A named metric family; `labels` returns (and caches) the series for one set of label values."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series: dict[tuple[str, ...], _Series] = {}
+        self._lock = threading.Lock()
+
+    def _new_series(self) -> _Series:
+        raise NotImplementedError
+
+    def labels(self, *values: str) -> _Series:
+        series = self._series.get(values)
+        if series is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}")
+            with self._lock:
+                series = self._series.setdefault(values, self._new_series())
+        return series
+
+    def samples(self) -> Iterable[tuple[str, dict, float]]:
+        for values, series in list(self._series.items()):
+            yield self.name, dict(zip(self.labelnames, values, strict=True)), series.values()[0]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_series(self) -> CounterSeries:
+        return CounterSeries()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def _new_series(self) -> GaugeSeries:
+        return GaugeSeries()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self.labels().dec(amount)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(bucket for bucket in buckets if bucket != math.inf))
+
+    def _new_series(self) -> HistogramSeries:
+        return HistogramSeries(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def samples(self) -> Iterable[tuple[str, dict, float]]:
+        for values, series in list(self._series.items()):
+            labels = dict(zip(self.labelnames, values, strict=True))
+            *counts, total, count = series.values()
+            cumulative = 0.0
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts, strict=True):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+
+class CallbackMetric(Metric):
+    """A counter or gauge whose values are read from ``callback`` at scrape time.
+
+    ``callback`` returns a mapping of label-value tuples to values.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        kind: str,
+        callback: Callable[[], dict[tuple[str, ...], float]],
+        labelnames: Iterable[str] = (),
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self.callback = callback
+
+    def samples(self) -> Iterable[tuple[str, dict, float]]:
+        for values, value in self.callback().items():
+            yield self.name, dict(zip(self.labelnames, values, strict=True)), value
+
+
+class MetricsRegistry:
+    """The set of metrics rendered by ``GET /metrics``."""
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(
+        self,
+        name: str,
+        documentation: str,
+        kind: str,
+        callback: Callable[[], dict[tuple[str, ...], float]],
+        labelnames: Iterable[str] = (),
+    ) -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, kind, callback, labelnames))
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {_escape_help(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                if labels:
+                    rendered = ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels.items())
+                    lines.append(f"{name}{{{rendered}}} {_format_value(value)}")
+                else:
+                    lines.append(f"{name} {_format_value(value)}")
+        lines.append("")
+        return "\n".join(lines)
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    return repr(float(value))
+
+
+class RequestMetrics:
+    """The current request's route and the database work done on its behalf."""
+
+    __slots__ = ("db_seconds", "db_statements", "route")
+
+    def __init__(self, route: str | None = None):
+        self.route = route
+        self.db_statements = 0
+        self.db_seconds = 0.0
+
+
+# Set by MetricsMiddleware for the duration of each request. The object is
+# mutated, never replaced, so work in threadpool copies of the context counts too.
+current_request: ContextVar[RequestMetrics | None] = ContextVar("current_request", default=None)
+
+registry = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route", "status"),
+)
+HTTP_REQUESTS_IN_PROGRESS = registry.gauge(
+    "http_requests_in_progress", "HTTP requests currently being served.", ("method", "route"),
+)
+DB_STATEMENT_DURATION = registry.histogram(
+    "db_statement_duration_seconds",
+    "Time spent executing single SQL statements, by statement type.",
+    ("operation",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+DB_STATEMENTS_PER_REQUEST = registry.histogram(
+    "db_statements_per_request",
+    "SQL statements executed per HTTP request.",
+    ("route",),
+    buckets=(0, 1, 2, 3, 4, 5, 8, 13, 21, 50),
+)
+DB_TIME_PER_REQUEST = registry.histogram(
+    "db_time_per_request_seconds", "Time spent in SQL statements per HTTP request.", ("route",),
+)
+PASSWORD_HASH_DURATION = registry.histogram(
+    "password_hash_duration_seconds",
+    "Duration of password hashing and verification.",
+    ("operation",),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0),
+)
+JWT_DECODE_FAILURES = registry.counter(
+    "jwt_decode_failures_total", "Access tokens rejected while decoding, by reason.", ("reason",),
+)
@@ -0,0 +1,265 @@
+"""On-demand profiling of single requests.
+
+`SamplingProfiler` samples the Python stacks of every thread at a fixed
+interval, so a request's time shows up whether it runs on the event loop, on
+an AnyIO worker thread (sync endpoints) or in the password hashing pool.
+Threads that sat parked on one stack, using next to no CPU, are left out.
+Samples are taken from the whole process, so on a busy replica concurrent
+requests appear in the profile too; profile a quiet replica or replay the
+request to isolate it.
+
+Profiles are written in the speedscope format (https://www.speedscope.app),
+one sampled profile per thread. With ``memory`` profiling, tracemalloc also
+records where the request allocated, in a separate ``.memory.json`` file.
+
+A request is profiled when it carries ``X-Profile`` with a valid
+``X-Admin-Key``, or a ``profile`` query parameter signed by
+`sign_profile_request`, so a profiling link can be shared without the key.
+"""
+import hashlib
+import hmac
+import json
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from datetime import UTC, datetime
+
+from app.core.config import settings
+
+PROFILE_MODES = ("cpu", "memory")
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+# Threads that kept one stack and used less CPU than this were parked, e.g. in
+# a timed wait, rather than working on the request.
+_PARKED_CPU_SECONDS = 0.0005
+
+_PROFILE_NAME = re.compile(r"^[\w.-]+\.(speedscope|memory)\.json$")
+
+
+class SamplingProfiler:
+    """Samples every thread's stack each ``interval`` seconds until stopped.
+
+    The sampler needs the GIL to take a sample, so a thread holding it in
+    pure Python delays samples to the interpreter's switch interval (5 ms by
+    default); samples are weighted by the real time between them.
+    """
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self._frames: dict[tuple[str, str, int], int] = {}
+        self._samples: dict[int, list[tuple[tuple[int, ...], float]]] = {}
+        self._thread_names: dict[int, str] = {}
+        self._cpu_started: dict[int, float | None] = {}
+        self._cpu_used: dict[int, float] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.started_at = 0.0
+        self.duration = 0.0
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    def _run(self):
+        own = threading.get_ident()
+        last = self.started_at
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    samples = self._samples.get(ident)
+                    if samples is None:
+                        samples = self._samples[ident] = []
+                        self._cpu_started[ident] = _thread_cpu_time(ident)
+                    samples.append((self._stack(frame), now - last))
+            last = now
+        self._thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, started in self._cpu_started.items():
+            ended = _thread_cpu_time(ident) if started is not None else None
+            if ended is not None:
+                self._cpu_used[ident] = ended - started
+
+    def _stack(self, frame) -> tuple[int, ...]:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            key = (code.co_qualname, code.co_filename, code.co_firstlineno)
+            index = self._frames.get(key)
+            if index is None:
+                index = self._frames[key] = len(self._frames)
+            stack.append(index)
+            frame = frame.f_back
+        stack.reverse()
+        return tuple(stack)
+
+    def speedscope(self, name: str) -> dict:
+        """Return the samples as a speedscope document with one profile per busy thread."""
+        profiles = []
+        for ident, samples in self._samples.items():
+            parked = self._cpu_used.get(ident, 1.0) < _PARKED_CPU_SECONDS
+            if parked and len({stack for stack, _ in samples}) <= 1:
+                continue  # parked for the whole request
+            weights = [weight * 1000 for _, weight in samples]
+            profiles.append({
+                "type": "sampled",
+                "name": self._thread_names.get(ident, str(ident)),
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": [list(stack) for stack, _ in samples],
+                "weights": weights,
+            })
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "user-management-service",
+            "shared": {
+                "frames": [
+                    {"name": function, "file": filename, "line": line}
+                    for function, filename, line in self._frames
+                ],
+            },
+            "profiles": profiles,
+        }
+
+
+def _thread_cpu_time(ident: int) -> float | None:
+    """Return the CPU time thread ``ident`` has used, where the platform can tell."""
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(ident))
+    except (AttributeError, OSError):
+        return None
+
+
+class AllocationTracker:
+    """Tracks allocations with tracemalloc between `start` and `stop`."""
+
+    def __init__(self, frames: int = 25, limit: int = 50):
+        self.frames = frames
+        self.limit = limit
+        self._started_tracing = False
+        self._before = None
+        self.report: dict = {}
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracing = True
+        tracemalloc.reset_peak()
+        self._before = tracemalloc.take_snapshot()
+
+    def stop(self):
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if self._started_tracing:
+            tracemalloc.stop()
+        differences = after.compare_to(self._before, "lineno")
+        self.report = {
+            "peak_bytes": peak,
+            "allocated_bytes": sum(max(stat.size_diff, 0) for stat in differences),
+            "top": [
+                {
+                    "location": str(stat.traceback[0]),
+                    "size_diff_bytes": stat.size_diff,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in differences[:self.limit]
+            ],
+        }
+
+
+def _signature(mode: str, expires_at: int, method: str, path: str) -> str:
+    message = f"{mode}:{expires_at}:{method.upper()}:{path}".encode()
+    return hmac.new(settings.ADMIN_API_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+def sign_profile_request(method: str, path: str, mode: str = "cpu", ttl_seconds: int = 300) -> str:
+    """Return a ``profile`` query value that profiles ``method path`` until it expires."""
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode: {mode}")
+    if not settings.ADMIN_API_KEY:
+        raise ValueError("Signing profile requests needs ADMIN_API_KEY")
+    expires_at = int(time.time()) + ttl_seconds
+    return f"{mode}.{expires_at}.{_signature(mode, expires_at, method, path)}"
+
+
+def verify_profile_request(value: str, method: str, path: str) -> str | None:
+    """Return the profile mode of a signed ``profile`` query value, or ``None`` if it is invalid or expired."""
+    if not settings.ADMIN_API_KEY:
+        return None
+    mode, _, rest = value.partition(".")
+    expires_at, _, signature = rest.partition(".")
+    if mode not in PROFILE_MODES or not expires_at.isdigit() or int(expires_at) < time.time():
+        return None
+    expected = _signature(mode, int(expires_at), method, path)
+    return mode if hmac.compare_digest(signature.encode(), expected.encode()) else None
+
+
+class ProfileStore:
+    """Directory of profile artifacts, keeping only the newest ``max_files`` profiles."""
+
+    def __init__(self, directory: str, max_files: int = 50):
+        self.directory = directory
+        self.max_files = max_files
+        self._lock = threading.Lock()
+
+    def new_name(self, method: str, route: str) -> str:
+        stamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%S")
+        slug = re.sub(r"[^\w-]+", "_", route).strip("_") or "root"
+        return f"{stamp}-{method.lower()}-{slug}-{uuid.uuid4().hex[:8]}"
+
+    def save(self, name: str, speedscope: dict, memory: dict | None = None):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, f"{name}.speedscope.json"), "w", encoding="utf-8") as file:
+            json.dump(speedscope, file)
+        if memory is not None:
+            with open(os.path.join(self.directory, f"{name}.memory.json"), "w", encoding="utf-8") as file:
+                json.dump(memory, file, indent=2)
+        self._prune()
+
+    def _prune(self):
+        with self._lock:
+            profiles = sorted(
+                entry.name for entry in self._entries() if entry.name.endswith(".speedscope.json")
+            )
+            for profile in profiles[:max(len(profiles) - self.max_files, 0)]:
+                base = profile.removesuffix(".speedscope.json")
+                for suffix in (".speedscope.json", ".memory.json"):
+                    try:
+                        os.remove(os.path.join(self.directory, base + suffix))
+                    except FileNotFoundError:
+                        pass
+
+    def _entries(self) -> list[os.DirEntry]:
+        try:
+            with os.scandir(self.directory) as entries:
+                return [entry for entry in entries if _PROFILE_NAME.match(entry.name)]
+        except FileNotFoundError:
+            return []
+
+    def artifacts(self) -> list[dict]:
+        """Return the stored artifacts, newest first."""
+        return [
+            {"name": entry.name, "size_bytes": entry.stat().st_size}
+            for entry in sorted(self._entries(), key=lambda entry: entry.name, reverse=True)
+        ]
+
+    def path(self, name: str) -> str | None:
+        """Return the path of artifact ``name``, or ``None`` if there is no such artifact."""
+        if not _PROFILE_NAME.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+
+profile_store = ProfileStore(settings.PROFILING_DIR, max_files=settings.PROFILING_MAX_FILES)
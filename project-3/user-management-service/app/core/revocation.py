@@ -0,0 +1,198 @@
+"""Per-worker Bloom filter of revoked token ids.
+
+Every authenticated request has to know whether its token was revoked, but
+almost none are. Each worker mirrors the ``jti`` of every unexpired row in
+``revoked_tokens`` into a `BloomFilter`, so a negative answer needs no I/O;
+only possible matches are confirmed against the table.
+
+A background thread tops the filter up with rows revoked since its last
+refresh and periodically rebuilds it from the unexpired rows alone, which is
+how expired entries leave both the table and the filter. Revocations made by
+this worker are added immediately; those made elsewhere are seen after at
+most one refresh interval.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import Engine, func, select
+
+from app.core.cache import BloomFilter
+from app.core.config import settings
+from app.crud.crud_revoked_token import delete_expired_statement, live_revocations_statement
+from app.db.session import engine
+from app.models.revoked_token import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+# revoked_at is the revoking transaction's start time, so a row can commit a
+# little after later-stamped ones; refreshes re-read this much history.
+REFRESH_OVERLAP = timedelta(seconds=30)
+
+
+class TokenRevocationFilter:
+    """Answers "might this ``jti`` be revoked?" from memory.
+
+    Until the first load completes every token is a possible match, so
+    nothing revoked slips through while the filter is cold.
+
+    Args:
+        bind: Engine the refresh thread reads ``revoked_tokens`` through.
+        capacity: Revocations the filter is sized for; a rebuild sizes it for
+            at least twice the live count.
+        error_rate: Target false-positive rate at ``capacity``.
+        refresh_interval: Seconds between incremental refreshes.
+        rebuild_interval: Seconds between full rebuilds, which drop expired entries.
+        enabled: When false no token is ever considered revoked.
+    """
+
+    def __init__(
+        self,
+        bind: Engine,
+        capacity: int,
+        error_rate: float,
+        refresh_interval: float,
+        rebuild_interval: float,
+        enabled: bool = True,
+    ):
+        self.bind = bind
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self.enabled = enabled
+        self._filter = BloomFilter(capacity, error_rate)
+        self._loaded = False
+        self._watermark: datetime | None = None
+        self._next_rebuild = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._checks = 0
+        self._possible_matches = 0
+        self._confirmed = 0
+        self._false_positives = 0
+        self._refreshes = 0
+        self._rebuilds = 0
+        self._errors = 0
+
+    def might_be_revoked(self, jti: str) -> bool:
+        """Return ``False`` if ``jti`` is certainly not revoked, ``True`` if it needs confirming."""
+        if not self.enabled:
+            return False
+        possible = not self._loaded or jti in self._filter
+        with self._lock:
+            self._checks += 1
+            self._possible_matches += possible
+        return possible
+
+    def record_confirmation(self, revoked: bool):
+        """Count the outcome of confirming a possible match against the table."""
+        with self._lock:
+            if revoked:
+                self._confirmed += 1
+            else:
+                self._false_positives += 1
+
+    def add(self, jti: str):
+        """Add a revocation made by this worker without waiting for a refresh."""
+        self._filter.add(jti)
+
+    def rebuild(self):
+        """Replace the filter with one holding only unexpired revocations, deleting expired rows."""
+        now = datetime.utcnow()
+        with self.bind.begin() as connection:
+            connection.execute(delete_expired_statement(now))
+            count = connection.scalar(select(func.count()).select_from(RevokedToken))
+            bloom = BloomFilter(max(self.capacity, 2 * count), self.error_rate)
+            watermark = self._collect(connection.execute(live_revocations_statement(now)), bloom, None)
+        self._filter = bloom
+        self._watermark = watermark
+        self._loaded = True
+        with self._lock:
+            self._rebuilds += 1
+
+    def refresh(self):
+        """Add rows revoked since the last refresh; rebuild instead when one is due or the filter is full."""
+        if not self._loaded or time.monotonic() >= self._next_rebuild or len(self._filter) > self._filter.capacity:
+            self.rebuild()
+            self._next_rebuild = time.monotonic() + self.rebuild_interval
+            return
+        since = self._watermark - REFRESH_OVERLAP if self._watermark else None
+        with self.bind.connect() as connection:
+            rows = connection.execute(live_revocations_statement(datetime.utcnow(), since))
+            self._watermark = self._collect(rows, self._filter, self._watermark)
+        with self._lock:
+            self._refreshes += 1
+
+    @staticmethod
+    def _collect(rows, bloom: BloomFilter, watermark: datetime | None) -> datetime | None:
+        for jti, revoked_at in rows:
+            bloom.add(jti)
+            if watermark is None or revoked_at > watermark:
+                watermark = revoked_at
+        return watermark
+
+    def _run_forever(self):
+        wait = 0.0
+        while not self._stop.wait(wait):
+            wait = self.refresh_interval
+            try:
+                self.refresh()
+            except Exception:
+                with self._lock:
+                    self._errors += 1
+                logger.exception("Token revocation refresh failed")
+
+    def start(self):
+        if not self.enabled or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_forever, name="token-revocation", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def clear(self):
+        """Reset to an empty, loaded filter and zero the counters."""
+        self._filter = BloomFilter(self.capacity, self.error_rate)
+        self._watermark = None
+        self._loaded = True
+        with self._lock:
+            self._checks = self._possible_matches = self._confirmed = self._false_positives = 0
+            self._refreshes = self._rebuilds = self._errors = 0
+
+    def stats(self) -> dict:
+        """Return filter size and how many checks were answered without I/O."""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "loaded": self._loaded,
+                "entries": len(self._filter),
+                "capacity": self._filter.capacity,
+                "bits": self._filter.num_bits,
+                "hashes": self._filter.num_hashes,
+                "checks": self._checks,
+                "answered_in_memory": self._checks - self._possible_matches,
+                "possible_matches": self._possible_matches,
+                "confirmed_revoked": self._confirmed,
+                "false_positives": self._false_positives,
+                "refreshes": self._refreshes,
+                "rebuilds": self._rebuilds,
+                "errors": self._errors,
+            }
+
+
+revocation_filter = TokenRevocationFilter(
+    bind=engine,
+    capacity=settings.TOKEN_REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.TOKEN_REVOCATION_BLOOM_ERROR_RATE,
+    refresh_interval=settings.TOKEN_REVOCATION_REFRESH_SECONDS,
+    rebuild_interval=settings.TOKEN_REVOCATION_REBUILD_SECONDS,
+    enabled=settings.TOKEN_REVOCATION_ENABLED,
+)
@@ -1,34 +1,140 @@
 """Security-related functions (password hashing, JWT creation).
 """
+import hashlib
+import secrets
+import time
+import uuid
 from datetime import UTC, datetime, timedelta
 
-from jose import jwt
+from jose import ExpiredSignatureError, JWTError, jwt
 from passlib.context import CryptContext
 
+from app.core.cache import LRUCache
 from app.core.config import settings
+from app.core.metrics import JWT_DECODE_FAILURES, PASSWORD_HASH_DURATION
+from app.core.tracing import traced
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+PASSWORD_HASH_SCHEMES = ("bcrypt", "argon2")
+
+
+def build_password_context(
+    scheme: str = "bcrypt",
+    bcrypt_rounds: int = 12,
+    argon2_time_cost: int = 3,
+    argon2_memory_cost: int = 65536,
+    argon2_parallelism: int = 4,
+) -> CryptContext:
+    """Build the password context that hashes with ``scheme`` at exactly the given cost.
+
+    Hashes from the other supported scheme still verify but are deprecated, and
+    pinning the minimum and maximum cost to the configured value makes
+    ``needs_update`` flag any hash made at a different cost, cheaper or dearer.
+    argon2 always uses the argon2id variant and needs ``argon2-cffi``.
+    """
+    if scheme not in PASSWORD_HASH_SCHEMES:
+        raise ValueError(f"Unknown password hash scheme: {scheme}")
+    return CryptContext(
+        schemes=[scheme, *(other for other in PASSWORD_HASH_SCHEMES if other != scheme)],
+        deprecated="auto",
+        bcrypt__default_rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds,
+        bcrypt__max_rounds=bcrypt_rounds,
+        argon2__type="ID",
+        argon2__default_rounds=argon2_time_cost,
+        argon2__min_rounds=argon2_time_cost,
+        argon2__max_rounds=argon2_time_cost,
+        argon2__memory_cost=argon2_memory_cost,
+        argon2__parallelism=argon2_parallelism,
+    )
+
+
+pwd_context = build_password_context(
+    scheme=settings.PASSWORD_HASH_SCHEME,
+    bcrypt_rounds=settings.BCRYPT_ROUNDS,
+    argon2_time_cost=settings.ARGON2_TIME_COST,
+    argon2_memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2_parallelism=settings.ARGON2_PARALLELISM,
+)
 
 ALGORITHM = "HS256"
 
+token_cache = LRUCache(max_size=settings.TOKEN_CACHE_MAX_SIZE)
+
+_verify_duration = PASSWORD_HASH_DURATION.labels("verify")
+_hash_duration = PASSWORD_HASH_DURATION.labels("hash")
+
+@traced("password.verify")
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password.
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    started = time.perf_counter()
+    try:
+        return pwd_context.verify(plain_password, hashed_password)
+    finally:
+        _verify_duration.observe(time.perf_counter() - started)
 
+@traced("password.hash")
 def get_password_hash(password: str) -> str:
     """Hash a plain password.
     """
-    return pwd_context.hash(password)
+    started = time.perf_counter()
+    try:
+        return pwd_context.hash(password)
+    finally:
+        _hash_duration.observe(time.perf_counter() - started)
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Return whether a hash uses a deprecated scheme or a cost other than the configured one.
+    """
+    return pwd_context.needs_update(hashed_password)
+
+def admin_key_matches(admin_key: str | None) -> bool:
+    """Return whether ``admin_key`` is the configured admin key; always false while none is configured.
+    """
+    return bool(settings.ADMIN_API_KEY) and admin_key is not None and secrets.compare_digest(
+        admin_key.encode(), settings.ADMIN_API_KEY.encode(),
+    )
 
+@traced("jwt.encode")
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     """Create a new JWT access token.
+
+    Each token carries a unique `jti` claim so it can be revoked before it expires.
     """
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.now(UTC) + expires_delta
     else:
         expire = datetime.now(UTC) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
+
+def decode_access_token(token: str) -> dict:
+    """Decode and verify a JWT access token, raising `JWTError` if it is invalid.
+
+    Verified claims are cached by token digest until the token's own `exp`, so a
+    client replaying the same bearer token skips signature checks.
+    """
+    if not settings.TOKEN_CACHE_ENABLED:
+        return _decode(token)
+
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is None:
+        payload = _decode(token)
+        expires_at = payload.get("exp")
+        if isinstance(expires_at, int | float):
+            token_cache.set(key, payload, expires_at=expires_at)
+    return payload
+
+@traced("jwt.decode")
+def _decode(token: str) -> dict:
+    try:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+    except ExpiredSignatureError:
+        JWT_DECODE_FAILURES.labels("expired").inc()
+        raise
+    except JWTError:
+        JWT_DECODE_FAILURES.labels("invalid").inc()
+        raise
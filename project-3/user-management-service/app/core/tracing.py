@@ -0,0 +1,121 @@
+"""Opt-in OpenTelemetry tracing.
+
+`configure_tracing` (called from the app's lifespan when ``TRACING_ENABLED``
+is set) installs a tracer with ratio-based sampling that honours the sampling
+decision of an inbound W3C ``traceparent``. Until then, and whenever tracing
+is off, `span` returns a shared no-op context manager and `traced` wrappers
+cost one ``None`` check, so the instrumentation can stay in hot paths.
+
+The tracer provider is private to this module rather than the global
+OpenTelemetry one, so tests and scripts can reconfigure it freely. Needs the
+``tracing`` extra (``opentelemetry-sdk``).
+"""
+import contextlib
+import functools
+import inspect
+from collections.abc import Callable, Mapping
+
+from app.core.config import settings
+
+try:
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+    from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+except ImportError:  # the "tracing" extra is not installed
+    TraceContextTextMapPropagator = None
+
+_NO_SPAN = contextlib.nullcontext()
+
+_tracer = None
+_provider = None
+_propagator = TraceContextTextMapPropagator() if TraceContextTextMapPropagator is not None else None
+
+
+def configure_tracing(exporter=None, sample_rate: float | None = None):
+    """Start recording spans, exporting them through ``exporter`` or the one configured in settings."""
+    global _tracer, _provider
+    if _propagator is None:
+        raise RuntimeError("Tracing needs opentelemetry-sdk; install the service with its 'tracing' extra")
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    from app.core.tracing_exporters import build_exporter
+
+    shutdown_tracing()
+    rate = settings.TRACING_SAMPLE_RATE if sample_rate is None else sample_rate
+    provider = TracerProvider(
+        sampler=ParentBased(TraceIdRatioBased(rate)),
+        resource=Resource.create({"service.name": settings.TRACING_SERVICE_NAME}),
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter or build_exporter()))
+    _provider, _tracer = provider, provider.get_tracer(__name__)
+
+
+def shutdown_tracing():
+    """Flush pending spans and stop recording."""
+    global _tracer, _provider
+    provider, _provider, _tracer = _provider, None, None
+    if provider is not None:
+        provider.shutdown()
+
+
+def tracing_enabled() -> bool:
+    return _tracer is not None
+
+
+def span(name: str, attributes: Mapping | None = None):
+    """Context manager recording a child span of the current span, if tracing is on."""
+    if _tracer is None:
+        return _NO_SPAN
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+
+def start_span(name: str, attributes: Mapping | None = None, client: bool = False):
+    """Start a span the caller must ``end()``, or return ``None`` if tracing is off.
+
+    For work that starts and finishes in different callbacks, such as SQL
+    statements timed through engine events.
+    """
+    if _tracer is None:
+        return None
+    return _tracer.start_span(name, kind=SpanKind.CLIENT if client else SpanKind.INTERNAL, attributes=attributes)
+
+
+def server_span(name: str, headers: Mapping[str, str], attributes: Mapping | None = None):
+    """Start the span for an inbound request, continuing the trace in its W3C ``traceparent`` header."""
+    if _tracer is None:
+        return _NO_SPAN
+    return _tracer.start_as_current_span(
+        name, context=_propagator.extract(headers), kind=SpanKind.SERVER, attributes=attributes,
+    )
+
+
+def set_error(current_span, description: str):
+    current_span.set_status(Status(StatusCode.ERROR, description))
+
+
+def traced(name: str) -> Callable:
+    """Record each call of the decorated function or coroutine function as a span called ``name``."""
+
+    def decorator(fn: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if _tracer is None:
+                    return await fn(*args, **kwargs)
+                with _tracer.start_as_current_span(name):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return fn(*args, **kwargs)
+            with _tracer.start_as_current_span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,47 @@
+"""Span exporters for `app.core.tracing`; imported only once tracing is configured."""
+import threading
+from collections.abc import Sequence
+
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import ConsoleSpanExporter, SpanExporter, SpanExportResult
+
+from app.core.config import settings
+
+
+class JsonLinesSpanExporter(SpanExporter):
+    """Appends each finished span to ``path`` as one line of OpenTelemetry JSON.
+
+    Needs no collector; the file can be inspected with ``jq`` or replayed into
+    one later.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = "".join(f"{span.to_json(indent=None)}\n" for span in spans)
+        with self._lock:
+            if self._file.closed:
+                return SpanExportResult.FAILURE
+            self._file.write(lines)
+            self._file.flush()
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        with self._lock:
+            self._file.close()
+
+
+def build_exporter() -> SpanExporter:
+    """Return the exporter selected by ``TRACING_EXPORTER``."""
+    if settings.TRACING_EXPORTER == "console":
+        return ConsoleSpanExporter()
+    if settings.TRACING_EXPORTER == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError as exc:
+            raise RuntimeError("TRACING_EXPORTER=otlp needs opentelemetry-exporter-otlp-proto-http") from exc
+        return OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)
+    return JsonLinesSpanExporter(settings.TRACING_FILE_PATH)
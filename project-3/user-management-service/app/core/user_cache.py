@@ -0,0 +1,252 @@
+"""User snapshot cache for authenticated lookups, with cross-worker invalidation.
+
+Snapshots are plain column values keyed by username and by id. Every read
+returns a fresh, detached ``User`` built from them, so callers can never
+mutate the shared copy or accidentally lazy-load through it.
+
+Writes in ``crud_user`` invalidate entries in two steps: ``invalidation_statement``
+is executed inside the writing transaction, and ``invalidate`` runs after the
+commit. The default ``postgres`` backend turns the statement into a
+``pg_notify`` so every worker and replica listening on the channel drops the
+entry once the transaction commits.
+"""
+import importlib
+import json
+import logging
+import select
+import threading
+from collections.abc import Iterable
+from uuid import UUID
+
+from sqlalchemy import Text, cast, func
+from sqlalchemy import select as sql_select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.sql import ColumnElement, Executable
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_COLUMNS = tuple(column.key for column in User.__table__.columns)
+
+# pg_notify payloads are capped at 8000 bytes; larger batches flush everything.
+MAX_NOTIFY_USERS = 50
+FLUSH_ALL = "*"
+
+
+class InvalidationBackend:
+    """Propagates invalidations to other processes.
+
+    ``statement`` is executed in the writer's transaction (so delivery follows
+    the commit); ``publish`` is called after the commit. Subclasses implement
+    whichever suits their transport and call ``on_message`` for every payload
+    received from another process.
+    """
+
+    def __init__(self, on_message):
+        self.on_message = on_message
+
+    def statement(self, payload: str) -> Executable | None:
+        return None
+
+    def returning(self, id_column, username_column) -> ColumnElement | None:
+        """Return an expression to add to a write's RETURNING clause that publishes each returned row."""
+        return None
+
+    def publish(self, payload: str):
+        pass
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class LocalInvalidationBackend(InvalidationBackend):
+    """Single-process backend: only the local cache is invalidated."""
+
+
+class PostgresInvalidationBackend(InvalidationBackend):
+    """Invalidation over Postgres ``LISTEN``/``NOTIFY``."""
+
+    def __init__(self, on_message, channel: str | None = None, dsn: str | None = None):
+        super().__init__(on_message)
+        self.channel = channel or settings.USER_CACHE_INVALIDATION_CHANNEL
+        url = make_url(dsn or settings.DATABASE_URL).set(drivername="postgresql")
+        self.dsn = url.render_as_string(hide_password=False)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def statement(self, payload: str) -> Executable:
+        return sql_select(func.pg_notify(self.channel, payload))
+
+    def returning(self, id_column, username_column) -> ColumnElement:
+        # Builds the same JSON payload as UserSnapshotCache._payload, per row, in SQL.
+        entry = func.json_build_object("id", id_column, "username", username_column)
+        return func.pg_notify(self.channel, cast(func.json_build_array(entry), Text))
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen_forever, name="user-cache-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _listen_forever(self):
+        import psycopg2
+
+        while not self._stop.is_set():
+            try:
+                connection = psycopg2.connect(self.dsn)
+            except psycopg2.Error:
+                logger.exception("User cache listener could not connect; retrying")
+                self._stop.wait(5)
+                continue
+            try:
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.channel}"')
+                # Anything may have changed while we were not listening.
+                self.on_message(FLUSH_ALL)
+                while not self._stop.is_set():
+                    if select.select([connection], [], [], 1.0) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        self.on_message(connection.notifies.pop(0).payload)
+            except psycopg2.Error:
+                logger.exception("User cache listener lost its connection; reconnecting")
+            finally:
+                connection.close()
+
+
+BACKENDS = {
+    "local": LocalInvalidationBackend,
+    "postgres": PostgresInvalidationBackend,
+}
+
+
+def _load_backend(name: str) -> type[InvalidationBackend]:
+    """Resolve a backend by short name or ``package.module:ClassName``."""
+    if name in BACKENDS:
+        return BACKENDS[name]
+    module_name, _, class_name = name.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+class UserSnapshotCache:
+    """TTL- and size-bounded cache of user snapshots keyed by username and id."""
+
+    def __init__(self, max_size: int, ttl: float, backend: str = "local", enabled: bool = True):
+        self.enabled = enabled
+        self._cache = LRUCache(max_size=max_size, ttl=ttl)
+        self.backend = _load_backend(backend)(self.handle_message)
+
+    def get_by_username(self, username: str) -> User | None:
+        return self._get(("username", username))
+
+    def get_by_id(self, user_id: UUID) -> User | None:
+        return self._get(("id", user_id))
+
+    def _get(self, key) -> User | None:
+        if not self.enabled:
+            return None
+        values = self._cache.get(key)
+        if values is None:
+            return None
+        user = User(**values)
+        make_transient_to_detached(user)
+        return user
+
+    def get_token_version(self, user_id: UUID) -> int | None:
+        """Return the user's cached token version, from its own entry or the user's snapshot."""
+        if not self.enabled:
+            return None
+        version = self._cache.get(("token_version", user_id))
+        if version is None:
+            values = self._cache.get(("id", user_id))
+            version = values["token_version"] if values is not None else None
+        return version
+
+    def store_token_version(self, user_id: UUID, token_version: int):
+        """Cache just the token version, for stateless authentication that never loads the user."""
+        if self.enabled:
+            self._cache.set(("token_version", user_id), token_version)
+
+    def store(self, user: User):
+        """Cache a snapshot of ``user``'s column values."""
+        if not self.enabled:
+            return
+        values = {column: getattr(user, column) for column in SNAPSHOT_COLUMNS}
+        self._cache.set(("username", user.username), values)
+        self._cache.set(("id", user.id), values)
+
+    def invalidation_statement(self, users: Iterable[User]) -> Executable | None:
+        """Return a statement to run in the writing transaction, if the backend needs one."""
+        return self.backend.statement(self._payload(users))
+
+    def invalidation_returning(self) -> ColumnElement | None:
+        """Return a RETURNING expression that publishes the invalidation of each written row.
+
+        Lets single-statement writes invalidate without a separate statement;
+        ``None`` if the backend does not use one.
+        """
+        return self.backend.returning(User.id, User.username)
+
+    def invalidate(self, users: Iterable[User]):
+        """Drop ``users`` locally and publish the invalidation to other processes."""
+        users = list(users)
+        for user in users:
+            self._drop(user.id, user.username)
+        self.backend.publish(self._payload(users))
+
+    def handle_message(self, payload: str):
+        """Apply an invalidation payload received from another process."""
+        if payload == FLUSH_ALL:
+            self._cache.clear()
+            return
+        for entry in json.loads(payload):
+            self._drop(UUID(entry["id"]), entry["username"])
+
+    def _drop(self, user_id: UUID | None, username: str | None):
+        self._cache.delete(("id", user_id))
+        self._cache.delete(("username", username))
+        self._cache.delete(("token_version", user_id))
+
+    @staticmethod
+    def _payload(users: Iterable[User]) -> str:
+        users = list(users)
+        if len(users) > MAX_NOTIFY_USERS:
+            return FLUSH_ALL
+        return json.dumps([{"id": str(user.id), "username": user.username} for user in users])
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, **self._cache.stats()}
+
+    def start(self):
+        if self.enabled:
+            self.backend.start()
+
+    def stop(self):
+        self.backend.stop()
+
+
+user_cache = UserSnapshotCache(
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+    backend=settings.USER_CACHE_INVALIDATION_BACKEND,
+    enabled=settings.USER_CACHE_ENABLED,
+)
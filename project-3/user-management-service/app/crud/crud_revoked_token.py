@@ -0,0 +1,39 @@
+"""CRUD operations for RevokedToken model."""
+
+from datetime import datetime
+
+from sqlalchemy import Select, delete, exists, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.revoked_token import RevokedToken
+
+
+def revoke_statement(jti: str, expires_at: datetime):
+    """Record ``jti`` as revoked; revoking the same token twice is a no-op."""
+    return insert(RevokedToken).values(jti=jti, expires_at=expires_at).on_conflict_do_nothing()
+
+
+def revoked_statement(jti: str):
+    return select(exists().where(RevokedToken.jti == jti))
+
+
+def live_revocations_statement(now: datetime, since: datetime | None = None) -> Select:
+    """Select ``(jti, revoked_at)`` of unexpired revocations, optionally only those revoked since ``since``."""
+    statement = select(RevokedToken.jti, RevokedToken.revoked_at).where(RevokedToken.expires_at > now)
+    if since is not None:
+        statement = statement.where(RevokedToken.revoked_at >= since)
+    return statement
+
+
+def delete_expired_statement(now: datetime):
+    return delete(RevokedToken).where(RevokedToken.expires_at <= now)
+
+
+def revoke_token(db: Session, jti: str, expires_at: datetime):
+    db.execute(revoke_statement(jti, expires_at))
+    db.commit()
+
+
+def is_token_revoked(db: Session, jti: str) -> bool:
+    return db.scalar(revoked_statement(jti))
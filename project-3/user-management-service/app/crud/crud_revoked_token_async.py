@@ -0,0 +1,19 @@
+"""Async CRUD operations for RevokedToken model.
+
+Mirrors `app.crud.crud_revoked_token` for `AsyncSession`.
+"""
+
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.crud_revoked_token import revoke_statement, revoked_statement
+
+
+async def revoke_token(db: AsyncSession, jti: str, expires_at: datetime):
+    await db.execute(revoke_statement(jti, expires_at))
+    await db.commit()
+
+
+async def is_token_revoked(db: AsyncSession, jti: str) -> bool:
+    return await db.scalar(revoked_statement(jti))
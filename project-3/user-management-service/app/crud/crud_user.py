@@ -3,30 +3,69 @@
 from datetime import datetime, timedelta
 from uuid import UUID
 
+from sqlalchemy import Row, Select, Update, and_, func, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app.core.user_cache import user_cache
 from app.models.user import User
 from app.schemas.user import UserCreate
 
 
-def soft_delete_users_marked_for_deletion(db: Session):
-    """Soft delete users whose deletion_requested_at is older than 24 hours."""
-    twenty_four_hours_ago = datetime.utcnow() - timedelta(hours=24)
-    users_to_delete = (
-        db.query(User)
-        .filter(
+def _queue_cache_invalidation(db: Session, users: list[User]):
+    """Emit the cache invalidation inside the current transaction, if the backend uses one."""
+    statement = user_cache.invalidation_statement(users)
+    if statement is not None:
+        db.execute(statement)
+
+
+DELETION_GRACE_PERIOD = timedelta(hours=24)
+
+
+def purge_batch_statement(batch_size: int, now: datetime):
+    """Build one purge batch: soft delete up to ``batch_size`` users whose grace period has passed.
+
+    Candidates are claimed with ``FOR UPDATE SKIP LOCKED`` so a batch never
+    waits on rows another transaction holds, and returns the purged ids and
+    usernames for cache invalidation.
+    """
+    candidates = (
+        select(User.id)
+        .where(
             User.is_active == False,
             User.is_deleted == False,
-            User.deletion_requested_at <= twenty_four_hours_ago,
+            User.deletion_requested_at <= now - DELETION_GRACE_PERIOD,
         )
-        .all()
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    return (
+        update(User)
+        .where(User.id.in_(candidates.scalar_subquery()))
+        .values(is_deleted=True, deleted_at=now, token_version=User.token_version + 1)
+        .returning(User.id, User.username)
+        .execution_options(synchronize_session=False)
     )
 
-    for user in users_to_delete:
-        user.is_deleted = True
-        user.deleted_at = datetime.utcnow()
-        db.add(user)
-    db.commit()
+
+def soft_delete_users_marked_for_deletion(db: Session, batch_size: int = 1000) -> int:
+    """Soft delete users whose deletion_requested_at is older than 24 hours.
+
+    Works through the backlog in set-based batches of ``batch_size``, each in
+    its own short transaction, and returns the number of users purged.
+    """
+    now = datetime.utcnow()
+    purged = 0
+    while True:
+        users = db.execute(purge_batch_statement(batch_size, now)).all()
+        if users:
+            _queue_cache_invalidation(db, users)
+        db.commit()
+        user_cache.invalidate(users)
+        purged += len(users)
+        if len(users) < batch_size:
+            return purged
 
 
 def get_user(db: Session, user_id: UUID) -> User | None:
@@ -35,61 +74,261 @@ def get_user(db: Session, user_id: UUID) -> User | None:
 
 
 def get_user_by_email(db: Session, email: str) -> User | None:
-    """Get an active, non-deleted user by email."""
+    """Get an active, non-deleted user by email, ignoring case."""
     return (
         db.query(User)
-        .filter(User.email == email, User.is_active == True, User.is_deleted == False)
+        .filter(func.lower(User.email) == func.lower(email), User.is_active == True, User.is_deleted == False)
         .first()
     )
 
 
 def get_user_by_username(db: Session, username: str) -> User | None:
-    """Get an active, non-deleted user by username."""
+    """Get a non-deleted user by username, ignoring case."""
     return (
         db.query(User)
-        .filter(User.username == username, User.is_deleted == False)
+        .filter(func.lower(User.username) == func.lower(username), User.is_deleted == False)
         .first()
     )
 
 
-def create_user(db: Session, user: UserCreate, hashed_password: str) -> User:
-    """Create a new user."""
-    db_user = User(
-        email=user.email,
-        username=user.username,
-        full_name=user.full_name,
-        hashed_password=hashed_password,
+def credentials_statement(username: str) -> Select:
+    """Select only the login columns, all covered by ``ix_users_lower_username_live``."""
+    return (
+        select(User.id, User.username, User.hashed_password, User.is_active, User.token_version)
+        .where(func.lower(User.username) == func.lower(username), User.is_deleted == False)
+        .limit(1)
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+
+
+def get_user_credentials(db: Session, username: str) -> Row | None:
+    """Get the id, username, password hash, active flag and token version of a non-deleted user, ignoring case."""
+    return db.execute(credentials_statement(username)).first()
+
+
+def token_version_statement(user_id: UUID) -> Select:
+    return select(User.token_version).where(User.id == user_id, User.is_deleted == False)
+
+
+def get_token_version(db: Session, user_id: UUID) -> int | None:
+    """Get the current token version of a non-deleted user."""
+    return db.scalar(token_version_statement(user_id))
+
+
+def list_users_statement(
+    limit: int,
+    after: tuple[datetime, UUID] | None = None,
+    is_active: bool | None = None,
+    is_deleted: bool | None = None,
+    deletion_requested: bool | None = None,
+) -> Select:
+    """Build a keyset-paginated query ordered by ``(created_at, id)``.
+
+    ``after`` is the sort key of the last row on the previous page. Seeking past
+    it with a row comparison lets Postgres start the scan of
+    ``ix_users_created_at_id`` at that key, so every page costs the same.
+    """
+    stmt = select(User).order_by(User.created_at, User.id).limit(limit)
+    if after is not None:
+        stmt = stmt.where(tuple_(User.created_at, User.id) > tuple_(*after))
+    if is_active is not None:
+        stmt = stmt.where(User.is_active == is_active)
+    if is_deleted is not None:
+        stmt = stmt.where(User.is_deleted == is_deleted)
+    if deletion_requested is not None:
+        stmt = stmt.where(
+            User.deletion_requested_at.is_not(None) if deletion_requested else User.deletion_requested_at.is_(None),
+        )
+    return stmt
+
+
+def list_users(db: Session, **filters) -> list[User]:
+    """Return one page of users; see `list_users_statement` for the arguments."""
+    return list(db.scalars(list_users_statement(**filters)))
+
+
+# Unique indexes whose violation means the email or username is taken.
+UNIQUE_INDEX_FIELDS = {
+    "ix_users_email": "email",
+    "ix_users_lower_email_live": "email",
+    "ix_users_username": "username",
+    "ix_users_lower_username_live": "username",
+}
+
+
+def conflicting_field(exc: IntegrityError) -> str | None:
+    """Return ``"email"`` or ``"username"`` if ``exc`` is a unique violation on that field."""
+    diag = getattr(exc.orig, "diag", None)  # psycopg2
+    constraint = diag.constraint_name if diag is not None else getattr(exc.orig.__cause__, "constraint_name", None)
+    return UNIQUE_INDEX_FIELDS.get(constraint)
+
+
+def create_user(db: Session, user: UserCreate, hashed_password: str) -> User:
+    """Create a new user with a single INSERT ... RETURNING.
+
+    Raises `IntegrityError` when a unique index rejects the row; use
+    `conflicting_field` to tell which one. The session is rolled back first.
+    """
+    try:
+        db_user = db.scalars(
+            insert(User)
+            .values(
+                email=user.email,
+                username=user.username,
+                full_name=user.full_name,
+                hashed_password=hashed_password,
+            )
+            .returning(User),
+        ).one()
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise
     return db_user
 
 
-def update_user(db: Session, db_user: User, obj_in: dict) -> User:
-    """Update a user's attributes."""
-    for field, value in obj_in.items():
-        setattr(db_user, field, value)
-    db_user.updated_at = datetime.utcnow()  # Explicitly set updated_at
+def taken_emails_and_usernames_statement(emails: list[str], usernames: list[str]) -> Select:
+    """Select the users that could make any of `emails` or `usernames` taken.
+
+    Mirrors the unique indexes: a value is taken by a live user with the same
+    value in any case, or by any user, deleted or not, with exactly that value.
+    """
+    lower_emails = {email.lower() for email in emails}
+    lower_usernames = {username.lower() for username in usernames}
+    return select(User.email, User.username, User.is_deleted).where(
+        or_(
+            and_(func.lower(User.email).in_(lower_emails), User.is_deleted == False),
+            and_(func.lower(User.username).in_(lower_usernames), User.is_deleted == False),
+            User.email.in_(emails),
+            User.username.in_(usernames),
+        ),
+    )
+
+
+def taken_emails_and_usernames(rows: list[Row], emails: list[str], usernames: list[str]) -> tuple[set, set]:
+    """Return the subsets of `emails` and `usernames` taken by the selected `rows`."""
+    live_emails = {row.email.lower() for row in rows if not row.is_deleted}
+    live_usernames = {row.username.lower() for row in rows if not row.is_deleted}
+    exact_emails = {row.email for row in rows}
+    exact_usernames = {row.username for row in rows}
+    return (
+        {email for email in emails if email in exact_emails or email.lower() in live_emails},
+        {username for username in usernames if username in exact_usernames or username.lower() in live_usernames},
+    )
+
+
+def get_taken_emails_and_usernames(db: Session, emails: list[str], usernames: list[str]) -> tuple[set, set]:
+    """Return which of `emails` and `usernames` already exist, in one query."""
+    rows = db.execute(taken_emails_and_usernames_statement(emails, usernames)).all()
+    return taken_emails_and_usernames(rows, emails, usernames)
+
+
+def create_users_bulk(db: Session, rows: list[dict]) -> list[User]:
+    """Insert users with multi-row INSERTs, skipping rows that hit a unique constraint.
+
+    Returns the users that were actually inserted.
+    """
+    users = list(db.scalars(insert(User).on_conflict_do_nothing().returning(User), rows))
     db.commit()
-    db.refresh(db_user)
-    return db_user
+    return users
+
 
+def returning_user(stmt: Update) -> Update:
+    """Make a single-row UPDATE return the written user, hydrating it from RETURNING.
 
-def update_user_password(db: Session, user: User, hashed_password: str) -> User:
-    """Update a user's password."""
-    user.hashed_password = hashed_password
+    When the invalidation backend publishes from RETURNING, the cache
+    invalidation rides along in the same statement.
+    """
+    notify = user_cache.invalidation_returning()
+    columns = (User, notify) if notify is not None else (User,)
+    return stmt.returning(*columns).execution_options(synchronize_session=False, populate_existing=True)
+
+
+def _write_user(db: Session, stmt: Update) -> User | None:
+    row = db.execute(returning_user(stmt)).first()
     db.commit()
-    db.refresh(user)
-    return user
+    if row is None:
+        return None
+    user_cache.invalidate([row[0]])
+    return row[0]
 
 
-def delete_user(db: Session, user_id: UUID):
+def update_user(
+    db: Session, user_id: UUID, obj_in: dict, expected_updated_at: datetime | None = None,
+) -> User | None:
+    """Update a non-deleted user's attributes, returning the updated user or ``None`` if there is none.
+
+    With ``expected_updated_at`` the row is only updated if it has not changed
+    since then, which the UPDATE checks under the row lock; otherwise ``None``
+    is returned as well. Raises `IntegrityError` (after rolling back) if the
+    new email is taken.
+    """
+    stmt = (
+        update(User)
+        .where(User.id == user_id, User.is_deleted == False)
+        .values(**obj_in, updated_at=func.now())
+    )
+    if expected_updated_at is not None:
+        stmt = stmt.where(User.updated_at == expected_updated_at)
+    try:
+        return _write_user(db, stmt)
+    except IntegrityError:
+        db.rollback()
+        raise
+
+
+def update_user_password(db: Session, user: User, hashed_password: str) -> User | None:
+    """Update a user's password, invalidating the user's existing access tokens.
+
+    Updates by primary key so `user` may be a detached snapshot from the user cache.
+    """
+    stmt = (
+        update(User)
+        .where(User.id == user.id)
+        .values(hashed_password=hashed_password, token_version=User.token_version + 1, updated_at=func.now())
+    )
+    return _write_user(db, stmt)
+
+
+def rehash_password(db: Session, user_id: UUID, old_hash: str, new_hash: str) -> User | None:
+    """Replace a password hash with an upgraded hash of the same password.
+
+    Only applies if the stored hash is still ``old_hash``, so a password change
+    that lands first is never overwritten, and leaves ``updated_at`` alone
+    because the user's data has not changed.
+    """
+    stmt = (
+        update(User)
+        .where(User.id == user_id, User.hashed_password == old_hash)
+        .values(hashed_password=new_hash, updated_at=User.updated_at)
+    )
+    return _write_user(db, stmt)
+
+
+def delete_user(db: Session, user_id: UUID) -> User | None:
     """Soft delete a user by ID."""
-    db_user = db.query(User).filter(User.id == user_id).first()
-    if db_user:
-        db_user.is_deleted = True
-        db_user.deleted_at = datetime.utcnow()
-        db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+    stmt = (
+        update(User)
+        .where(User.id == user_id)
+        .values(
+            is_deleted=True,
+            deleted_at=datetime.utcnow(),
+            token_version=User.token_version + 1,
+            updated_at=func.now(),
+        )
+    )
+    return _write_user(db, stmt)
+
+
+def mark_user_for_deletion(db: Session, user_id: UUID) -> User | None:
+    """Deactivate a non-deleted user and record when deletion was requested."""
+    stmt = (
+        update(User)
+        .where(User.id == user_id, User.is_deleted == False)
+        .values(
+            is_active=False,
+            deletion_requested_at=datetime.utcnow(),
+            token_version=User.token_version + 1,
+            updated_at=func.now(),
+        )
+    )
+    return _write_user(db, stmt)
@@ -0,0 +1,203 @@
+"""Async CRUD operations for User model.
+
+Mirrors `app.crud.crud_user` for `AsyncSession` so endpoints can run fully on
+the event loop when `settings.ASYNC_DB` is enabled.
+"""
+
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import Row, Update, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.user_cache import user_cache
+from app.crud.crud_user import (
+    credentials_statement,
+    list_users_statement,
+    purge_batch_statement,
+    returning_user,
+    taken_emails_and_usernames,
+    taken_emails_and_usernames_statement,
+    token_version_statement,
+)
+from app.models.user import User
+from app.schemas.user import UserCreate
+
+
+async def _queue_cache_invalidation(db: AsyncSession, users: list[User]):
+    """Emit the cache invalidation inside the current transaction, if the backend uses one."""
+    statement = user_cache.invalidation_statement(users)
+    if statement is not None:
+        await db.execute(statement)
+
+
+async def soft_delete_users_marked_for_deletion(db: AsyncSession, batch_size: int = 1000) -> int:
+    """Soft delete users whose deletion_requested_at is older than 24 hours, in batches."""
+    now = datetime.utcnow()
+    purged = 0
+    while True:
+        users = (await db.execute(purge_batch_statement(batch_size, now))).all()
+        if users:
+            await _queue_cache_invalidation(db, users)
+        await db.commit()
+        user_cache.invalidate(users)
+        purged += len(users)
+        if len(users) < batch_size:
+            return purged
+
+
+async def get_user(db: AsyncSession, user_id: UUID) -> User | None:
+    """Get a non-deleted user by ID."""
+    return await db.scalar(select(User).where(User.id == user_id, User.is_deleted == False))
+
+
+async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
+    """Get an active, non-deleted user by email, ignoring case."""
+    return await db.scalar(
+        select(User)
+        .where(func.lower(User.email) == func.lower(email), User.is_active == True, User.is_deleted == False)
+        .limit(1),
+    )
+
+
+async def get_user_by_username(db: AsyncSession, username: str) -> User | None:
+    """Get a non-deleted user by username, ignoring case."""
+    return await db.scalar(
+        select(User).where(func.lower(User.username) == func.lower(username), User.is_deleted == False).limit(1),
+    )
+
+
+async def get_user_credentials(db: AsyncSession, username: str) -> Row | None:
+    """Get the id, username, password hash, active flag and token version of a non-deleted user, ignoring case."""
+    return (await db.execute(credentials_statement(username))).first()
+
+
+async def get_token_version(db: AsyncSession, user_id: UUID) -> int | None:
+    """Get the current token version of a non-deleted user."""
+    return await db.scalar(token_version_statement(user_id))
+
+
+async def list_users(db: AsyncSession, **filters) -> list[User]:
+    """Return one page of users; see `crud_user.list_users_statement` for the arguments."""
+    return list(await db.scalars(list_users_statement(**filters)))
+
+
+async def create_user(db: AsyncSession, user: UserCreate, hashed_password: str) -> User:
+    """Create a new user with a single INSERT ... RETURNING; see `crud_user.create_user`."""
+    try:
+        db_user = (
+            await db.scalars(
+                insert(User)
+                .values(
+                    email=user.email,
+                    username=user.username,
+                    full_name=user.full_name,
+                    hashed_password=hashed_password,
+                )
+                .returning(User),
+            )
+        ).one()
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise
+    return db_user
+
+
+async def get_taken_emails_and_usernames(
+    db: AsyncSession,
+    emails: list[str],
+    usernames: list[str],
+) -> tuple[set, set]:
+    """Return which of `emails` and `usernames` already exist, in one query."""
+    rows = (await db.execute(taken_emails_and_usernames_statement(emails, usernames))).all()
+    return taken_emails_and_usernames(rows, emails, usernames)
+
+
+async def create_users_bulk(db: AsyncSession, rows: list[dict]) -> list[User]:
+    """Insert users with multi-row INSERTs, skipping rows that hit a unique constraint."""
+    users = list(await db.scalars(insert(User).on_conflict_do_nothing().returning(User), rows))
+    await db.commit()
+    return users
+
+
+async def _write_user(db: AsyncSession, stmt: Update) -> User | None:
+    row = (await db.execute(returning_user(stmt))).first()
+    await db.commit()
+    if row is None:
+        return None
+    user_cache.invalidate([row[0]])
+    return row[0]
+
+
+async def update_user(
+    db: AsyncSession, user_id: UUID, obj_in: dict, expected_updated_at: datetime | None = None,
+) -> User | None:
+    """Update a non-deleted user's attributes; see `crud_user.update_user`."""
+    stmt = (
+        update(User)
+        .where(User.id == user_id, User.is_deleted == False)
+        .values(**obj_in, updated_at=func.now())
+    )
+    if expected_updated_at is not None:
+        stmt = stmt.where(User.updated_at == expected_updated_at)
+    try:
+        return await _write_user(db, stmt)
+    except IntegrityError:
+        await db.rollback()
+        raise
+
+
+async def update_user_password(db: AsyncSession, user: User, hashed_password: str) -> User | None:
+    """Update a user's password, invalidating the user's existing access tokens.
+
+    Updates by primary key so `user` may be a detached snapshot from the user cache.
+    """
+    stmt = (
+        update(User)
+        .where(User.id == user.id)
+        .values(hashed_password=hashed_password, token_version=User.token_version + 1, updated_at=func.now())
+    )
+    return await _write_user(db, stmt)
+
+
+async def rehash_password(db: AsyncSession, user_id: UUID, old_hash: str, new_hash: str) -> User | None:
+    """Replace a password hash with an upgraded one; see `crud_user.rehash_password`."""
+    stmt = (
+        update(User)
+        .where(User.id == user_id, User.hashed_password == old_hash)
+        .values(hashed_password=new_hash, updated_at=User.updated_at)
+    )
+    return await _write_user(db, stmt)
+
+
+async def delete_user(db: AsyncSession, user_id: UUID) -> User | None:
+    """Soft delete a user by ID."""
+    stmt = (
+        update(User)
+        .where(User.id == user_id)
+        .values(
+            is_deleted=True,
+            deleted_at=datetime.utcnow(),
+            token_version=User.token_version + 1,
+            updated_at=func.now(),
+        )
+    )
+    return await _write_user(db, stmt)
+
+
+async def mark_user_for_deletion(db: AsyncSession, user_id: UUID) -> User | None:
+    """Deactivate a non-deleted user and record when deletion was requested."""
+    stmt = (
+        update(User)
+        .where(User.id == user_id, User.is_deleted == False)
+        .values(
+            is_active=False,
+            deletion_requested_at=datetime.utcnow(),
+            token_version=User.token_version + 1,
+            updated_at=func.now(),
+        )
+    )
+    return await _write_user(db, stmt)
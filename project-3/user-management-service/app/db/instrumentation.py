@@ -0,0 +1,77 @@
+"""SQL statement timing through SQLAlchemy engine events.
+
+Every statement is timed between ``before_cursor_execute`` and
+``after_cursor_execute``, recorded in ``db_statement_duration_seconds`` (when
+metrics are enabled) and added to the current request's `RequestMetrics`, which `MetricsMiddleware`
+turns into per-request statement counts and database time. The same timing
+feeds `statement_stats` and its slow-query log, and when tracing is on each
+statement is also recorded as a span labelled with its normalized text.
+"""
+import time
+
+from sqlalchemy import Engine, event
+
+from app.core import tracing
+from app.core.config import settings
+from app.core.metrics import DB_STATEMENT_DURATION, current_request
+from app.db.statement_stats import fingerprint, statement_stats
+
+_OPERATIONS = ("SELECT", "INSERT", "UPDATE", "DELETE")
+_statement_durations = {
+    operation: DB_STATEMENT_DURATION.labels(operation) for operation in (*_OPERATIONS, "WITH", "OTHER")
+}
+
+
+def _operation(statement: str) -> str:
+    operation = statement.lstrip()[:6].upper()
+    return operation if operation in _OPERATIONS else "WITH" if operation.startswith("WITH") else "OTHER"
+
+
+def _statement_span(statement: str):
+    operation = _operation(statement)
+    return tracing.start_span(
+        f"db {operation}",
+        {"db.system": "postgresql", "db.operation.name": operation, "db.query.text": fingerprint(statement)[1]},
+        client=True,
+    )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    span = _statement_span(statement) if tracing.tracing_enabled() else None
+    conn.info.setdefault("statement_started", []).append((time.perf_counter(), span))
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started, span = conn.info["statement_started"].pop()
+    elapsed = time.perf_counter() - started
+    if span is not None:
+        span.set_attribute("db.response.returned_rows", cursor.rowcount)
+        span.end()
+    if settings.METRICS_ENABLED:
+        _statement_durations[_operation(statement)].observe(elapsed)
+    request = current_request.get()
+    if request is not None:
+        request.db_statements += 1
+        request.db_seconds += elapsed
+    if statement_stats.enabled:
+        statement_stats.record(statement, elapsed, cursor.rowcount, request.route if request is not None else None)
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute.
+    started = exception_context.connection.info.get("statement_started") if exception_context.connection else None
+    if exception_context.statement is not None and started:
+        _, span = started.pop()
+        if span is not None:
+            span.record_exception(exception_context.original_exception)
+            tracing.set_error(span, type(exception_context.original_exception).__name__)
+            span.end()
+
+
+def instrument_engine(engine: Engine):
+    """Time every statement ``engine`` executes; pass ``sync_engine`` for an `AsyncEngine`."""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
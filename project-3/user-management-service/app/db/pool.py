@@ -0,0 +1,118 @@
+"""Connection pool configuration and instrumentation.
+
+SQLAlchemy does not expose how long a checkout waited for a free
+connection, so the pool classes here time ``_do_get`` themselves. Together
+with the live checked-out/overflow counts this shows whether requests are
+queueing on the pool rather than on the database.
+"""
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import settings
+from app.core.tracing import span
+
+
+class PoolMetrics:
+    """Checkout counters for one pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.peak_checked_out = 0
+        self.peak_overflow = 0
+
+    def record(self, wait: float, checked_out: int, overflow: int, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            self.peak_overflow = max(self.peak_overflow, overflow)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+                "wait_seconds_mean": self.wait_seconds_total / attempts if attempts else 0.0,
+                "peak_checked_out": self.peak_checked_out,
+                "peak_overflow": self.peak_overflow,
+            }
+
+
+class _InstrumentedPoolMixin:
+    metrics: PoolMetrics
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            with span("db.pool.checkout"):
+                connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record(time.perf_counter() - started, self.checkedout(), self.overflow(), timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - started, self.checkedout(), self.overflow())
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def stats(self) -> dict:
+        """Return live pool state plus accumulated checkout metrics."""
+        return {
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "timeout": self.timeout(),
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            # QueuePool reports overflow relative to pool_size, so it is negative until the pool is full.
+            "overflow": max(self.overflow(), 0),
+            **self.metrics.snapshot(),
+        }
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """`QueuePool` that records checkout wait times."""
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """`AsyncAdaptedQueuePool` that records checkout wait times."""
+
+
+def engine_pool_options() -> dict:
+    """Return the `create_engine` pool keyword arguments from settings."""
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+
+def threadpool_size() -> int:
+    """Return the AnyIO worker-thread limit.
+
+    Defaults to the pool's capacity (`DB_POOL_SIZE + DB_MAX_OVERFLOW`) so sync
+    endpoints never hold more threads than there are connections to give them;
+    extra threads would only queue invisibly on checkout.
+    """
+    return settings.THREADPOOL_MAX_WORKERS or settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
@@ -1,18 +1,78 @@
 """Database session management.
 """
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.core.metrics import registry
+from app.core.tracing import span
+from app.db.instrumentation import instrument_engine
+from app.db.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, engine_pool_options
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = create_engine(settings.DATABASE_URL, poolclass=InstrumentedQueuePool, **engine_pool_options())
+# Writes hydrate their results from RETURNING, so nothing needs reloading after a commit.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+async_engine = create_async_engine(
+    settings.async_database_url,
+    poolclass=InstrumentedAsyncQueuePool,
+    **engine_pool_options(),
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+if settings.METRICS_ENABLED or settings.DB_STATEMENT_STATS_ENABLED or settings.TRACING_ENABLED:
+    instrument_engine(engine)
+    instrument_engine(async_engine.sync_engine)
+
+
+def _pool_stats(key: str) -> dict:
+    return {
+        ("sync",): engine.pool.stats()[key],
+        ("async",): async_engine.sync_engine.pool.stats()[key],
+    }
+
+
+registry.callback(
+    "db_pool_checked_out", "Connections currently checked out of the pool.", "gauge",
+    lambda: _pool_stats("checked_out"), ("pool",),
+)
+registry.callback(
+    "db_pool_checkouts_total", "Successful connection checkouts.", "counter",
+    lambda: _pool_stats("checkouts"), ("pool",),
+)
+registry.callback(
+    "db_pool_checkout_timeouts_total", "Checkouts that timed out waiting for a connection.", "counter",
+    lambda: _pool_stats("timeouts"), ("pool",),
+)
+registry.callback(
+    "db_pool_checkout_wait_seconds_total", "Time spent waiting for a pooled connection.", "counter",
+    lambda: _pool_stats("wait_seconds_total"), ("pool",),
+)
 
 def get_db():
     """FastAPI dependency to get a database session.
+
+    The session connects lazily, so its cost shows up in the ``db.pool.checkout``
+    span of its first statement and in the ``db.session.close`` span here.
     """
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
+        with span("db.session.close"):
+            db.close()
+
+async def get_async_db():
+    """FastAPI dependency to get an async database session.
+    """
+    db = AsyncSessionLocal()
+    try:
+        yield db
+    finally:
+        with span("db.session.close"):
+            await db.close()
+
+# Endpoints depend on this so the serving mode is a deployment setting; scripts and
+# tests keep using `SessionLocal`/`get_db` directly.
+get_session = get_async_db if settings.ASYNC_DB else get_db
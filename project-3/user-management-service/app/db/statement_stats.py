@@ -0,0 +1,152 @@
+"""Per-statement execution statistics, like a process-local ``pg_stat_statements``.
+
+Statements are keyed by a fingerprint of their normalized text: placeholders
+and literals become ``?``, and ``IN`` lists and multi-row ``VALUES`` collapse
+to ``(...)``, so a query counts as one entry however many values it binds.
+The registry is bounded; when it is full the least-called 5% of entries are
+dropped to make room.
+
+Statements slower than the slow-query threshold are also logged, with the
+route of the request that issued them.
+"""
+import hashlib
+import logging
+import re
+import threading
+from functools import lru_cache
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_VALUES = r"\(\s*\?(?:::\w+(?:\[\])?)?(?:\s*,\s*\?(?:::\w+(?:\[\])?)?)*\s*\)"
+_IN_LIST = re.compile(rf"\bIN\s*{_VALUES}")
+_VALUES_ROWS = re.compile(rf"\bVALUES\s*{_VALUES}(?:\s*,\s*{_VALUES})*")
+
+SORT_KEYS = ("total_time", "calls", "mean_time", "max_time", "rows")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> tuple[str, str]:
+    """Return the fingerprint id and normalized text of ``statement``."""
+    normalized = " ".join(statement.split())
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _IN_LIST.sub("IN (...)", normalized)
+    normalized = _VALUES_ROWS.sub("VALUES (...)", normalized)
+    return hashlib.blake2b(normalized.encode(), digest_size=8).hexdigest(), normalized
+
+
+class _Entry:
+    __slots__ = ("calls", "max_time", "min_time", "query", "rows", "total_time")
+
+    def __init__(self, query: str):
+        self.query = query
+        self.calls = 0
+        self.total_time = 0.0
+        self.min_time = float("inf")
+        self.max_time = 0.0
+        self.rows = 0
+
+
+class StatementStats:
+    """Bounded registry of statement statistics plus the slow-query log.
+
+    Args:
+        max_entries: Most distinct fingerprints kept at once.
+        slow_query_ms: Log statements that take at least this long; ``None``
+            disables the log.
+    """
+
+    def __init__(self, enabled: bool = True, max_entries: int = 1000, slow_query_ms: float | None = 200.0):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.slow_query_ms = slow_query_ms
+        self._entries: dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self.evicted = 0
+        self.slow_queries = 0
+
+    def record(self, statement: str, seconds: float, rows: int, route: str | None = None):
+        """Add one execution of ``statement`` that took ``seconds`` and produced or changed ``rows``."""
+        query_id, query = fingerprint(statement)
+        rows = max(rows, 0)
+        duration_ms = seconds * 1000
+        slow = self.slow_query_ms is not None and duration_ms >= self.slow_query_ms
+        with self._lock:
+            entry = self._entries.get(query_id)
+            if entry is None:
+                if len(self._entries) >= self.max_entries:
+                    self._evict()
+                entry = self._entries[query_id] = _Entry(query)
+            entry.calls += 1
+            entry.total_time += seconds
+            entry.min_time = min(entry.min_time, seconds)
+            entry.max_time = max(entry.max_time, seconds)
+            entry.rows += rows
+            self.slow_queries += slow
+
+        if slow:
+            logger.warning(
+                "Slow query: %.1f ms, %s rows, route %s: %s",
+                duration_ms,
+                rows,
+                route,
+                query,
+                extra={
+                    "duration_ms": duration_ms,
+                    "rows": rows,
+                    "route": route,
+                    "fingerprint": query_id,
+                    "query": query,
+                },
+            )
+
+    def _evict(self):
+        by_calls = sorted(self._entries, key=lambda query_id: self._entries[query_id].calls)
+        for query_id in by_calls[:max(1, len(by_calls) // 20)]:
+            del self._entries[query_id]
+            self.evicted += 1
+
+    def stats(self, order_by: str = "total_time", limit: int = 20) -> dict:
+        """Return the registry's counters and its top ``limit`` statements by ``order_by``."""
+        if order_by not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {order_by}")
+        with self._lock:
+            statements = [
+                {
+                    "fingerprint": query_id,
+                    "query": entry.query,
+                    "calls": entry.calls,
+                    "total_time": entry.total_time * 1000,
+                    "mean_time": entry.total_time / entry.calls * 1000,
+                    "min_time": entry.min_time * 1000,
+                    "max_time": entry.max_time * 1000,
+                    "rows": entry.rows,
+                }
+                for query_id, entry in self._entries.items()
+            ]
+            stats = {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "evicted": self.evicted,
+                "slow_query_ms": self.slow_query_ms,
+                "slow_queries": self.slow_queries,
+            }
+        statements.sort(key=lambda statement: statement[order_by], reverse=True)
+        # Times are in milliseconds, as in pg_stat_statements.
+        return {**stats, "statements": statements[:limit]}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.evicted = 0
+            self.slow_queries = 0
+
+
+statement_stats = StatementStats(
+    enabled=settings.DB_STATEMENT_STATS_ENABLED,
+    max_entries=settings.DB_STATEMENT_STATS_MAX_ENTRIES,
+    slow_query_ms=settings.DB_SLOW_QUERY_MS,
+)
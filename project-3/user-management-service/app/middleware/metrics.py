@@ -0,0 +1,84 @@
+"""ASGI middleware recording per-route request metrics.
+
+Routes are labelled by their path template (``/api/v1/users/{user_id}``), not
+the concrete path, so label cardinality stays bounded; requests that match no
+route share the ``unmatched`` label.
+"""
+import time
+
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import (
+    DB_STATEMENTS_PER_REQUEST,
+    DB_TIME_PER_REQUEST,
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS_IN_PROGRESS,
+    RequestMetrics,
+    current_request,
+)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+def route_template(scope: Scope) -> str:
+    """Return the path template of the route ``scope`` will be dispatched to."""
+    partial = None
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match is Match.FULL:
+            return route.path
+        if match is Match.PARTIAL and partial is None:
+            partial = route.path  # e.g. the path exists but not for this method
+    return partial or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Records latency, in-flight requests and database work per route.
+
+    With ``record_metrics=False`` it only tracks the current request's route
+    and database work in `current_request`, which the statement statistics
+    and slow-query log read.
+    """
+
+    def __init__(self, app: ASGIApp, record_metrics: bool = True):
+        self.app = app
+        self.record_metrics = record_metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = route_template(scope)
+        if not self.record_metrics:
+            token = current_request.set(RequestMetrics(route))
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                current_request.reset(token)
+            return
+
+        method = scope["method"]
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method, route)
+        request = RequestMetrics(route)
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress.inc()
+        token = current_request.set(request)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_request.reset(token)
+            in_progress.dec()
+            HTTP_REQUEST_DURATION.labels(method, route, str(status_code)).observe(elapsed)
+            DB_STATEMENTS_PER_REQUEST.labels(route).observe(request.db_statements)
+            DB_TIME_PER_REQUEST.labels(route).observe(request.db_seconds)
@@ -0,0 +1,112 @@
+"""ASGI middleware profiling the requests that ask for it.
+
+A request is profiled when it sends ``X-Profile: cpu`` (or ``memory``, which
+adds tracemalloc allocation stats) together with a valid ``X-Admin-Key``, or
+carries a ``profile`` query value from `sign_profile_request`. Anything else
+passes straight through after a scan of its headers and query string. One
+request is profiled at a time; others that ask meanwhile run unprofiled and
+get ``X-Profile: busy`` back.
+
+The profile is written to `profile_store` after the response is sent and
+its name returned in the ``X-Profile`` response header; fetch it from
+``GET /api/v1/internal/profiles/{name}``.
+"""
+import logging
+import threading
+from urllib.parse import parse_qsl
+
+import anyio.to_thread
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.profiling import (
+    PROFILE_MODES,
+    AllocationTracker,
+    SamplingProfiler,
+    profile_store,
+    verify_profile_request,
+)
+from app.core.security import admin_key_matches
+from app.middleware.metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+_PROFILE_HEADER = b"x-profile"
+_ADMIN_KEY_HEADER = b"x-admin-key"
+
+
+def requested_profile_mode(scope: Scope) -> str | None:
+    """Return the profile mode an authorized request asks for, or ``None``."""
+    if b"profile=" in scope["query_string"]:
+        for key, value in parse_qsl(scope["query_string"].decode("latin-1")):
+            if key == "profile":
+                return verify_profile_request(value, scope["method"], scope["path"])
+
+    mode = admin_key = None
+    for name, value in scope["headers"]:
+        if name == _PROFILE_HEADER:
+            mode = value.decode("latin-1").strip().lower()
+        elif name == _ADMIN_KEY_HEADER:
+            admin_key = value.decode("latin-1")
+    if mode is None or not admin_key_matches(admin_key):
+        return None
+    return mode if mode in PROFILE_MODES else "cpu"
+
+
+class ProfilingMiddleware:
+    """Profiles the requests that ask for it and stores a speedscope file for each."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._lock = threading.Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        mode = requested_profile_mode(scope)
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+        if not self._lock.acquire(blocking=False):
+            await self.app(scope, receive, _with_profile_header(send, "busy"))
+            return
+        try:
+            await self._profile(scope, receive, send, mode)
+        finally:
+            self._lock.release()
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send, mode: str):
+        method = scope["method"]
+        route = route_template(scope)
+        name = profile_store.new_name(method, route)
+        profiler = SamplingProfiler(settings.PROFILING_INTERVAL_SECONDS)
+        allocations = AllocationTracker() if mode == "memory" else None
+
+        if allocations is not None:
+            allocations.start()
+        profiler.start()
+        try:
+            await self.app(scope, receive, _with_profile_header(send, f"{name}.speedscope.json"))
+        finally:
+            profiler.stop()
+            if allocations is not None:
+                allocations.stop()
+            speedscope = profiler.speedscope(f"{method} {scope['path']} ({route})")
+            memory = allocations.report if allocations is not None else None
+            try:
+                await anyio.to_thread.run_sync(profile_store.save, name, speedscope, memory)
+            except OSError:
+                logger.exception("Could not store profile %s", name)
+            else:
+                logger.info("Profiled %s %s in %.1f ms as %s", method, scope["path"], profiler.duration * 1000, name)
+
+
+def _with_profile_header(send: Send, value: str) -> Send:
+    async def send_wrapper(message: Message):
+        if message["type"] == "http.response.start":
+            MutableHeaders(scope=message).append("X-Profile", value)
+        await send(message)
+
+    return send_wrapper
@@ -0,0 +1,38 @@
+"""ASGI middleware recording a server span for each request.
+
+The span is named after the route template, like the request metrics, and
+continues the trace of an inbound W3C ``traceparent`` header. Dependencies,
+password hashing, JWT handling and SQL statements record child spans of it.
+"""
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import tracing
+from app.middleware.metrics import route_template
+
+
+class TracingMiddleware:
+    """Wraps each HTTP request in a server span while tracing is configured."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not tracing.tracing_enabled():
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(scope)
+        headers = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+        attributes = {"http.request.method": method, "http.route": route, "url.path": scope["path"]}
+
+        with tracing.server_span(f"{method} {route}", headers, attributes) as span:
+
+            async def send_wrapper(message: Message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.response.status_code", message["status"])
+                    if message["status"] >= 500:
+                        tracing.set_error(span, str(message["status"]))
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
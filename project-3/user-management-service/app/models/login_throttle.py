@@ -0,0 +1,20 @@
+"""SQLAlchemy ORM model for shared login-throttle token buckets.
+"""
+from sqlalchemy import Boolean, Column, Float, String
+
+from app.db.base import Base
+
+
+class LoginThrottleBucket(Base):
+    """One token bucket of the ``postgres`` login-throttle backend.
+
+    ``updated_at`` is a Unix timestamp taken from the database clock, so every
+    replica refills buckets against the same time source.
+    """
+    __tablename__ = "login_throttle_buckets"
+
+    key = Column(String, primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)
+    # Whether the most recent attempt was let through.
+    allowed = Column(Boolean, nullable=False)
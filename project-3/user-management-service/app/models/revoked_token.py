@@ -0,0 +1,19 @@
+"""SQLAlchemy ORM model for revoked access tokens.
+"""
+from sqlalchemy import Column, DateTime, String, func
+
+from app.db.base import Base
+
+
+class RevokedToken(Base):
+    """An access token revoked before its expiry, identified by its ``jti`` claim.
+
+    Rows are only needed until ``expires_at``; after that the token is
+    rejected on its own and the row is deleted.
+    """
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String, primary_key=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    # Workers poll for rows revoked since their last refresh.
+    revoked_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
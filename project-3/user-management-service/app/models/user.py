@@ -2,7 +2,7 @@
 """
 import uuid
 
-from sqlalchemy import Boolean, Column, DateTime, String, Uuid, func
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String, Uuid, false, func
 
 from app.db.base import Base
 
@@ -23,3 +23,30 @@ class User(Base):
     created_at = Column(DateTime, nullable=False, server_default=func.now())
     updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
     deletion_requested_at = Column(DateTime, nullable=True)
+    # Carried in access tokens as the "ver" claim; bumping it invalidates every
+    # token issued before a password change, deactivation or deletion.
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        # Keyset pagination seeks on (created_at, id); see crud_user.list_users.
+        Index("ix_users_created_at_id", "created_at", "id"),
+        # Case-insensitive uniqueness and lookups of live users. The username
+        # index carries everything the login check reads, so it is answered by
+        # an index-only scan; `username` itself is included because Postgres
+        # cannot return it from the lower(username) expression.
+        Index(
+            "ix_users_lower_username_live",
+            func.lower(username),
+            unique=True,
+            postgresql_include=["username", "id", "hashed_password", "is_active", "is_deleted", "token_version"],
+            postgresql_where=is_deleted == false(),
+        ),
+        Index("ix_users_lower_email_live", func.lower(email), unique=True, postgresql_where=is_deleted == false()),
+        # The purge's candidates (see crud_user.purge_batch_statement); a few
+        # percent of users at most, so the index stays small.
+        Index(
+            "ix_users_pending_deletion",
+            deletion_requested_at,
+            postgresql_where=(is_active == false()) & (is_deleted == false()),
+        ),
+    )
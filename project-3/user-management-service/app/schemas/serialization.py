@@ -0,0 +1,64 @@
+"""Fast JSON serialization of trusted data into response schemas.
+
+FastAPI's ``response_model`` handling validates whatever an endpoint returns
+against the schema (re-checking every ``EmailStr`` of rows we wrote
+ourselves), dumps it to Python primitives and then encodes those again. For
+ORM objects and models this service built itself that work is redundant:
+`TrustedSerializer` copies the schema's fields off the object without
+validation and lets pydantic-core write the JSON bytes in one pass.
+
+Endpoints keep declaring ``response_model`` for the OpenAPI schema; returning
+a `Response` from these helpers skips FastAPI's serialization entirely.
+"""
+from typing import Any
+
+from fastapi import Response, status
+from pydantic import BaseModel
+
+from app.schemas.user import UserAdminRead, UserPage, UserRead
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+class TrustedSerializer:
+    """Prebuilt serializer for one response schema.
+
+    Only use it for objects whose values already satisfy the schema, such as
+    rows read from or written by this service; nothing is validated.
+    """
+
+    def __init__(self, schema: type[BaseModel]):
+        self.schema = schema
+        self.fields = tuple(schema.model_fields)
+        self._fields_set = set(self.fields)
+        self._serializer = schema.__pydantic_serializer__
+
+    def construct(self, obj: Any) -> BaseModel:
+        """Build a schema instance from ``obj``'s attributes without validating them."""
+        values = {field: getattr(obj, field) for field in self.fields}
+        return self.schema.model_construct(_fields_set=self._fields_set, **values)
+
+    def to_json(self, obj: Any) -> bytes:
+        return self._serializer.to_json(self.construct(obj))
+
+    def response(self, obj: Any, status_code: int = status.HTTP_200_OK, headers: dict | None = None) -> Response:
+        return Response(self.to_json(obj), status_code=status_code, headers=headers, media_type=JSON_MEDIA_TYPE)
+
+
+def model_response(model: BaseModel, status_code: int = status.HTTP_200_OK, headers: dict | None = None) -> Response:
+    """Serialize a model this service built, without validating it again."""
+    return Response(
+        model.__pydantic_serializer__.to_json(model),
+        status_code=status_code,
+        headers=headers,
+        media_type=JSON_MEDIA_TYPE,
+    )
+
+
+user_read = TrustedSerializer(UserRead)
+user_admin_read = TrustedSerializer(UserAdminRead)
+
+
+def user_page(users: list, next_cursor: str | None) -> UserPage:
+    """Build a `UserPage` from ORM users without validating each row."""
+    return UserPage.model_construct(items=[user_admin_read.construct(user) for user in users], next_cursor=next_cursor)
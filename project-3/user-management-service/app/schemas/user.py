@@ -1,9 +1,12 @@
 """Pydantic schemas for User model.
 """
 import datetime
+from typing import Literal
 from uuid import UUID
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, model_validator
+
+BCRYPT_HASH_PATTERN = r"^\$2[aby]\$\d{2}\$[./A-Za-z0-9]{53}$"
 
 
 class UserBase(BaseModel):
@@ -18,6 +21,21 @@ class UserCreate(UserBase):
     """
     password: str = Field(..., min_length=8, example="a_strong_password")
 
+class UserImportRow(UserBase):
+    """Schema for one row of a bulk user import.
+
+    Rows carry either a plaintext `password`, validated like `UserCreate`, or
+    an already-hashed bcrypt `hashed_password` from a legacy system.
+    """
+    password: str | None = Field(None, min_length=8)
+    hashed_password: str | None = Field(None, pattern=BCRYPT_HASH_PATTERN)
+
+    @model_validator(mode="after")
+    def check_exactly_one_password(self) -> "UserImportRow":
+        if (self.password is None) == (self.hashed_password is None):
+            raise ValueError("exactly one of password or hashed_password is required")
+        return self
+
 class UserRead(UserBase):
     """Schema for reading user data.
     """
@@ -29,6 +47,19 @@ class UserRead(UserBase):
     class Config:
         from_attributes = True
 
+class UserAdminRead(UserRead):
+    """Schema for reading user data in admin tooling, including lifecycle fields.
+    """
+    is_deleted: bool
+    deleted_at: datetime.datetime | None
+    deletion_requested_at: datetime.datetime | None
+
+class UserPage(BaseModel):
+    """One page of a keyset-paginated user listing.
+    """
+    items: list[UserAdminRead]
+    next_cursor: str | None = Field(None, description="Pass as `cursor` to fetch the next page")
+
 class Token(BaseModel):
     """Schema for the JWT access token.
     """
@@ -40,6 +71,13 @@ class TokenData(BaseModel):
     """
     username: str | None = None
 
+class TokenIdentity(BaseModel):
+    """The authenticated user as described by the claims of their access token.
+    """
+    id: UUID
+    username: str
+    token_version: int
+
 class UserUpdate(BaseModel):
     """Schema for updating user profile information.
     """
@@ -56,3 +94,22 @@ class UserDelete(BaseModel):
     """Schema for user deletion, requiring current password for re-authentication.
     """
     current_password: str = Field(..., example="CurrentSecurePassword123")
+
+class BulkUserCreate(BaseModel):
+    """Schema for registering a batch of users in one request.
+    """
+    users: list[UserCreate] = Field(..., min_length=1, max_length=1000)
+
+class BulkUserResult(BaseModel):
+    """Outcome of one item in a bulk registration, in request order.
+    """
+    index: int
+    status: Literal["created", "duplicate_email", "duplicate_username", "conflict"]
+    user: UserRead | None = None
+
+class BulkUserCreateResponse(BaseModel):
+    """Schema for the bulk registration response.
+    """
+    created: int
+    failed: int
+    results: list[BulkUserResult]
@@ -0,0 +1,124 @@
+"""Background worker that purges accounts whose deletion grace period has passed.
+
+Every replica runs the worker, but each run first takes a Postgres advisory
+lock, so only one replica purges at a time; the others skip that run. The
+lock is session-level and released at the end of the run, so if the leader
+dies another replica picks the work up on its next tick.
+"""
+import logging
+import threading
+import time
+
+from sqlalchemy import Engine, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import crud_user
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary application-wide key for pg_try_advisory_lock ("purg").
+PURGE_LOCK_KEY = 0x70757267
+
+
+class PurgeWorker:
+    """Periodically runs `crud_user.soft_delete_users_marked_for_deletion`.
+
+    Args:
+        bind: Engine to purge through; each run holds one connection.
+        interval: Seconds between runs.
+        batch_size: Users soft deleted per statement and transaction.
+    """
+
+    def __init__(self, bind: Engine, interval: float, batch_size: int):
+        self.bind = bind
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._runs = 0
+        self._runs_skipped = 0
+        self._errors = 0
+        self._rows_total = 0
+        self._last_run_rows = 0
+        self._last_run_seconds = 0.0
+        self._last_run_at: float | None = None
+
+    def run_once(self) -> int | None:
+        """Purge if this process wins the advisory lock.
+
+        Returns the number of users purged, or ``None`` when another replica
+        holds the lock.
+        """
+        with self.bind.connect() as connection:
+            acquired = connection.scalar(select(func.pg_try_advisory_lock(PURGE_LOCK_KEY)))
+            connection.commit()
+            if not acquired:
+                with self._lock:
+                    self._runs_skipped += 1
+                return None
+            started = time.perf_counter()
+            try:
+                with Session(bind=connection) as db:
+                    purged = crud_user.soft_delete_users_marked_for_deletion(db, batch_size=self.batch_size)
+            finally:
+                connection.rollback()
+                connection.execute(select(func.pg_advisory_unlock(PURGE_LOCK_KEY)))
+                connection.commit()
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._runs += 1
+            self._rows_total += purged
+            self._last_run_rows = purged
+            self._last_run_seconds = elapsed
+            self._last_run_at = time.time()
+        if purged:
+            logger.info("Purged %s users pending deletion in %.2fs", purged, elapsed)
+        return purged
+
+    def _run_forever(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception:
+                with self._lock:
+                    self._errors += 1
+                logger.exception("Deletion purge run failed")
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_forever, name="deletion-purge", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+            self._thread = None
+
+    def stats(self) -> dict:
+        """Return run counters and the size and duration of the last run."""
+        with self._lock:
+            return {
+                "enabled": settings.PURGE_ENABLED,
+                "interval_seconds": self.interval,
+                "batch_size": self.batch_size,
+                "runs": self._runs,
+                "runs_skipped_not_leader": self._runs_skipped,
+                "errors": self._errors,
+                "rows_purged_total": self._rows_total,
+                "last_run_rows": self._last_run_rows,
+                "last_run_seconds": self._last_run_seconds,
+                "last_run_at": self._last_run_at,
+            }
+
+
+purge_worker = PurgeWorker(
+    bind=engine,
+    interval=settings.PURGE_INTERVAL_SECONDS,
+    batch_size=settings.PURGE_BATCH_SIZE,
+)
@@ -0,0 +1,48 @@
+"""Business logic for access-token revocation."""
+
+from datetime import UTC, datetime
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.revocation import revocation_filter
+from app.crud import crud_revoked_token, crud_revoked_token_async
+from app.services.user_service import AnySession
+
+
+class TokenNotRevocableException(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Token has no id and cannot be revoked",
+        )
+
+
+async def revoke_token_async(db: AnySession, payload: dict):
+    """Revoke the token whose verified claims are ``payload`` until it expires.
+
+    Tokens issued before tokens carried a ``jti`` cannot be revoked and simply
+    run out at their ``exp``.
+    """
+    jti = payload.get("jti")
+    if not jti:
+        raise TokenNotRevocableException()
+    expires_at = datetime.fromtimestamp(payload["exp"], UTC).replace(tzinfo=None)
+    if isinstance(db, AsyncSession):
+        await crud_revoked_token_async.revoke_token(db, jti=jti, expires_at=expires_at)
+    else:
+        await run_in_threadpool(crud_revoked_token.revoke_token, db, jti=jti, expires_at=expires_at)
+    revocation_filter.add(jti)
+
+
+async def is_token_revoked_async(db: AnySession, jti: str | None) -> bool:
+    """Return whether the token ``jti`` was revoked, querying only on a Bloom filter match."""
+    if not jti or not revocation_filter.might_be_revoked(jti):
+        return False
+    if isinstance(db, AsyncSession):
+        revoked = await crud_revoked_token_async.is_token_revoked(db, jti=jti)
+    else:
+        revoked = await run_in_threadpool(crud_revoked_token.is_token_revoked, db, jti=jti)
+    revocation_filter.record_confirmation(revoked)
+    return revoked
@@ -0,0 +1,208 @@
+"""Streaming bulk import of users through Postgres COPY.
+
+Input is read row by row and processed in fixed-size batches, so memory use
+does not grow with the file. Each batch is validated against
+`UserImportRow`, plaintext passwords are hashed on a process pool, and the
+valid rows are copied into a temporary staging table and merged into
+`users` with `ON CONFLICT DO NOTHING`. A checkpoint is written after every
+committed batch so an interrupted import resumes where it stopped.
+"""
+import csv
+import io
+import json
+import os
+import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Executor
+from dataclasses import asdict, dataclass
+
+from pydantic import ValidationError
+from sqlalchemy import Connection
+
+from app.core.security import get_password_hash
+from app.schemas.user import UserImportRow
+
+STAGING_TABLE = "users_import_staging"
+STAGING_COLUMNS = ("line_no", "email", "username", "full_name", "hashed_password")
+
+
+@dataclass
+class ImportReport:
+    """Running totals for an import, persisted as the checkpoint."""
+    source: str
+    last_line: int = 0
+    read: int = 0
+    imported: int = 0
+    rejected: int = 0
+    conflicts: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.read / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+def detect_format(path: str) -> str:
+    """Guess the input format from the file extension."""
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+
+def iter_records(stream: Iterable[str], fmt: str) -> Iterator[tuple[int, dict]]:
+    """Yield ``(line_number, record)`` pairs from CSV or NDJSON text.
+
+    Line numbers count data rows from 1 and are what checkpoints refer to.
+    Empty CSV cells become ``None`` so optional columns validate cleanly.
+    """
+    if fmt == "csv":
+        for line_no, record in enumerate(csv.DictReader(stream), start=1):
+            yield line_no, {key: value if value != "" else None for key, value in record.items()}
+    elif fmt == "ndjson":
+        line_no = 0
+        for line in stream:
+            if not line.strip():
+                continue
+            line_no += 1
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield line_no, {"__error__": f"invalid JSON: {exc.msg}"}
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def _batched(records: Iterator[tuple[int, dict]], size: int) -> Iterator[list[tuple[int, dict]]]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def load_checkpoint(path: str | None, source: str) -> ImportReport:
+    """Return the saved progress for ``source``, or a fresh report."""
+    if path and os.path.exists(path):
+        with open(path) as checkpoint_file:
+            saved = json.load(checkpoint_file)
+        if saved.get("source") == source:
+            return ImportReport(**saved)
+    return ImportReport(source=source)
+
+
+def save_checkpoint(path: str | None, report: ImportReport):
+    """Atomically persist the report so a crash never leaves a torn checkpoint."""
+    if not path:
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as checkpoint_file:
+        json.dump(asdict(report), checkpoint_file)
+    os.replace(tmp_path, path)
+
+
+class UserImporter:
+    """Imports user records into ``users`` through a COPY-loaded staging table.
+
+    Args:
+        connection: SQLAlchemy connection to a Postgres database; one
+            transaction is committed per batch.
+        executor: Pool used to hash plaintext passwords, typically a
+            ``ProcessPoolExecutor`` so hashing uses every core.
+        batch_size: Rows per COPY/merge/commit cycle.
+        on_reject: Called with ``(line_no, record, reason)`` for every row
+            that fails validation or conflicts with an existing user. The
+            record never includes the plaintext password.
+    """
+
+    def __init__(
+        self,
+        connection: Connection,
+        executor: Executor,
+        batch_size: int = 5000,
+        on_reject: Callable[[int, dict, str], None] | None = None,
+    ):
+        self.connection = connection
+        self.executor = executor
+        self.batch_size = batch_size
+        self.on_reject = on_reject or (lambda line_no, record, reason: None)
+
+    def run(
+        self,
+        records: Iterator[tuple[int, dict]],
+        report: ImportReport,
+        checkpoint_path: str | None = None,
+    ) -> ImportReport:
+        """Import ``records``, skipping any at or before ``report.last_line``."""
+        self._create_staging_table()
+        resume_after = report.last_line
+        pending = ((line_no, record) for line_no, record in records if line_no > resume_after)
+
+        started = time.monotonic() - report.elapsed_seconds
+        for batch in _batched(pending, self.batch_size):
+            self._import_batch(batch, report)
+            report.last_line = batch[-1][0]
+            report.elapsed_seconds = time.monotonic() - started
+            save_checkpoint(checkpoint_path, report)
+        return report
+
+    def _create_staging_table(self):
+        with self.connection.begin(), self.connection.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} ("
+                "line_no bigint, email text, username text, full_name text, hashed_password text"
+                ") ON COMMIT DELETE ROWS",
+            )
+
+    def _import_batch(self, batch: list[tuple[int, dict]], report: ImportReport):
+        report.read += len(batch)
+        valid: list[tuple[int, dict, UserImportRow]] = []
+        for line_no, record in batch:
+            if "__error__" in record:
+                self._reject(report, line_no, record, record["__error__"])
+                continue
+            try:
+                valid.append((line_no, record, UserImportRow.model_validate(record)))
+            except ValidationError as exc:
+                reason = "; ".join(f"{'.'.join(map(str, e['loc'])) or 'row'}: {e['msg']}" for e in exc.errors())
+                self._reject(report, line_no, record, reason)
+
+        plaintext = [row.password for _, _, row in valid if row.hashed_password is None]
+        hashes = iter(self.executor.map(get_password_hash, plaintext, chunksize=max(1, len(plaintext) // 64)))
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for line_no, _, row in valid:
+            hashed_password = row.hashed_password or next(hashes)
+            writer.writerow((line_no, row.email, row.username, row.full_name, hashed_password))
+        buffer.seek(0)
+
+        with self.connection.begin(), self.connection.connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {STAGING_TABLE} ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+            cursor.execute(
+                "INSERT INTO users (id, email, username, full_name, hashed_password, is_active, is_deleted) "
+                "SELECT gen_random_uuid(), email, username, full_name, hashed_password, true, false "
+                f"FROM {STAGING_TABLE} ORDER BY line_no "
+                "ON CONFLICT DO NOTHING RETURNING email",
+            )
+            inserted_emails = {email for (email,) in cursor.fetchall()}
+
+        report.imported += len(inserted_emails)
+        for line_no, record, row in valid:
+            if row.email in inserted_emails:
+                inserted_emails.discard(row.email)
+            else:
+                report.conflicts += 1
+                self.on_reject(line_no, _redact(record), "conflicts with an existing user")
+
+    def _reject(self, report: ImportReport, line_no: int, record: dict, reason: str):
+        report.rejected += 1
+        self.on_reject(line_no, _redact(record), reason)
+
+
+def _redact(record: dict) -> dict:
+    """Drop plaintext passwords so rejected rows can be written out safely."""
+    return {key: value for key, value in record.items() if key != "password"}
@@ -1,15 +1,82 @@
 """Business logic for user-related operations."""
 
-from datetime import datetime
+import base64
+import binascii
+import json
+import logging
+from datetime import datetime, timedelta
 from uuid import UUID
 
-from fastapi import HTTPException, status
+from fastapi import BackgroundTasks, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Row
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.security import get_password_hash, verify_password
-from app.crud import crud_user
+from app.core.config import settings
+from app.core.hashing import password_hasher
+from app.core.security import get_password_hash, password_needs_rehash, verify_password
+from app.core.user_cache import user_cache
+from app.crud import crud_user, crud_user_async
+from app.db.session import AsyncSessionLocal, SessionLocal
 from app.models.user import User
-from app.schemas.user import PasswordUpdate, UserCreate, UserUpdate
+from app.schemas.serialization import user_page
+from app.schemas.user import (
+    BulkUserCreateResponse,
+    BulkUserResult,
+    PasswordUpdate,
+    UserCreate,
+    UserPage,
+    UserRead,
+    UserUpdate,
+)
+
+
+logger = logging.getLogger(__name__)
+
+AnySession = Session | AsyncSession
+
+
+async def run_crud(db: AnySession, name: str, **kwargs):
+    """Call the `crud_user` function `name` without blocking the event loop.
+
+    `AsyncSession`s run the `crud_user_async` twin natively on the loop; sync
+    sessions run the sync function in the threadpool.
+    """
+    if isinstance(db, AsyncSession):
+        return await getattr(crud_user_async, name)(db, **kwargs)
+    return await run_in_threadpool(getattr(crud_user, name), db, **kwargs)
+
+
+async def get_user_by_username_cached(db: AnySession, username: str) -> User | None:
+    """Look a user up by username, serving a detached snapshot from the user cache when possible."""
+    user = user_cache.get_by_username(username)
+    if user is None:
+        user = await run_crud(db, "get_user_by_username", username=username)
+        if user is not None:
+            user_cache.store(user)
+    return user
+
+
+async def get_user_cached(db: AnySession, user_id: UUID) -> User | None:
+    """Look a user up by id, serving a detached snapshot from the user cache when possible."""
+    user = user_cache.get_by_id(user_id)
+    if user is None:
+        user = await run_crud(db, "get_user", user_id=user_id)
+        if user is not None:
+            user_cache.store(user)
+    return user
+
+
+async def get_token_version_cached(db: AnySession, user_id: UUID) -> int | None:
+    """Return a non-deleted user's token version, from the user cache when possible."""
+    token_version = user_cache.get_token_version(user_id)
+    if token_version is None:
+        token_version = await run_crud(db, "get_token_version", user_id=user_id)
+        if token_version is not None:
+            user_cache.store_token_version(user_id, token_version)
+    return token_version
 
 
 class UserNotFoundException(HTTPException):
@@ -25,35 +92,220 @@ class DuplicateEmailException(HTTPException):
         )
 
 
-def create_user_service(db: Session, user: UserCreate) -> User:
-    """Service to create a new user."""
-    db_user_by_email = crud_user.get_user_by_email(db, email=user.email)
-    if db_user_by_email:
-        raise DuplicateEmailException
-    db_user_by_username = crud_user.get_user_by_username(db, username=user.username)
-    if db_user_by_username:
-        raise HTTPException(
+class DuplicateUsernameException(HTTPException):
+    def __init__(self):
+        super().__init__(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered",
         )
 
+
+class InvalidCursorException(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor",
+        )
+
+
+class PreconditionFailedException(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="User has been modified since it was read",
+        )
+
+
+class IncorrectPasswordException(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Incorrect current password",
+        )
+
+
+def _raise_for_conflict(exc: IntegrityError):
+    field = crud_user.conflicting_field(exc)
+    if field == "email":
+        raise DuplicateEmailException from exc
+    if field == "username":
+        raise DuplicateUsernameException from exc
+    raise exc
+
+
+def create_user_service(db: Session, user: UserCreate) -> User:
+    """Service to create a new user.
+
+    There are no existence checks up front: the INSERT itself is the check, so
+    concurrent registrations cannot race past it, and which unique index
+    rejected the row decides the error.
+    """
     hashed_password = get_password_hash(user.password)
-    return crud_user.create_user(db=db, user=user, hashed_password=hashed_password)
+    try:
+        return crud_user.create_user(db=db, user=user, hashed_password=hashed_password)
+    except IntegrityError as exc:
+        _raise_for_conflict(exc)
+
+
+async def create_user_service_async(db: AnySession, user: UserCreate) -> User:
+    """Async variant of `create_user_service` that hashes on the dedicated hashing pool."""
+    hashed_password = await password_hasher.hash_async(user.password)
+    try:
+        return await run_crud(db, "create_user", user=user, hashed_password=hashed_password)
+    except IntegrityError as exc:
+        _raise_for_conflict(exc)
+
+
+async def bulk_create_users_async(db: AnySession, users: list[UserCreate]) -> BulkUserCreateResponse:
+    """Register a batch of users, reporting a result per item.
+
+    Duplicates are detected with one set-based query plus an in-batch check,
+    passwords are hashed in parallel on the hashing pool, and the survivors
+    are inserted with multi-row statements in a single transaction. Rows that
+    lose a race to a concurrent registration are skipped and reported with
+    status ``conflict`` instead of failing the batch.
+    """
+    taken_emails, taken_usernames = await run_crud(
+        db,
+        "get_taken_emails_and_usernames",
+        emails=[user.email for user in users],
+        usernames=[user.username for user in users],
+    )
+
+    results: dict[int, BulkUserResult] = {}
+    accepted: list[tuple[int, UserCreate]] = []
+    # Live users are unique case-insensitively, so so are the items of one batch.
+    batch_emails: set[str] = set()
+    batch_usernames: set[str] = set()
+    for index, user in enumerate(users):
+        email, username = user.email.lower(), user.username.lower()
+        if user.email in taken_emails or email in batch_emails:
+            results[index] = BulkUserResult(index=index, status="duplicate_email")
+        elif user.username in taken_usernames or username in batch_usernames:
+            results[index] = BulkUserResult(index=index, status="duplicate_username")
+        else:
+            batch_emails.add(email)
+            batch_usernames.add(username)
+            accepted.append((index, user))
+
+    hashed_passwords = await password_hasher.hash_many_async([user.password for _, user in accepted])
+    rows = [
+        {
+            "email": user.email,
+            "username": user.username,
+            "full_name": user.full_name,
+            "hashed_password": hashed_password,
+        }
+        for (_, user), hashed_password in zip(accepted, hashed_passwords, strict=True)
+    ]
+    inserted = await run_crud(db, "create_users_bulk", rows=rows) if rows else []
+
+    inserted_by_email = {db_user.email: db_user for db_user in inserted}
+    for index, user in accepted:
+        db_user = inserted_by_email.get(user.email)
+        if db_user is not None:
+            results[index] = BulkUserResult(index=index, status="created", user=UserRead.model_validate(db_user))
+        else:
+            results[index] = BulkUserResult(index=index, status="conflict")
+
+    return BulkUserCreateResponse(
+        created=len(inserted),
+        failed=len(users) - len(inserted),
+        results=[results[index] for index in range(len(users))],
+    )
+
 
+async def authenticate_user_async(
+    db: AnySession,
+    username: str,
+    password: str,
+    background_tasks: BackgroundTasks | None = None,
+) -> Row | None:
+    """Return the user's credentials row if the password is valid, verifying on the dedicated hashing pool.
 
-def update_user_profile(db: Session, user_id: UUID, user_update: UserUpdate) -> User:
-    """Service to update a user's profile information."""
-    db_user = crud_user.get_user(db, user_id=user_id)
+    Only the login columns are read, so the lookup is an index-only scan. If
+    the stored hash is outdated and ``background_tasks`` is given, it is
+    upgraded after the response has been sent.
+    """
+    credentials = await run_crud(db, "get_user_credentials", username=username)
+    if not credentials or not await password_hasher.verify_async(password, credentials.hashed_password):
+        return None
+    if (
+        background_tasks is not None
+        and settings.PASSWORD_REHASH_ON_LOGIN
+        and password_needs_rehash(credentials.hashed_password)
+    ):
+        background_tasks.add_task(rehash_password_async, credentials.id, credentials.hashed_password, password)
+    return credentials
+
+
+async def rehash_password_async(user_id: UUID, old_hash: str, password: str):
+    """Store a hash of ``password`` made with the current scheme and cost.
+
+    Runs as a background task, after the request's session has been closed,
+    so it opens a session of its own for the serving mode in use.
+    """
+    db = AsyncSessionLocal() if settings.ASYNC_DB else SessionLocal()
+    try:
+        new_hash = await password_hasher.hash_async(password)
+        await run_crud(db, "rehash_password", user_id=user_id, old_hash=old_hash, new_hash=new_hash)
+    except Exception:
+        # The login already succeeded; the upgrade is retried on the next one.
+        logger.exception("Could not upgrade the password hash for user %s", user_id)
+    finally:
+        if isinstance(db, AsyncSession):
+            await db.close()
+        else:
+            await run_in_threadpool(db.close)
+
+
+def update_user_profile(
+    db: Session,
+    user_id: UUID,
+    user_update: UserUpdate,
+    expected_updated_at: datetime | None = None,
+) -> User:
+    """Service to update a user's profile information.
+
+    The UPDATE is the only statement: a missing user means no row came back,
+    and a taken email is reported by the unique index. With
+    ``expected_updated_at`` (from an ``If-Match`` ETag) the update only
+    applies if the user is unchanged since, and `PreconditionFailedException`
+    is raised otherwise.
+    """
+    update_data = user_update.model_dump(exclude_unset=True)
+    try:
+        db_user = crud_user.update_user(
+            db, user_id=user_id, obj_in=update_data, expected_updated_at=expected_updated_at,
+        )
+    except IntegrityError as exc:
+        _raise_for_conflict(exc)
     if not db_user:
+        if expected_updated_at is not None:
+            raise PreconditionFailedException()
         raise UserNotFoundException()
+    return db_user
 
-    if user_update.email and user_update.email != db_user.email:
-        existing_user = crud_user.get_user_by_email(db, email=user_update.email)
-        if existing_user and existing_user.id != user_id:
-            raise DuplicateEmailException
 
+async def update_user_profile_async(
+    db: AnySession,
+    user_id: UUID,
+    user_update: UserUpdate,
+    expected_updated_at: datetime | None = None,
+) -> User:
+    """Async variant of `update_user_profile`."""
     update_data = user_update.model_dump(exclude_unset=True)
-    return crud_user.update_user(db, db_user=db_user, obj_in=update_data)
+    try:
+        db_user = await run_crud(
+            db, "update_user", user_id=user_id, obj_in=update_data, expected_updated_at=expected_updated_at,
+        )
+    except IntegrityError as exc:
+        _raise_for_conflict(exc)
+    if not db_user:
+        if expected_updated_at is not None:
+            raise PreconditionFailedException()
+        raise UserNotFoundException()
+    return db_user
 
 
 def change_user_password_service(
@@ -63,10 +315,7 @@ def change_user_password_service(
 ) -> User:
     """Service to change a user's password."""
     if not verify_password(password_update.current_password, user.hashed_password):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Incorrect current password",
-        )
+        raise IncorrectPasswordException
 
     hashed_password = get_password_hash(password_update.new_password)
     return crud_user.update_user_password(
@@ -76,17 +325,120 @@ def change_user_password_service(
     )
 
 
-def delete_user_account(db: Session, user_id: UUID, current_password: str):
-    """Service to delete a user's account."""
-    db_user = crud_user.get_user(db, user_id=user_id)
-    if not db_user:
+async def change_user_password_service_async(
+    db: AnySession,
+    user: User,
+    password_update: PasswordUpdate,
+) -> User:
+    """Async variant of `change_user_password_service` that hashes on the dedicated hashing pool."""
+    if not await password_hasher.verify_async(password_update.current_password, user.hashed_password):
+        raise IncorrectPasswordException
+
+    hashed_password = await password_hasher.hash_async(password_update.new_password)
+    return await run_crud(db, "update_user_password", user=user, hashed_password=hashed_password)
+
+
+def delete_user_account(db: Session, user: User, current_password: str):
+    """Service to delete a user's account.
+
+    `user` is the authenticated user, so the password is checked against it
+    without re-reading the row.
+    """
+    if not verify_password(current_password, user.hashed_password):
+        raise IncorrectPasswordException
+    if not crud_user.mark_user_for_deletion(db, user_id=user.id):
         raise UserNotFoundException()
 
-    if not verify_password(current_password, db_user.hashed_password):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Incorrect current password",
-        )
-    db_user.deletion_requested_at = datetime.utcnow()
-    db_user.is_active = False
-    db.commit()
+
+async def delete_user_account_async(db: AnySession, user: User, current_password: str):
+    """Async variant of `delete_user_account` that verifies on the dedicated hashing pool."""
+    if not await password_hasher.verify_async(current_password, user.hashed_password):
+        raise IncorrectPasswordException
+    if not await run_crud(db, "mark_user_for_deletion", user_id=user.id):
+        raise UserNotFoundException()
+
+
+def encode_cursor(user: User) -> str:
+    """Encode a row's ``(created_at, id)`` sort key as an opaque page cursor."""
+    payload = json.dumps([user.created_at.isoformat(), str(user.id)]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """Decode a cursor from `encode_cursor`, raising `InvalidCursorException` if it is malformed."""
+    try:
+        created_at, user_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), UUID(user_id)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as exc:
+        raise InvalidCursorException() from exc
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def user_etag(user: User) -> str:
+    """Return a strong ETag for the user's current state, built from its id and ``updated_at``.
+
+    Every write to a user moves ``updated_at`` forward (except the invisible
+    password rehash), so the tag changes exactly when the representation does.
+    """
+    version = (user.updated_at - _EPOCH) // timedelta(microseconds=1)
+    return f'"{user.id.hex}-{version:x}"'
+
+
+def _parse_etag(etag: str) -> tuple[UUID, datetime] | None:
+    try:
+        user_id, version = etag.strip('"').split("-")
+        return UUID(hex=user_id), _EPOCH + timedelta(microseconds=int(version, 16))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Apply ``If-None-Match``'s weak comparison of ``etag`` against the header's list."""
+    if if_none_match is None:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in (tag.removeprefix("W/") for tag in tags)
+
+
+def expected_updated_at(if_match: str | None, user_id: UUID) -> datetime | None:
+    """Return the ``updated_at`` an ``If-Match`` header requires the user to still have.
+
+    ``None`` means the write is unconditional (no header, or ``*``). Raises
+    `PreconditionFailedException` if no strong tag in the header is for this user.
+    """
+    if if_match is None:
+        return None
+    tags = [tag.strip() for tag in if_match.split(",")]
+    if "*" in tags:
+        return None
+    for tag in tags:
+        parsed = None if tag.startswith("W/") else _parse_etag(tag)
+        if parsed is not None and parsed[0] == user_id:
+            return parsed[1]
+    raise PreconditionFailedException()
+
+
+async def list_users_async(
+    db: AnySession,
+    limit: int,
+    cursor: str | None = None,
+    is_active: bool | None = None,
+    is_deleted: bool | None = None,
+    deletion_requested: bool | None = None,
+) -> UserPage:
+    """Return one page of users ordered by creation time, with the cursor for the next page."""
+    users = await run_crud(
+        db,
+        "list_users",
+        limit=limit + 1,
+        after=decode_cursor(cursor) if cursor else None,
+        is_active=is_active,
+        is_deleted=is_deleted,
+        deletion_requested=deletion_requested,
+    )
+    has_more = len(users) > limit
+    users = users[:limit]
+    # Rows come straight from the database, so they are not validated again.
+    return user_page(users, next_cursor=encode_cursor(users[-1]) if has_more else None)
@@ -0,0 +1,105 @@
+"""Compare per-response serialization time of FastAPI's default path and the trusted fast path.
+
+Serializes a ``UserRead`` (the ``GET /users/me`` body) and a 500-row
+``UserPage`` (the largest admin listing page) three ways:
+
+* ``fastapi+json``: what FastAPI does for ``response_model``: validate the
+  ORM object into the schema, dump it and encode it with ``JSONResponse``
+* ``fastapi+orjson``: the same with ``ORJSONResponse``, the app's default
+  response class
+* ``trusted``: ``app.schemas.serialization``: no validation, JSON written
+  directly by pydantic-core
+
+No database or server is needed.
+
+Usage:
+    python benchmarks/serialization.py --iterations 20000
+"""
+import argparse
+import os
+import sys
+import timeit
+import uuid
+from datetime import datetime
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.utils import create_response_field
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.user import User  # noqa: E402
+from app.schemas import serialization  # noqa: E402
+from app.schemas.user import UserPage, UserRead  # noqa: E402
+
+PAGE_SIZE = 500
+
+
+def make_user(n: int) -> User:
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    return User(
+        id=uuid.uuid4(),
+        email=f"bench{n}@example.com",
+        username=f"bench{n}",
+        full_name=f"Bench User {n}",
+        hashed_password="$2b$12$" + "x" * 53,
+        is_active=True,
+        is_deleted=False,
+        created_at=now,
+        updated_at=now,
+        deleted_at=None,
+        deletion_requested_at=None,
+    )
+
+
+def fastapi_path(field, content, response_class):
+    # The synchronous core of fastapi.routing.serialize_response.
+    def run() -> bytes:
+        value, errors = field.validate(content, {}, loc=("response",))
+        assert not errors, errors
+        return response_class(field.serialize(value, mode="json", by_alias=True)).body
+
+    return run
+
+
+def time_per_call(fn, iterations: int) -> float:
+    fn()  # warm up
+    return min(timeit.repeat(fn, number=iterations, repeat=3)) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000, help="calls per measurement for the single user")
+    args = parser.parse_args()
+
+    user = make_user(0)
+    users = [make_user(n) for n in range(PAGE_SIZE)]
+    page_iterations = max(1, args.iterations // PAGE_SIZE)
+    user_field = create_response_field(name="response", type_=UserRead, mode="serialization")
+    page_field = create_response_field(name="response", type_=UserPage, mode="serialization")
+    # The admin listing hands FastAPI a page of ORM rows.
+    page_content = {"items": users, "next_cursor": None}
+
+    cases = [
+        ("UserRead", args.iterations, {
+            "fastapi+json": fastapi_path(user_field, user, JSONResponse),
+            "fastapi+orjson": fastapi_path(user_field, user, ORJSONResponse),
+            "trusted": lambda: serialization.user_read.response(user).body,
+        }),
+        (f"UserPage[{PAGE_SIZE}]", page_iterations, {
+            "fastapi+json": fastapi_path(page_field, page_content, JSONResponse),
+            "fastapi+orjson": fastapi_path(page_field, page_content, ORJSONResponse),
+            "trusted": lambda: serialization.model_response(serialization.user_page(users, None)).body,
+        }),
+    ]
+
+    print(f"{'payload':<16}{'path':<18}{'per response':>14}{'speedup':>10}")
+    for payload, iterations, paths in cases:
+        baseline = None
+        for name, fn in paths.items():
+            seconds = time_per_call(fn, iterations)
+            baseline = baseline or seconds
+            print(f"{payload:<16}{name:<18}{seconds * 1e6:>11.1f} us{baseline / seconds:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
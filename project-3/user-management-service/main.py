@@ -1,18 +1,63 @@
+import logging
+from contextlib import asynccontextmanager
+
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
-from app.api.v1.endpoints import auth, users
+from app.api.v1.endpoints import auth, internal, metrics, users
+from app.core.config import settings
+from app.core.hashing import password_hasher
+from app.core.revocation import revocation_filter
+from app.core.tracing import configure_tracing, shutdown_tracing
+from app.core.user_cache import user_cache
 from app.db.base import Base  # noqa
-from app.models import user  # noqa
+from app.db.pool import threadpool_size
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.tracing import TracingMiddleware
+from app.models import login_throttle, revoked_token, user  # noqa
+from app.services.purge_worker import purge_worker
 
 # Create all tables in the database
 # Base.metadata.create_all(bind=engine)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    threads = threadpool_size()
+    pool_capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    if threads > pool_capacity:
+        logging.getLogger(__name__).warning(
+            "THREADPOOL_MAX_WORKERS=%s exceeds the DB pool capacity of %s; "
+            "sync endpoints will queue on connection checkout",
+            threads,
+            pool_capacity,
+        )
+    anyio.to_thread.current_default_thread_limiter().total_tokens = threads
+    if settings.TRACING_ENABLED:
+        configure_tracing()
+    user_cache.start()
+    revocation_filter.start()
+    if settings.PURGE_ENABLED:
+        purge_worker.start()
+    yield
+    purge_worker.stop()
+    revocation_filter.stop()
+    user_cache.stop()
+    password_hasher.shutdown()
+    shutdown_tracing()
+
+
 app = FastAPI(
     title="User Management Service",
     description="API for user registration, authentication, and profile management.",
     version="1.0.0",
     redirect_slashes=False,  # Disable strict slash matching to prevent CORS preflight redirects
+    lifespan=lifespan,
+    # Everything not already serialized by app.schemas.serialization is encoded with orjson.
+    default_response_class=ORJSONResponse,
 )
 
 origins = [
@@ -33,5 +78,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
+
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+if settings.METRICS_ENABLED or settings.DB_STATEMENT_STATS_ENABLED:
+    # Added last so it is outermost and times the whole middleware stack. Statement
+    # statistics need it too, for the route each statement ran on behalf of.
+    app.add_middleware(MetricsMiddleware, record_metrics=settings.METRICS_ENABLED)
+
 app.include_router(auth.router, prefix="/api/v1", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/v1", tags=["Users"])
+app.include_router(internal.router, prefix="/api/v1", tags=["Internal"])
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
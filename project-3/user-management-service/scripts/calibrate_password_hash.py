@@ -0,0 +1,77 @@
+"""Pick the password-hash cost that meets a target verify time on this machine.
+
+Raises the cost one step at a time (bcrypt rounds, or argon2 time cost at the
+given memory and parallelism) and reports the highest cost whose median
+verify time stays within the target. Run it on production-like hardware and
+copy the printed settings into the environment.
+
+Usage:
+    python scripts/calibrate_password_hash.py --scheme bcrypt --target-ms 250
+    python scripts/calibrate_password_hash.py --scheme argon2 --target-ms 250 --memory-cost 65536 --parallelism 4
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.security import PASSWORD_HASH_SCHEMES, build_password_context  # noqa: E402
+
+# Stop before costs that would take far longer than any sane target.
+MAX_COST = {"bcrypt": 20, "argon2": 50}
+MIN_COST = {"bcrypt": 4, "argon2": 1}
+
+
+def median_verify_seconds(context, samples: int) -> float:
+    hashed = context.hash("calibration-password")
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        context.verify("calibration-password", hashed)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scheme", choices=PASSWORD_HASH_SCHEMES, default="bcrypt")
+    parser.add_argument("--target-ms", type=float, default=250.0, help="verify-time budget per login")
+    parser.add_argument("--memory-cost", type=int, default=65536, help="argon2 memory in KiB")
+    parser.add_argument("--parallelism", type=int, default=4, help="argon2 lanes")
+    parser.add_argument("--samples", type=int, default=5, help="verifies timed per cost")
+    args = parser.parse_args()
+
+    target = args.target_ms / 1000
+    chosen = None
+    for cost in range(MIN_COST[args.scheme], MAX_COST[args.scheme] + 1):
+        if args.scheme == "bcrypt":
+            context = build_password_context(scheme="bcrypt", bcrypt_rounds=cost)
+        else:
+            context = build_password_context(
+                scheme="argon2",
+                argon2_time_cost=cost,
+                argon2_memory_cost=args.memory_cost,
+                argon2_parallelism=args.parallelism,
+            )
+        elapsed = median_verify_seconds(context, args.samples)
+        print(f"cost={cost:<3} verify={elapsed * 1000:8.1f} ms", file=sys.stderr)
+        if elapsed > target:
+            break
+        chosen = cost
+
+    if chosen is None:
+        sys.exit(f"Even the minimum {args.scheme} cost exceeds {args.target_ms:.0f} ms; raise the target.")
+
+    print(f"PASSWORD_HASH_SCHEME={args.scheme}")
+    if args.scheme == "bcrypt":
+        print(f"BCRYPT_ROUNDS={chosen}")
+    else:
+        print(f"ARGON2_TIME_COST={chosen}")
+        print(f"ARGON2_MEMORY_COST={args.memory_cost}")
+        print(f"ARGON2_PARALLELISM={args.parallelism}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""Check the query plans of every ``crud_user`` query against a large ``users`` table.
+
+Each check calls a ``crud_user`` function with a sampled user and records the
+SQL it sends. Every statement is then run again under
+``EXPLAIN (ANALYZE, BUFFERS)``, and a check fails if its plan contains a
+sequential scan or goes over the buffer or execution time budget. All writes
+are rolled back, so the dataset is left as it was.
+
+Load a realistic dataset first (see ``scripts/generate_users.py``); on a small
+table a sequential scan is the right plan, so the checker refuses to run
+against fewer than ``--min-rows`` users.
+
+Usage:
+    python scripts/generate_users.py --count 2000000
+    python scripts/check_query_plans.py --max-buffers 200 --max-ms 20
+"""
+import argparse
+import os
+import sys
+import uuid
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import Connection, create_engine, event, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.config import settings  # noqa: E402
+from app.crud import crud_user  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.schemas.user import UserCreate  # noqa: E402
+
+NEW_HASH = "$2b$04$" + "n" * 53
+
+
+@dataclass(frozen=True)
+class Check:
+    name: str
+    run: Callable[[Session, dict], object]
+    # Multiplies the default budgets, for checks that do more work by design.
+    budget_factor: float = 1.0
+
+
+def _new_user() -> dict:
+    name = f"plancheck_{uuid.uuid4().hex[:12]}"
+    return {"email": f"{name}@example.com", "username": name}
+
+
+CHECKS = [
+    Check("get_user", lambda db, s: crud_user.get_user(db, s["id"])),
+    Check("get_user_by_email", lambda db, s: crud_user.get_user_by_email(db, s["email"].upper())),
+    Check("get_user_by_username", lambda db, s: crud_user.get_user_by_username(db, s["username"].upper())),
+    Check("get_user_credentials", lambda db, s: crud_user.get_user_credentials(db, s["username"])),
+    Check("get_token_version", lambda db, s: crud_user.get_token_version(db, s["id"])),
+    Check("list_users", lambda db, s: crud_user.list_users(db, limit=100)),
+    Check("list_users after", lambda db, s: crud_user.list_users(db, limit=100, after=(s["created_at"], s["id"]))),
+    Check(
+        "list_users pending deletion",
+        lambda db, s: crud_user.list_users(db, limit=100, is_active=False, deletion_requested=True),
+        budget_factor=10,
+    ),
+    Check(
+        "get_taken_emails_and_usernames",
+        lambda db, s: crud_user.get_taken_emails_and_usernames(
+            db, [s["email"], "nobody@example.com"], [s["username"], "nobody"],
+        ),
+    ),
+    Check(
+        "create_user",
+        lambda db, s: crud_user.create_user(db, UserCreate(**_new_user(), password="x" * 12), NEW_HASH),
+    ),
+    Check(
+        "create_users_bulk",
+        lambda db, s: crud_user.create_users_bulk(
+            db, [{**_new_user(), "hashed_password": NEW_HASH} for _ in range(100)],
+        ),
+        budget_factor=50,
+    ),
+    Check("update_user", lambda db, s: crud_user.update_user(db, s["id"], {"full_name": "Plan Check"})),
+    Check(
+        "update_user if unmodified",
+        lambda db, s: crud_user.update_user(db, s["id"], {"full_name": "Plan Check"}, s["updated_at"]),
+    ),
+    Check("update_user_password", lambda db, s: crud_user.update_user_password(db, User(id=s["id"]), NEW_HASH)),
+    Check("rehash_password", lambda db, s: crud_user.rehash_password(db, s["id"], s["hashed_password"], NEW_HASH)),
+    Check("delete_user", lambda db, s: crud_user.delete_user(db, s["id"])),
+    Check("mark_user_for_deletion", lambda db, s: crud_user.mark_user_for_deletion(db, s["id"])),
+    # One batch of the purge; it updates up to the batch size in one statement.
+    Check(
+        "purge batch",
+        lambda db, s: db.execute(crud_user.purge_batch_statement(100, datetime.utcnow())).all(),
+        budget_factor=50,
+    ),
+]
+
+
+@dataclass
+class PlanResult:
+    check: str
+    statement: str
+    execution_ms: float = 0.0
+    buffers: int = 0
+    violations: list[str] = field(default_factory=list)
+
+
+def _walk(node: dict) -> Iterator[dict]:
+    yield node
+    for child in node.get("Plans", ()):
+        yield from _walk(child)
+
+
+def plan_violations(explained: list | dict, max_buffers: float, max_ms: float) -> list[str]:
+    """Return why an ``EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)`` result breaks the budgets, if it does."""
+    explained = explained[0] if isinstance(explained, list) else explained
+    plan = explained["Plan"]
+    violations = [
+        f"Seq Scan on {node.get('Relation Name', '?')}" for node in _walk(plan) if node["Node Type"] == "Seq Scan"
+    ]
+    buffers = plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0)
+    if buffers > max_buffers:
+        violations.append(f"{buffers} buffers > {max_buffers:g}")
+    if explained["Execution Time"] > max_ms:
+        violations.append(f"{explained['Execution Time']:.2f} ms > {max_ms:g} ms")
+    return violations
+
+
+@contextmanager
+def _captured_statements(connection: Connection) -> Iterator[list[tuple[str, object]]]:
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(("SAVEPOINT", "RELEASE", "ROLLBACK")):
+            # "insertmanyvalues" batches arrive as one flattened set of parameters.
+            many = executemany and isinstance(parameters, list | tuple)
+            statements.append((statement, parameters[0] if many else parameters))
+
+    event.listen(connection, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(connection, "before_cursor_execute", capture)
+
+
+def sample_user(connection: Connection) -> dict | None:
+    """Pick an active user at random, by the position of its random UUID."""
+    row = connection.execute(
+        text(
+            "SELECT id, email, username, hashed_password, created_at, updated_at FROM users "
+            "WHERE id >= :start AND is_active AND NOT is_deleted ORDER BY id LIMIT 1",
+        ),
+        {"start": uuid.uuid4()},
+    ).first()
+    return row._asdict() if row is not None else None
+
+
+def check_plans(
+    connection: Connection, sample: dict, max_buffers: float, max_ms: float, checks: list[Check] = CHECKS,
+) -> list[PlanResult]:
+    """Run every check inside ``connection``'s transaction, rolling back whatever it writes."""
+    results = []
+    for check in checks:
+        savepoint = connection.begin_nested()
+        try:
+            with _captured_statements(connection) as statements, Session(
+                bind=connection, join_transaction_mode="create_savepoint", expire_on_commit=False,
+            ) as session:
+                check.run(session, sample)
+        except Exception as exc:  # noqa: BLE001
+            results.append(PlanResult(check.name, "", violations=[f"{type(exc).__name__}: {exc}"]))
+            continue
+        finally:
+            savepoint.rollback()
+
+        seen = set()
+        for statement, parameters in statements:
+            if statement in seen:
+                continue
+            seen.add(statement)
+            savepoint = connection.begin_nested()
+            try:
+                explained = connection.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters or (),
+                ).scalar_one()
+            finally:
+                savepoint.rollback()
+            explained = explained[0]
+            plan = explained["Plan"]
+            results.append(
+                PlanResult(
+                    check.name,
+                    statement,
+                    execution_ms=explained["Execution Time"],
+                    buffers=plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0),
+                    violations=plan_violations(
+                        explained, max_buffers * check.budget_factor, max_ms * check.budget_factor,
+                    ),
+                ),
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-buffers", type=float, default=200, help="shared buffers hit or read per statement")
+    parser.add_argument("--max-ms", type=float, default=20, help="execution time per statement")
+    parser.add_argument("--min-rows", type=int, default=100_000, help="refuse to run on a smaller users table")
+    parser.add_argument("--verbose", action="store_true", help="print the SQL of every statement")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url, poolclass=NullPool)
+    with engine.connect() as connection:
+        rows = connection.scalar(text("SELECT reltuples::bigint FROM pg_class WHERE relname = 'users'"))
+        if rows is None or rows < args.min_rows:
+            sys.exit(f"users has about {rows} rows; load at least {args.min_rows} with scripts/generate_users.py")
+        sample = sample_user(connection)
+        if sample is None:
+            sys.exit("users has no active user to sample")
+        results = check_plans(connection, sample, args.max_buffers, args.max_ms)
+        connection.rollback()
+
+    print(f"{'check':<34}{'ms':>9}{'buffers':>9}  result")
+    for result in results:
+        print(
+            f"{result.check:<34}{result.execution_ms:>9.2f}{result.buffers:>9}  "
+            f"{'; '.join(result.violations) or 'ok'}",
+        )
+        if args.verbose or result.violations:
+            statement = " ".join(result.statement.split())
+            print(f"    {statement if args.verbose else statement[:200]}")
+    if any(result.violations for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Export users as NDJSON or CSV through a server-side cursor.
+
+``hashed_password`` is never exported. Soft-deleted users are skipped unless
+``--include-deleted`` is given.
+
+Usage:
+    python scripts/export_users.py --format csv --gzip --output users.csv.gz
+    python scripts/export_users.py --columns id,email,created_at > users.ndjson
+"""
+import argparse
+import os
+import sys
+from contextlib import nullcontext
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.config import settings  # noqa: E402
+from app.services.user_export import EXPORT_FORMATS, iter_export, parse_columns  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    parser.add_argument("--columns", help="comma-separated columns; defaults to all but hashed_password")
+    parser.add_argument("--gzip", action="store_true", help="gzip the output")
+    parser.add_argument("--include-deleted", action="store_true")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--output", default="-", help="output file, or '-' for stdout")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    args = parser.parse_args()
+
+    try:
+        columns = parse_columns(args.columns)
+    except HTTPException as exc:
+        parser.error(exc.detail)
+
+    engine = create_engine(args.database_url, poolclass=NullPool)
+    with nullcontext(sys.stdout.buffer) if args.output == "-" else open(args.output, "wb") as output:
+        for chunk in iter_export(
+            engine.connect,
+            columns,
+            args.format,
+            compress=args.gzip,
+            include_deleted=args.include_deleted,
+            batch_size=args.batch_size,
+        ):
+            output.write(chunk)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Bulk-load a synthetic population of users for capacity and query-plan testing.
+
+Rows are built by ``tests.factories.UserRowFactory`` in a realistic mix of
+lifecycle states and streamed into ``users`` with COPY, one chunk per
+transaction, on a process pool. Usernames are ``<prefix><n>``, so a run can be
+extended with ``--start`` or removed again with ``--delete``. Every generated
+user's password is ``tests.factories.PASSWORD``. The table is ANALYZEd at the
+end so the planner sees the new cardinality straight away.
+
+Usage:
+    python scripts/generate_users.py --count 5000000 --workers 8
+    python scripts/generate_users.py --delete
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import repeat
+
+import factory.random
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.config import settings  # noqa: E402
+from tests.factories import UserRowFactory  # noqa: E402
+
+# Share of each lifecycle state; "active" means no trait.
+STATE_WEIGHTS = {"active": 0.85, "deactivated": 0.05, "pending_deletion": 0.03, "deleted": 0.07}
+COLUMNS = tuple(UserRowFactory.build())
+
+
+def build_rows(start: int, count: int, prefix: str, seed: int) -> list[dict]:
+    """Build users ``start`` to ``start + count - 1``; the same arguments always give the same rows."""
+    factory.random.reseed_random(f"{seed}:{start}")
+    states = factory.random.randgen.choices(list(STATE_WEIGHTS), weights=list(STATE_WEIGHTS.values()), k=count)
+    return [
+        UserRowFactory.build(username=f"{prefix}{n:09d}", **({state: True} if state != "active" else {}))
+        for n, state in zip(range(start, start + count), states, strict=True)
+    ]
+
+
+def copy_chunk(database_url: str, start: int, count: int, prefix: str, seed: int) -> int:
+    """Build one chunk of users and COPY it in its own transaction."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in build_rows(start, count, prefix, seed):
+        # csv writes None as an unquoted empty field, which COPY reads as NULL.
+        writer.writerow(row[column] for column in COLUMNS)
+    buffer.seek(0)
+
+    engine = create_engine(database_url, poolclass=NullPool)
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY users ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        connection.commit()
+    finally:
+        connection.close()
+        engine.dispose()
+    return count
+
+
+def generate(
+    database_url: str,
+    count: int,
+    prefix: str,
+    start: int = 0,
+    seed: int = 0,
+    chunk_size: int = 10000,
+    workers: int = 1,
+    progress=None,
+) -> int:
+    """Load ``count`` users and ANALYZE the table, returning the number of rows loaded.
+
+    ``progress`` is called with the running total after every chunk.
+    """
+    starts = range(start, start + count, chunk_size)
+    counts = [min(chunk_size, start + count - s) for s in starts]
+    arguments = (repeat(database_url), starts, counts, repeat(prefix), repeat(seed))
+    loaded = 0
+    with ProcessPoolExecutor(max_workers=workers) if workers > 1 else nullcontext() as executor:
+        for n in (executor.map if executor is not None else map)(copy_chunk, *arguments):
+            loaded += n
+            if progress is not None:
+                progress(loaded)
+
+    engine = create_engine(database_url, poolclass=NullPool)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("ANALYZE users"))
+    engine.dispose()
+    return loaded
+
+
+def delete(database_url: str, prefix: str) -> int:
+    """Delete every user whose username starts with ``prefix``."""
+    engine = create_engine(database_url, poolclass=NullPool)
+    with engine.begin() as connection:
+        deleted = connection.execute(
+            text("DELETE FROM users WHERE username LIKE :pattern"),
+            {"pattern": prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"},
+        ).rowcount
+    engine.dispose()
+    return deleted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--start", type=int, default=0, help="number of the first generated user")
+    parser.add_argument("--prefix", default="synthetic_", help="username prefix of the generated users")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=10000, help="rows per COPY transaction")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--delete", action="store_true", help="delete the users with --prefix instead")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    args = parser.parse_args()
+
+    if args.delete:
+        print(f"Deleted {delete(args.database_url, args.prefix)} users")
+        return
+
+    started = time.perf_counter()
+
+    def progress(loaded: int):
+        print(f"\r{loaded}/{args.count} users", end="", file=sys.stderr)
+
+    loaded = generate(
+        args.database_url,
+        args.count,
+        args.prefix,
+        start=args.start,
+        seed=args.seed,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        progress=progress,
+    )
+    elapsed = time.perf_counter() - started
+    print(f"\nloaded={loaded} elapsed={elapsed:.1f}s throughput={loaded / elapsed:.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
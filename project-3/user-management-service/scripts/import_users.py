@@ -0,0 +1,69 @@
+"""Bulk-import users from CSV or NDJSON through Postgres COPY.
+
+Each row needs ``email``, ``username`` and either ``password`` (hashed here on
+a process pool) or a bcrypt ``hashed_password`` carried over from a legacy
+system; ``full_name`` is optional. Rows that fail validation or conflict with
+existing users are written to the rejects file. Re-running with the same
+checkpoint file resumes after the last committed batch.
+
+Usage:
+    python scripts/import_users.py users.csv --checkpoint users.csv.ckpt --rejects rejects.ndjson
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.config import settings  # noqa: E402
+from app.services.user_import import (  # noqa: E402
+    UserImporter,
+    detect_format,
+    iter_records,
+    load_checkpoint,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="CSV or NDJSON file, or '-' for stdin")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--checkpoint", help="progress file used to resume an interrupted import")
+    parser.add_argument("--rejects", default="import_rejects.ndjson", help="where rejected rows are written")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(args.source)
+    source_name = os.path.abspath(args.source) if args.source != "-" else "<stdin>"
+    report = load_checkpoint(args.checkpoint, source_name)
+    if report.last_line:
+        print(f"Resuming after line {report.last_line}", file=sys.stderr)
+
+    engine = create_engine(args.database_url, poolclass=NullPool)
+    source = nullcontext(sys.stdin) if args.source == "-" else open(args.source, newline="", encoding="utf-8")
+    with source as stream, open(args.rejects, "a") as rejects, engine.connect() as connection, \
+            ProcessPoolExecutor(max_workers=args.workers) as executor:
+
+        def on_reject(line_no: int, record: dict, reason: str):
+            rejects.write(json.dumps({"line": line_no, "reason": reason, "record": record}, default=str) + "\n")
+
+        importer = UserImporter(connection, executor, batch_size=args.batch_size, on_reject=on_reject)
+        report = importer.run(iter_records(stream, fmt), report, checkpoint_path=args.checkpoint)
+
+    print(
+        f"read={report.read} imported={report.imported} rejected={report.rejected} "
+        f"conflicts={report.conflicts} elapsed={report.elapsed_seconds:.1f}s "
+        f"throughput={report.rows_per_second:.0f} rows/s",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Print a link that profiles one request without handing out the admin key.
+
+The ``profile`` query value is signed with ADMIN_API_KEY for one method and
+path and expires after ``--ttl`` seconds. The server needs
+PROFILING_ENABLED; the response's ``X-Profile`` header names the stored
+profile.
+
+Usage:
+    ADMIN_API_KEY=... python scripts/sign_profile_url.py GET /api/v1/users/me
+    ADMIN_API_KEY=... python scripts/sign_profile_url.py GET /api/v1/users --mode memory --base-url https://users.internal
+"""
+import argparse
+import os
+import sys
+from urllib.parse import urlencode
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.profiling import PROFILE_MODES, sign_profile_request  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("method")
+    parser.add_argument("path", help="request path, without the query string")
+    parser.add_argument("--mode", choices=PROFILE_MODES, default="cpu", help="memory adds tracemalloc stats")
+    parser.add_argument("--ttl", type=int, default=300, help="seconds the link stays valid")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    args = parser.parse_args()
+
+    try:
+        value = sign_profile_request(args.method, args.path, args.mode, args.ttl)
+    except ValueError as exc:
+        sys.exit(str(exc))
+    print(f"{args.base_url.rstrip('/')}{args.path}?{urlencode({'profile': value})}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,17 @@
 import os
 from datetime import datetime
+from unittest.mock import patch
 
 import pytest
 from httpx import ASGITransport, AsyncClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, sessionmaker
 
-from app.core.security import get_password_hash
+from app.core.config import settings
+from app.core.login_throttle import login_throttle
+from app.core.revocation import revocation_filter
+from app.core.security import get_password_hash, token_cache
+from app.core.user_cache import user_cache
 from app.db.base import Base
 from app.db.session import get_db
 from app.models.user import User  # Explicitly import User model
@@ -19,7 +24,23 @@ engine = create_engine(
         "postgresql://user:password@db:5432/test_user_management_db",
     ),
 )
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    # Test transactions are rolled back, so cached users must not leak between tests.
+    user_cache.clear()
+    token_cache.clear()
+    login_throttle.clear()
+    revocation_filter.clear()
+    yield
+
+
+@pytest.fixture()
+def admin_headers():
+    with patch.object(settings, "ADMIN_API_KEY", "test-admin-key"):
+        yield {"X-Admin-Key": "test-admin-key"}
 
 
 @pytest.fixture(scope="session")
@@ -32,7 +53,9 @@ def db_engine():
 def test_db(db_engine):
     connection = db_engine.connect()
     transaction = connection.begin()
-    session = TestingSessionLocal(bind=connection)
+    # Session commits and rollbacks act on savepoints, so a rolled-back write
+    # (e.g. a rejected duplicate registration) keeps the test's earlier rows.
+    session = TestingSessionLocal(bind=connection, join_transaction_mode="create_savepoint")
 
     try:
         yield session
@@ -0,0 +1,66 @@
+"""factory-boy factories for user rows.
+
+`UserRowFactory` builds plain dicts with one value per ``users`` column, so
+the same definitions serve ORM tests (``User(**row)``) and bulk loads through
+COPY (see ``scripts/generate_users.py``). Traits select a lifecycle state:
+
+    UserRowFactory.build()                       # active
+    UserRowFactory.build(deactivated=True)
+    UserRowFactory.build(pending_deletion=True)  # deactivated, deletion requested
+    UserRowFactory.build(deleted=True)           # soft deleted by the purge
+
+Timestamps are relative to ``now``, the current UTC time unless given, as the
+purge compares ``deletion_requested_at`` with the real clock.
+"""
+import datetime
+import uuid
+
+import factory
+import factory.random
+
+from app.crud.crud_user import DELETION_GRACE_PERIOD
+
+# Every generated user shares one precomputed hash of "password123" (bcrypt,
+# 4 rounds); hashing per row would dominate any bulk load.
+PASSWORD = "password123"
+HASHED_PASSWORD = "$2b$04$bnZYgC530Roa4vnGkAtGmeKUdt6NUm50Klim8LoXByJIot9h080I."
+
+
+class UserRowFactory(factory.DictFactory):
+    id = factory.LazyFunction(uuid.uuid4)
+    username = factory.Sequence(lambda n: f"user{n:09d}")
+    email = factory.LazyAttribute(lambda o: f"{o.username}@example.com")
+    full_name = factory.Faker("name")
+    hashed_password = HASHED_PASSWORD
+    is_active = True
+    is_deleted = False
+    created_at = factory.LazyAttribute(
+        lambda o: o.now - datetime.timedelta(seconds=factory.random.randgen.uniform(0, 3 * 365 * 24 * 3600)),
+    )
+    updated_at = factory.LazyAttribute(
+        lambda o: o.created_at + datetime.timedelta(seconds=factory.random.randgen.randint(0, 90 * 24 * 3600)),
+    )
+    deleted_at = None
+    deletion_requested_at = None
+    token_version = 0
+
+    class Params:
+        now = factory.LazyFunction(datetime.datetime.utcnow)
+        deactivated = factory.Trait(is_active=False, token_version=1)
+        pending_deletion = factory.Trait(
+            is_active=False,
+            token_version=1,
+            # Some within the grace period, some already due for the purge.
+            deletion_requested_at=factory.LazyAttribute(
+                lambda o: o.now - datetime.timedelta(hours=factory.random.randgen.uniform(0, 48)),
+            ),
+        )
+        deleted = factory.Trait(
+            is_active=False,
+            is_deleted=True,
+            token_version=2,
+            deletion_requested_at=factory.LazyAttribute(
+                lambda o: o.created_at + (o.now - o.created_at) * factory.random.randgen.random(),
+            ),
+            deleted_at=factory.LazyAttribute(lambda o: o.deletion_requested_at + DELETION_GRACE_PERIOD),
+        )
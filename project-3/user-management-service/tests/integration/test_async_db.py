@@ -0,0 +1,82 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.schemas.user import PasswordUpdate, UserCreate, UserUpdate
+from app.services import user_service
+
+
+@pytest.fixture()
+async def async_db(db_engine):
+    engine = create_async_engine(settings.async_database_url, poolclass=NullPool)
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        session = AsyncSession(
+            bind=connection,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint",
+        )
+        try:
+            yield session
+        finally:
+            await session.close()
+            await transaction.rollback()
+    await engine.dispose()
+
+
+async def test_async_session_register_and_authenticate(async_db: AsyncSession):
+    user = UserCreate(email="async_user@example.com", username="async_user", password="AsyncPassword123")
+
+    created = await user_service.create_user_service_async(db=async_db, user=user)
+    assert created.id is not None
+    assert created.is_active is True
+
+    assert await user_service.authenticate_user_async(async_db, "async_user", "AsyncPassword123") is not None
+    assert await user_service.authenticate_user_async(async_db, "async_user", "WrongPassword") is None
+
+
+async def test_async_session_duplicate_username(async_db: AsyncSession):
+    user = UserCreate(email="async_dup@example.com", username="async_dup", password="AsyncPassword123")
+    await user_service.create_user_service_async(db=async_db, user=user)
+
+    duplicate = UserCreate(email="async_dup2@example.com", username="async_dup", password="AsyncPassword123")
+    with pytest.raises(user_service.DuplicateUsernameException):
+        await user_service.create_user_service_async(db=async_db, user=duplicate)
+
+
+async def test_async_session_profile_password_and_deletion(async_db: AsyncSession):
+    user = UserCreate(email="async_profile@example.com", username="async_profile", password="AsyncPassword123")
+    created = await user_service.create_user_service_async(db=async_db, user=user)
+
+    updated = await user_service.update_user_profile_async(async_db, created.id, UserUpdate(full_name="Async Name"))
+    assert updated.full_name == "Async Name"
+
+    await user_service.change_user_password_service_async(
+        async_db,
+        updated,
+        PasswordUpdate(current_password="AsyncPassword123", new_password="NewAsyncPassword456"),
+    )
+    assert await user_service.authenticate_user_async(async_db, "async_profile", "NewAsyncPassword456") is not None
+
+    await user_service.delete_user_account_async(async_db, updated, "NewAsyncPassword456")
+    assert created.is_active is False
+    assert created.deletion_requested_at is not None
+
+
+async def test_async_bulk_register_detects_case_variant_duplicates(async_db: AsyncSession):
+    await user_service.create_user_service_async(
+        db=async_db,
+        user=UserCreate(email="Async_Bulk@example.com", username="Async_Bulk", password="AsyncPassword123"),
+    )
+
+    response = await user_service.bulk_create_users_async(
+        async_db,
+        [
+            UserCreate(email="async_bulk@EXAMPLE.com", username="async_bulk_other", password="AsyncPassword123"),
+            UserCreate(email="async_bulk_other@example.com", username="ASYNC_BULK", password="AsyncPassword123"),
+        ],
+    )
+
+    assert [result.status for result in response.results] == ["duplicate_email", "duplicate_username"]
+    assert response.created == 0
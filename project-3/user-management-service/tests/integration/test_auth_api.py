@@ -136,6 +136,25 @@ async def test_login_for_access_token_success(client: AsyncClient, test_db: Sess
     assert isinstance(token_data["access_token"], str)
     assert len(token_data["access_token"]) > 0
 
+@pytest.mark.asyncio()
+async def test_login_and_register_ignore_username_case(client: AsyncClient, test_db: Session):
+    user_data = {
+        "email": "Case_Test@example.com",
+        "username": "Case_User",
+        "password": "CaseSecurePassword123",
+    }
+    await client.post("/api/v1/register", json=user_data)
+
+    response = await client.post("/api/v1/token", data={"username": "case_user", "password": user_data["password"]})
+    assert response.status_code == 200
+
+    response = await client.post(
+        "/api/v1/register",
+        json={**user_data, "email": "other@example.com", "username": "CASE_USER"},
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Username already registered"
+
 @pytest.mark.asyncio()
 async def test_login_for_access_token_incorrect_password(client: AsyncClient, test_db: Session):
     # First, register a user
@@ -0,0 +1,113 @@
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.orm import Session
+
+from app.core.security import verify_password
+from app.models.user import User
+
+
+def bulk_user(n: int, **overrides) -> dict:
+    return {
+        "email": f"bulk{n}@example.com",
+        "username": f"bulk_user_{n}",
+        "password": "BulkPassword123",
+        **overrides,
+    }
+
+
+@pytest.mark.asyncio()
+async def test_bulk_register_creates_users(client: AsyncClient, test_db: Session, admin_headers):
+    payload = {"users": [bulk_user(i) for i in range(5)]}
+
+    response = await client.post("/api/v1/users/bulk", json=payload, headers=admin_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 5
+    assert data["failed"] == 0
+    assert [result["index"] for result in data["results"]] == list(range(5))
+    assert all(result["status"] == "created" for result in data["results"])
+    assert data["results"][0]["user"]["username"] == "bulk_user_0"
+
+    user_in_db = test_db.query(User).filter(User.username == "bulk_user_3").first()
+    assert verify_password("BulkPassword123", user_in_db.hashed_password)
+
+
+@pytest.mark.asyncio()
+async def test_bulk_register_reports_partial_failures(
+    client: AsyncClient,
+    test_db: Session,
+    admin_headers,
+    create_test_user_and_token,
+):
+    payload = {
+        "users": [
+            bulk_user(1),
+            bulk_user(2, email="testuser@example.com"),  # taken by the fixture user
+            bulk_user(3, username="testuser"),  # taken by the fixture user
+            bulk_user(4, email="bulk1@example.com"),  # duplicates item 0
+            bulk_user(5),
+        ],
+    }
+
+    response = await client.post("/api/v1/users/bulk", json=payload, headers=admin_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 2
+    assert data["failed"] == 3
+    assert [result["status"] for result in data["results"]] == [
+        "created",
+        "duplicate_email",
+        "duplicate_username",
+        "duplicate_email",
+        "created",
+    ]
+    assert test_db.query(User).filter(User.username.in_(["bulk_user_1", "bulk_user_5"])).count() == 2
+
+
+@pytest.mark.asyncio()
+async def test_bulk_register_compares_emails_and_usernames_case_insensitively(
+    client: AsyncClient,
+    test_db: Session,
+    admin_headers,
+    create_test_user_and_token,
+):
+    gone = User(email="Gone@example.com", username="gone", hashed_password="x", is_deleted=True)
+    test_db.add(gone)
+    test_db.commit()
+    payload = {
+        "users": [
+            bulk_user(1, email="TestUser@Example.com"),  # taken by the fixture user
+            bulk_user(2, username="TESTUSER"),  # taken by the fixture user
+            bulk_user(3, email="Mixed@Example.com", username="Mixed_Case"),
+            bulk_user(4, email="mixed@example.com"),  # duplicates item 2
+            bulk_user(5, username="mixed_case"),  # duplicates item 2
+            bulk_user(6, email="Gone@example.com"),  # a deleted user's exact email stays unique
+            bulk_user(7, email="gone@example.com"),  # but other cases of it are free again
+        ],
+    }
+
+    response = await client.post("/api/v1/users/bulk", json=payload, headers=admin_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [result["status"] for result in data["results"]] == [
+        "duplicate_email",
+        "duplicate_username",
+        "created",
+        "duplicate_email",
+        "duplicate_username",
+        "duplicate_email",
+        "created",
+    ]
+    assert data["created"] == 2
+    assert test_db.query(User).filter(User.username.in_(["Mixed_Case", "bulk_user_7"])).count() == 2
+
+
+@pytest.mark.asyncio()
+async def test_bulk_register_requires_admin(client: AsyncClient):
+    response = await client.post("/api/v1/users/bulk", json={"users": [bulk_user(1)]})
+
+    assert response.status_code == 403
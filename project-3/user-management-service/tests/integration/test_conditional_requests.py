@@ -0,0 +1,69 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+
+
+@pytest.fixture()
+def auth_headers(create_test_user_and_token) -> dict:
+    _, token = create_test_user_and_token
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.mark.asyncio()
+async def test_read_returns_etag_and_honours_if_none_match(client: AsyncClient, test_db: Session, auth_headers):
+    response = await client.get("/api/v1/users/me", headers=auth_headers)
+    etag = response.headers["ETag"]
+    assert response.status_code == 200
+
+    response = await client.get("/api/v1/users/me", headers={**auth_headers, "If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+    await client.put("/api/v1/users/me", json={"full_name": "Changed"}, headers=auth_headers)
+    response = await client.get("/api/v1/users/me", headers={**auth_headers, "If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["full_name"] == "Changed"
+
+
+@pytest.mark.asyncio()
+async def test_update_with_current_if_match_applies(client: AsyncClient, test_db: Session, auth_headers):
+    etag = (await client.get("/api/v1/users/me", headers=auth_headers)).headers["ETag"]
+
+    response = await client.put(
+        "/api/v1/users/me", json={"full_name": "Matched"}, headers={**auth_headers, "If-Match": etag},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["full_name"] == "Matched"
+    assert response.headers["ETag"] != etag
+    # The returned tag describes the new state.
+    current = await client.get("/api/v1/users/me", headers={**auth_headers, "If-None-Match": response.headers["ETag"]})
+    assert current.status_code == 304
+
+
+@pytest.mark.asyncio()
+async def test_update_with_stale_if_match_is_rejected(client: AsyncClient, test_db: Session, auth_headers):
+    stale = (await client.get("/api/v1/users/me", headers=auth_headers)).headers["ETag"]
+    await client.put("/api/v1/users/me", json={"full_name": "Someone Else"}, headers=auth_headers)
+
+    response = await client.put(
+        "/api/v1/users/me", json={"full_name": "Lost Update"}, headers={**auth_headers, "If-Match": stale},
+    )
+
+    assert response.status_code == 412
+    assert test_db.query(User.full_name).filter(User.username == "testuser").scalar() == "Someone Else"
+
+
+@pytest.mark.asyncio()
+async def test_update_with_malformed_if_match_is_rejected(client: AsyncClient, test_db: Session, auth_headers):
+    response = await client.put(
+        "/api/v1/users/me", json={"full_name": "Nope"}, headers={**auth_headers, "If-Match": '"garbage"'},
+    )
+
+    assert response.status_code == 412
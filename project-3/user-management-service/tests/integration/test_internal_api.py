@@ -0,0 +1,72 @@
+import logging
+from unittest.mock import patch
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.db.instrumentation import instrument_engine
+from app.db.pool import threadpool_size
+from app.db.statement_stats import statement_stats
+
+
+@pytest.mark.asyncio()
+async def test_pool_metrics_requires_admin_key(client: AsyncClient, admin_headers):
+    response = await client.get("/api/v1/internal/pool", headers={"X-Admin-Key": "wrong"})
+    assert response.status_code == 403
+
+    response = await client.get("/api/v1/internal/pool")
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio()
+async def test_pool_metrics_disabled_without_configured_key(client: AsyncClient):
+    response = await client.get("/api/v1/internal/pool", headers={"X-Admin-Key": ""})
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio()
+async def test_pool_metrics_reports_pool_and_threadpool(client: AsyncClient, admin_headers):
+    response = await client.get("/api/v1/internal/pool", headers=admin_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["sync_pool"]["size"] == settings.DB_POOL_SIZE
+    assert data["sync_pool"]["max_overflow"] == settings.DB_MAX_OVERFLOW
+    assert {"checked_out", "overflow", "wait_seconds_max", "timeouts"} <= data["sync_pool"].keys()
+    assert data["threadpool"]["configured_size"] == threadpool_size()
+
+
+def test_threadpool_size_follows_pool_capacity():
+    with patch.object(settings, "THREADPOOL_MAX_WORKERS", None), \
+         patch.object(settings, "DB_POOL_SIZE", 7), \
+         patch.object(settings, "DB_MAX_OVERFLOW", 3):
+        assert threadpool_size() == 10
+
+    with patch.object(settings, "THREADPOOL_MAX_WORKERS", 4):
+        assert threadpool_size() == 4
+
+
+@pytest.mark.asyncio()
+async def test_statement_stats_report_crud_queries_and_slow_routes(
+    client: AsyncClient, db_engine, create_test_user_and_token, admin_headers, caplog,
+):
+    _, token = create_test_user_and_token
+    # The test sessions use their own engine, not app.db.session's.
+    instrument_engine(db_engine)
+    assert (await client.delete("/api/v1/internal/statements", headers=admin_headers)).status_code == 204
+
+    with patch.object(statement_stats, "slow_query_ms", 0), caplog.at_level(logging.WARNING):
+        await client.put("/api/v1/users/me", json={"full_name": "Stats"}, headers={"Authorization": f"Bearer {token}"})
+
+    response = await client.get("/api/v1/internal/statements?order_by=calls&limit=50", headers=admin_headers)
+    assert response.status_code == 200
+    data = response.json()
+    updates = [statement for statement in data["statements"] if statement["query"].startswith("UPDATE users SET")]
+    assert updates
+    assert updates[0]["calls"] == 1
+    assert updates[0]["rows"] == 1
+    assert any(getattr(record, "route", None) == "/api/v1/users/me" for record in caplog.records)
+
+    response = await client.get("/api/v1/internal/statements?order_by=bogus", headers=admin_headers)
+    assert response.status_code == 422
@@ -0,0 +1,117 @@
+from unittest.mock import patch
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.hashing import password_hasher
+from app.core.login_throttle import PostgresRateLimitBackend, login_throttle
+from app.models.login_throttle import LoginThrottleBucket
+
+USERNAME_BURST = int(login_throttle.limits["username"][0])
+
+
+@pytest.mark.asyncio()
+async def test_login_is_throttled_per_username_before_verifying(
+    client: AsyncClient, test_db: Session, create_test_user_and_token, mocker,
+):
+    # The fixture's own login already took one token.
+    for _ in range(USERNAME_BURST - 1):
+        response = await client.post("/api/v1/token", data={"username": "testuser", "password": "wrong"})
+        assert response.status_code == 401
+    verify = mocker.spy(password_hasher, "verify_async")
+
+    response = await client.post("/api/v1/token", data={"username": "TestUser", "password": "testpassword"})
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    verify.assert_not_called()
+
+
+@pytest.fixture()
+def small_ip_bucket():
+    with patch.dict(login_throttle.limits, {"ip": (2.0, 1 / 60)}):
+        yield
+
+
+@pytest.mark.asyncio()
+async def test_ip_throttle_uses_the_address_from_trusted_proxies(client: AsyncClient, test_db: Session, small_ip_bucket):
+    async def login(forwarded_for: str) -> int:
+        response = await client.post(
+            "/api/v1/token",
+            data={"username": f"user_{forwarded_for.replace(',', '_')}", "password": "wrong"},
+            headers={"X-Forwarded-For": forwarded_for},
+        )
+        return response.status_code
+
+    with patch.object(settings, "TRUSTED_PROXY_HOPS", 1):
+        assert [await login("203.0.113.1") for _ in range(3)] == [401, 401, 429]
+        # Another client behind the same proxy has a bucket of its own.
+        assert await login("203.0.113.2") == 401
+        # Addresses left of the trusted hop are the client's to forge.
+        assert await login("198.51.100.7, 203.0.113.1") == 429
+
+
+@pytest.mark.asyncio()
+async def test_ip_throttle_ignores_forwarded_for_without_trusted_proxies(
+    client: AsyncClient, test_db: Session, small_ip_bucket,
+):
+    statuses = [
+        (await client.post(
+            "/api/v1/token",
+            data={"username": f"user_{n}", "password": "wrong"},
+            headers={"X-Forwarded-For": f"203.0.113.{n}"},
+        )).status_code
+        for n in range(3)
+    ]
+
+    assert statuses == [401, 401, 429]
+
+
+@pytest.mark.asyncio()
+async def test_login_throttle_metrics(client: AsyncClient, test_db: Session, admin_headers):
+    for _ in range(USERNAME_BURST + 2):
+        await client.post("/api/v1/token", data={"username": "nobody", "password": "wrong"})
+
+    response = await client.get("/api/v1/internal/login-throttle", headers=admin_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["backend"] == "MemoryRateLimitBackend"
+    assert data["allowed"] == USERNAME_BURST
+    assert data["rejected_username"] == 2
+    assert data["verifications_avoided"] == 2
+
+
+@pytest.fixture()
+def postgres_backend(db_engine):
+    yield PostgresRateLimitBackend(db_engine)
+    with db_engine.begin() as connection:
+        connection.execute(delete(LoginThrottleBucket))
+
+
+def test_postgres_backend_shares_one_bucket_per_key(db_engine, postgres_backend):
+    other_replica = PostgresRateLimitBackend(db_engine)
+
+    assert postgres_backend.take("username:shared", 2, 1 / 60) == 0.0
+    assert other_replica.take("username:shared", 2, 1 / 60) == 0.0
+    retry_after = postgres_backend.take("username:shared", 2, 1 / 60)
+
+    assert 0 < retry_after <= 60
+    with db_engine.connect() as connection:
+        bucket = connection.execute(select(LoginThrottleBucket)).one()
+    assert bucket.key == "username:shared"
+    assert bucket.allowed is False
+
+
+def test_postgres_backend_prunes_idle_buckets(db_engine, postgres_backend):
+    postgres_backend.take("ip:10.0.0.1", 5, 1.0)
+    with db_engine.begin() as connection:
+        connection.execute(LoginThrottleBucket.__table__.update().values(updated_at=LoginThrottleBucket.updated_at - 60))
+
+    postgres_backend.prune(max_idle_seconds=30)
+
+    with db_engine.connect() as connection:
+        assert connection.execute(select(LoginThrottleBucket)).all() == []
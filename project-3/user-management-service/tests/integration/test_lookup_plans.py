@@ -0,0 +1,43 @@
+import pytest
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.crud.crud_user import credentials_statement
+from app.models.user import User
+
+
+def explain(db: Session, stmt) -> str:
+    sql = stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    # The test table is tiny, so rule out the scans the planner would otherwise prefer.
+    db.execute(text("SET LOCAL enable_seqscan = off"))
+    db.execute(text("SET LOCAL enable_bitmapscan = off"))
+    return "\n".join(db.execute(text(f"EXPLAIN {sql}")).scalars())
+
+
+def test_login_lookup_is_an_index_only_scan(test_db: Session):
+    plan = explain(test_db, credentials_statement("SomeUser"))
+
+    assert "Index Only Scan using ix_users_lower_username_live" in plan
+
+
+@pytest.mark.parametrize(
+    ("stmt", "index"),
+    [
+        (
+            select(User).where(func.lower(User.username) == func.lower("SomeUser"), User.is_deleted == False),
+            "ix_users_lower_username_live",
+        ),
+        (
+            select(User).where(
+                func.lower(User.email) == func.lower("Some@Example.com"),
+                User.is_active == True,
+                User.is_deleted == False,
+            ),
+            "ix_users_lower_email_live",
+        ),
+    ],
+    ids=["username", "email"],
+)
+def test_profile_lookups_use_partial_lower_indexes(test_db: Session, stmt, index):
+    assert f"Index Scan using {index}" in explain(test_db, stmt)
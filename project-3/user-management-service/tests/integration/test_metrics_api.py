@@ -0,0 +1,112 @@
+import logging
+from unittest.mock import patch
+
+import pytest
+from httpx import AsyncClient
+from starlette.middleware import Middleware
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+
+from app.core.config import settings
+from app.core.metrics import DB_STATEMENT_DURATION, HTTP_REQUEST_DURATION
+from app.db.instrumentation import instrument_engine
+from app.db.statement_stats import statement_stats
+from app.middleware.metrics import MetricsMiddleware
+from main import app
+
+
+@pytest.fixture()
+def instrumented_engine(db_engine):
+    # The test sessions use their own engine, not app.db.session's.
+    instrument_engine(db_engine)
+    return db_engine
+
+
+async def scrape(client: AsyncClient) -> dict[str, float]:
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = {}
+    for line in response.text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def delta(before: dict, after: dict, name: str) -> float:
+    return after.get(name, 0.0) - before.get(name, 0.0)
+
+
+@pytest.mark.asyncio()
+async def test_metrics_cover_routes_database_hashing_and_jwt(
+    client: AsyncClient, instrumented_engine, create_test_user_and_token,
+):
+    _, token = create_test_user_and_token
+    before = await scrape(client)
+
+    await client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {token}"})
+    await client.get("/api/v1/users/me", headers={"Authorization": "Bearer not-a-jwt"})
+    await client.post("/api/v1/token", data={"username": "testuser", "password": "wrong"})
+    after = await scrape(client)
+
+    me = 'route="/api/v1/users/me"'
+    assert delta(before, after, f'http_request_duration_seconds_count{{method="GET",{me},status="200"}}') == 1
+    assert delta(before, after, f'http_request_duration_seconds_count{{method="GET",{me},status="401"}}') == 1
+    assert after[f'http_requests_in_progress{{method="GET",{me}}}'] == 0
+    assert after['http_requests_in_progress{method="GET",route="/metrics"}'] == 1
+    assert delta(before, after, f"db_statements_per_request_count{{{me}}}") == 2
+    assert delta(before, after, f"db_statements_per_request_sum{{{me}}}") >= 1
+    assert delta(before, after, 'db_statement_duration_seconds_count{operation="SELECT"}') >= 2
+    assert delta(before, after, 'password_hash_duration_seconds_count{operation="verify"}') == 1
+    assert delta(before, after, 'jwt_decode_failures_total{reason="invalid"}') == 1
+
+
+@pytest.mark.asyncio()
+async def test_unknown_paths_share_one_route_label(client: AsyncClient):
+    await client.get("/no/such/path/1")
+    await client.get("/no/such/path/2")
+
+    samples = await scrape(client)
+
+    assert samples['http_request_duration_seconds_count{method="GET",route="unmatched",status="404"}'] >= 2
+    assert not any("/no/such" in name for name in samples)
+
+
+def test_failed_statements_do_not_leave_timings_on_the_connection(test_db, instrumented_engine):
+    with pytest.raises(ProgrammingError):
+        test_db.execute(text("SELECT * FROM no_such_table"))
+
+    assert not test_db.connection().info["statement_started"]
+
+
+@pytest.fixture()
+def metrics_disabled():
+    user_middleware = list(app.user_middleware)
+    app.user_middleware[:] = [
+        Middleware(MetricsMiddleware, record_metrics=False) if middleware.cls is MetricsMiddleware else middleware
+        for middleware in user_middleware
+    ]
+    app.middleware_stack = None
+    with patch.object(settings, "METRICS_ENABLED", False):
+        yield
+    app.user_middleware[:] = user_middleware
+    app.middleware_stack = None
+
+
+@pytest.mark.asyncio()
+async def test_slow_queries_name_their_route_with_metrics_disabled(
+    client: AsyncClient, instrumented_engine, create_test_user_and_token, metrics_disabled, caplog,
+):
+    _, token = create_test_user_and_token
+    selects = DB_STATEMENT_DURATION.labels("SELECT").values()[-1]
+    me = HTTP_REQUEST_DURATION.labels("GET", "/api/v1/users/me", "200")
+    requests = me.values()[-1]
+
+    with patch.object(statement_stats, "slow_query_ms", 0), caplog.at_level(logging.WARNING):
+        response = await client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+    assert any(getattr(record, "route", None) == "/api/v1/users/me" for record in caplog.records)
+    assert DB_STATEMENT_DURATION.labels("SELECT").values()[-1] == selects
+    assert me.values()[-1] == requests
@@ -0,0 +1,78 @@
+from unittest.mock import patch
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.orm import Session
+
+from app.core import security
+from app.core.config import settings
+from app.models.user import User
+
+
+@pytest.fixture()
+def legacy_user(test_db: Session) -> User:
+    # Hashed at a lower cost than the configured one, as if BCRYPT_ROUNDS had since been raised.
+    user = User(
+        email="legacy@example.com",
+        username="legacy_user",
+        hashed_password=security.build_password_context(bcrypt_rounds=4).hash("LegacyPassword123"),
+    )
+    test_db.add(user)
+    test_db.commit()
+    return user
+
+
+@pytest.fixture()
+def task_sessions(test_db: Session) -> list[Session]:
+    # Background tasks open their own sessions; join them to the test's transaction.
+    sessions = []
+
+    def session_factory() -> Session:
+        session = Session(bind=test_db.connection(), join_transaction_mode="create_savepoint")
+        sessions.append(session)
+        return session
+
+    with patch("app.services.user_service.SessionLocal", session_factory):
+        yield sessions
+
+
+@pytest.mark.asyncio()
+async def test_login_upgrades_outdated_hash_after_response(
+    client: AsyncClient, test_db: Session, legacy_user, task_sessions,
+):
+    old_hash, old_updated_at = legacy_user.hashed_password, legacy_user.updated_at
+
+    response = await client.post("/api/v1/token", data={"username": "legacy_user", "password": "LegacyPassword123"})
+
+    assert response.status_code == 200
+    assert len(task_sessions) == 1
+    test_db.refresh(legacy_user)
+    assert legacy_user.hashed_password != old_hash
+    assert not security.password_needs_rehash(legacy_user.hashed_password)
+    assert security.verify_password("LegacyPassword123", legacy_user.hashed_password)
+    assert legacy_user.updated_at == old_updated_at
+
+
+@pytest.mark.asyncio()
+async def test_login_rehash_can_be_disabled(client: AsyncClient, test_db: Session, legacy_user):
+    old_hash = legacy_user.hashed_password
+
+    with patch.object(settings, "PASSWORD_REHASH_ON_LOGIN", False):
+        response = await client.post(
+            "/api/v1/token", data={"username": "legacy_user", "password": "LegacyPassword123"},
+        )
+
+    assert response.status_code == 200
+    test_db.refresh(legacy_user)
+    assert legacy_user.hashed_password == old_hash
+
+
+@pytest.mark.asyncio()
+async def test_failed_login_never_rehashes(client: AsyncClient, test_db: Session, legacy_user):
+    old_hash = legacy_user.hashed_password
+
+    response = await client.post("/api/v1/token", data={"username": "legacy_user", "password": "WrongPassword"})
+
+    assert response.status_code == 401
+    test_db.refresh(legacy_user)
+    assert legacy_user.hashed_password == old_hash
@@ -0,0 +1,84 @@
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from httpx import AsyncClient
+
+from app.core import profiling
+from app.core.config import settings
+from app.core.profiling import ProfileStore, sign_profile_request
+from app.middleware.profiling import ProfilingMiddleware
+from main import app
+
+
+@pytest.fixture()
+def store(tmp_path):
+    user_middleware = list(app.user_middleware)
+    app.middleware_stack = None
+    app.add_middleware(ProfilingMiddleware)
+    store = ProfileStore(str(tmp_path))
+    with patch.object(settings, "ADMIN_API_KEY", "test-admin-key"), \
+            patch("app.middleware.profiling.profile_store", store), \
+            patch("app.api.v1.endpoints.internal.profile_store", store):
+        yield store
+    app.user_middleware[:] = user_middleware
+    app.middleware_stack = None
+
+
+@pytest.mark.asyncio()
+async def test_admin_header_profiles_the_request(client: AsyncClient, store, create_test_user_and_token):
+    _, token = create_test_user_and_token
+    response = await client.get(
+        "/api/v1/users/me",
+        headers={"Authorization": f"Bearer {token}", "X-Profile": "cpu", "X-Admin-Key": "test-admin-key"},
+    )
+
+    assert response.status_code == 200
+    name = response.headers["X-Profile"]
+    assert "-get-api_v1_users_me-" in name
+    assert name.endswith(".speedscope.json")
+    assert [artifact["name"] for artifact in store.artifacts()] == [name]
+
+    download = await client.get(f"/api/v1/internal/profiles/{name}", headers={"X-Admin-Key": "test-admin-key"})
+    assert download.status_code == 200
+    document = download.json()
+    assert document["$schema"] == profiling.SPEEDSCOPE_SCHEMA
+    assert document["name"] == "GET /api/v1/users/me (/api/v1/users/me)"
+    assert document["profiles"]
+
+
+@pytest.mark.asyncio()
+async def test_requests_without_a_valid_admin_key_are_not_profiled(client: AsyncClient, store):
+    for headers in ({"X-Profile": "cpu"}, {"X-Profile": "cpu", "X-Admin-Key": "wrong"}, {}):
+        response = await client.get("/api/v1/users/me", headers=headers)
+        assert "X-Profile" not in response.headers
+
+    assert store.artifacts() == []
+
+
+@pytest.mark.asyncio()
+async def test_signed_query_flag_profiles_memory(client: AsyncClient, store):
+    value = sign_profile_request("GET", "/api/v1/users/me", mode="memory")
+
+    response = await client.get("/api/v1/users/me", params={"profile": value})
+    other_path = await client.get("/api/v1/users", params={"profile": value})
+
+    assert response.status_code == 401
+    assert "X-Profile" not in other_path.headers
+    base = response.headers["X-Profile"].removesuffix(".speedscope.json")
+    memory = json.loads(Path(store.path(f"{base}.memory.json")).read_text())
+    assert memory["peak_bytes"] > 0
+    assert memory["top"]
+
+
+@pytest.mark.asyncio()
+async def test_profile_listing_and_downloads_require_admin(client: AsyncClient, store):
+    listing = await client.get("/api/v1/internal/profiles", headers={"X-Admin-Key": "test-admin-key"})
+    assert listing.json() == {"profiles": []}
+
+    missing = await client.get(
+        "/api/v1/internal/profiles/nope.speedscope.json", headers={"X-Admin-Key": "test-admin-key"},
+    )
+    assert missing.status_code == 404
+    assert (await client.get("/api/v1/internal/profiles")).status_code == 403
@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, func, insert, select
+
+from app.crud.crud_user import purge_batch_statement
+from app.models.user import User
+from app.services.purge_worker import PURGE_LOCK_KEY, PurgeWorker
+
+
+@pytest.fixture()
+def pending_deletions(db_engine):
+    # The worker purges over its own connection, so rows must be committed.
+    now = datetime.utcnow()
+    rows = [
+        {
+            "email": f"purge{n}@example.com",
+            "username": f"purge_user_{n}",
+            "hashed_password": "hash",
+            "is_active": False,
+            "deletion_requested_at": now - timedelta(hours=25 if n < 5 else 1),
+        }
+        for n in range(6)
+    ]
+    with db_engine.begin() as connection:
+        connection.execute(insert(User), rows)
+    yield rows
+    with db_engine.begin() as connection:
+        connection.execute(delete(User).where(User.email.like("purge%")))
+
+
+@pytest.fixture()
+def purge_candidates(db_engine):
+    now = datetime.utcnow()
+    candidates = {
+        "due_1": {"is_active": False, "hours_ago": 25},
+        "due_2": {"is_active": False, "hours_ago": 48},
+        "due_locked": {"is_active": False, "hours_ago": 25},
+        "in_grace_period": {"is_active": False, "hours_ago": 23},
+        "reactivated": {"is_active": True, "hours_ago": 25},
+        "already_deleted": {"is_active": False, "hours_ago": 25, "is_deleted": True},
+        "not_requested": {"is_active": False, "hours_ago": None},
+    }
+    rows = [
+        {
+            "email": f"purge_{name}@example.com",
+            "username": f"purge_{name}",
+            "hashed_password": "hash",
+            "is_active": candidate["is_active"],
+            "is_deleted": candidate.get("is_deleted", False),
+            "deletion_requested_at": (
+                now - timedelta(hours=candidate["hours_ago"]) if candidate["hours_ago"] is not None else None
+            ),
+        }
+        for name, candidate in candidates.items()
+    ]
+    with db_engine.begin() as connection:
+        connection.execute(insert(User), rows)
+    yield now
+    with db_engine.begin() as connection:
+        connection.execute(delete(User).where(User.email.like("purge%")))
+
+
+def test_purge_batch_claims_due_rows_and_skips_locked_ones(db_engine, purge_candidates):
+    with db_engine.connect() as holder, db_engine.connect() as purger:
+        # Another transaction, e.g. a concurrent purge batch, holds one due row.
+        holder.execute(select(User.id).where(User.username == "purge_due_locked").with_for_update())
+
+        with purger.begin():
+            claimed = purger.execute(purge_batch_statement(100, purge_candidates)).all()
+        holder.rollback()
+
+    assert sorted(row.username for row in claimed) == ["purge_due_1", "purge_due_2"]
+    with db_engine.connect() as connection:
+        deleted = dict(
+            connection.execute(
+                select(User.username, User.deleted_at).where(User.email.like("purge%"), User.is_deleted == True),
+            ).all(),
+        )
+    assert deleted == {
+        "purge_already_deleted": None,
+        "purge_due_1": purge_candidates,
+        "purge_due_2": purge_candidates,
+    }
+
+
+def test_purge_batch_claims_at_most_batch_size_rows(db_engine, purge_candidates):
+    with db_engine.begin() as connection:
+        first = connection.execute(purge_batch_statement(2, purge_candidates)).all()
+        second = connection.execute(purge_batch_statement(2, purge_candidates)).all()
+
+    assert len(first) == 2
+    assert sorted(row.username for row in first + second) == ["purge_due_1", "purge_due_2", "purge_due_locked"]
+
+
+def test_run_once_purges_in_batches_and_records_metrics(db_engine, pending_deletions):
+    worker = PurgeWorker(db_engine, interval=60, batch_size=2)
+
+    assert worker.run_once() == 5
+
+    with db_engine.connect() as connection:
+        deleted = connection.execute(
+            select(User.username).where(User.email.like("purge%"), User.is_deleted == True),
+        ).scalars().all()
+    assert sorted(deleted) == [f"purge_user_{n}" for n in range(5)]
+    stats = worker.stats()
+    assert stats["runs"] == 1
+    assert stats["rows_purged_total"] == 5
+    assert stats["last_run_rows"] == 5
+
+    assert worker.run_once() == 0
+
+
+def test_run_once_skips_while_another_replica_holds_the_lock(db_engine, pending_deletions):
+    worker = PurgeWorker(db_engine, interval=60, batch_size=2)
+
+    with db_engine.connect() as leader:
+        assert leader.scalar(select(func.pg_try_advisory_lock(PURGE_LOCK_KEY)))
+        try:
+            assert worker.run_once() is None
+        finally:
+            leader.execute(select(func.pg_advisory_unlock(PURGE_LOCK_KEY)))
+
+    assert worker.stats()["runs_skipped_not_leader"] == 1
+    assert worker.run_once() == 5
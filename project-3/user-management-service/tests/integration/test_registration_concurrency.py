@@ -0,0 +1,90 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import delete, event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.models.user import User
+from app.schemas.user import UserCreate
+from app.services.user_service import DuplicateEmailException, DuplicateUsernameException, create_user_service
+
+WORKERS = 12  # within the test engine's default pool capacity of 15
+
+
+@pytest.fixture()
+def committing_session(db_engine, mocker):
+    # Registrations race on separate connections, so they must really commit.
+    mocker.patch("app.services.user_service.get_password_hash", return_value="hashed_password")
+    yield sessionmaker(bind=db_engine, expire_on_commit=False)
+    with db_engine.begin() as connection:
+        connection.execute(delete(User).where(User.email.ilike("racer%")))
+
+
+def race(session_factory, users: list[UserCreate]) -> list[object]:
+    barrier = threading.Barrier(len(users))
+
+    def register(user: UserCreate):
+        with session_factory() as db:
+            barrier.wait()
+            try:
+                return create_user_service(db, user)
+            except (DuplicateEmailException, DuplicateUsernameException) as exc:
+                return exc
+
+    with ThreadPoolExecutor(max_workers=len(users)) as executor:
+        return list(executor.map(register, users))
+
+
+@pytest.mark.parametrize(
+    ("make_user", "exception", "column"),
+    [
+        (
+            lambda n: UserCreate(email=f"racer{n}@example.com", username="Racer", password="password123"),
+            DuplicateUsernameException,
+            User.username,
+        ),
+        (
+            lambda n: UserCreate(email="racer@example.com", username=f"racer_{n}", password="password123"),
+            DuplicateEmailException,
+            User.email,
+        ),
+    ],
+    ids=["same-username", "same-email"],
+)
+def test_parallel_duplicate_registrations_create_exactly_one_user(
+    db_engine, committing_session, make_user, exception, column,
+):
+    # Mixed case proves the case-insensitive unique indexes decide the race.
+    users = [make_user(n) for n in range(WORKERS)]
+    users[1::2] = [user.model_copy(update={column.key: getattr(user, column.key).upper()}) for user in users[1::2]]
+
+    results = race(committing_session, users)
+
+    assert sum(isinstance(result, User) for result in results) == 1
+    assert sum(isinstance(result, exception) for result in results) == WORKERS - 1
+    with db_engine.connect() as connection:
+        assert connection.scalar(select(func.count()).where(User.email.ilike("racer%"))) == 1
+
+
+def test_registration_is_a_single_insert(db_engine, committing_session):
+    # Registration latency is dominated by database round trips, so counting the
+    # statements it sends measures the saving without a timing-dependent assert.
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split()[0])
+
+    event.listen(db_engine, "before_cursor_execute", record)
+    try:
+        with committing_session() as db:
+            user = create_user_service(
+                db, UserCreate(email="racer@example.com", username="racer", password="password123"),
+            )
+    finally:
+        event.remove(db_engine, "before_cursor_execute", record)
+
+    assert statements == ["INSERT"]
+    # The response is hydrated from RETURNING without another round trip.
+    assert user.created_at is not None
+    assert user.is_active is True
@@ -0,0 +1,96 @@
+from unittest.mock import patch
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core import security
+from app.core.config import settings
+from app.core.user_cache import user_cache
+
+
+@pytest.fixture()
+def stateless_auth():
+    with patch.object(settings, "STATELESS_AUTH", True):
+        yield
+
+
+def bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.mark.asyncio()
+async def test_tokens_carry_identity_claims(client: AsyncClient, test_db: Session, create_test_user_and_token):
+    user_id, token = create_test_user_and_token
+
+    claims = security.decode_access_token(token)
+
+    assert claims["uid"] == str(user_id)
+    assert claims["active"] is True
+    assert claims["ver"] == 0
+
+
+@pytest.mark.asyncio()
+@pytest.mark.parametrize("stateless", [False, True], ids=["stateful", "stateless"])
+async def test_password_change_invalidates_existing_tokens(
+    client: AsyncClient, test_db: Session, create_test_user_and_token, stateless,
+):
+    _, token = create_test_user_and_token
+    response = await client.put(
+        "/api/v1/users/me/password",
+        json={"current_password": "testpassword", "new_password": "NewPassword123"},
+        headers=bearer(token),
+    )
+    assert response.status_code == 204
+
+    with patch.object(settings, "STATELESS_AUTH", stateless):
+        assert (await client.get("/api/v1/users/me", headers=bearer(token))).status_code == 401
+        assert (await client.put("/api/v1/users/me", json={"full_name": "X"}, headers=bearer(token))).status_code == 401
+
+    login = await client.post("/api/v1/token", data={"username": "testuser", "password": "NewPassword123"})
+    assert security.decode_access_token(login.json()["access_token"])["ver"] == 1
+    assert (await client.get("/api/v1/users/me", headers=bearer(login.json()["access_token"]))).status_code == 200
+
+
+@pytest.mark.asyncio()
+async def test_stateless_identity_needs_no_query_once_the_version_is_cached(
+    client: AsyncClient, test_db: Session, db_engine, create_test_user_and_token, stateless_auth,
+):
+    user_id, token = create_test_user_and_token
+    login = await client.post("/api/v1/token", data={"username": "testuser", "password": "testpassword"})
+    headers = bearer(login.json()["access_token"])
+    # Authorizing the first logout looks the version up and caches it, but never loads the user.
+    await client.post("/api/v1/logout", headers=bearer(token))
+    assert user_cache.get_by_id(user_id) is None
+    assert user_cache.get_token_version(user_id) == 0
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db_engine, "before_cursor_execute", record)
+    try:
+        response = await client.post("/api/v1/logout", headers=headers)
+    finally:
+        event.remove(db_engine, "before_cursor_execute", record)
+
+    assert response.status_code == 204
+    # Only the revocation itself; the caller was authorized from the token.
+    assert [statement.split()[0] for statement in statements if "SAVEPOINT" not in statement] == ["INSERT"]
+
+
+@pytest.mark.asyncio()
+async def test_stateless_auth_rejects_tokens_of_deactivated_users(
+    client: AsyncClient, test_db: Session, create_test_user_and_token, stateless_auth,
+):
+    _, token = create_test_user_and_token
+    await client.put("/api/v1/users/me", json={"full_name": "Before"}, headers=bearer(token))
+
+    response = await client.request(
+        "DELETE", "/api/v1/users/me", json={"current_password": "testpassword"}, headers=bearer(token),
+    )
+    assert response.status_code == 204
+
+    response = await client.put("/api/v1/users/me", json={"full_name": "After"}, headers=bearer(token))
+    assert response.status_code == 401
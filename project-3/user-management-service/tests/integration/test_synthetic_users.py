@@ -0,0 +1,65 @@
+import math
+import uuid
+from collections import Counter
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from app.crud.crud_user import DELETION_GRACE_PERIOD
+from app.models.user import User
+from scripts.check_query_plans import CHECKS, check_plans
+from scripts.generate_users import delete, generate
+from tests.factories import UserRowFactory
+
+
+@pytest.fixture
+def database_url(db_engine):
+    return db_engine.url.render_as_string(hide_password=False)
+
+
+def test_generator_loads_a_mix_of_lifecycle_states(db_engine, database_url):
+    prefix = f"gen_{uuid.uuid4().hex[:8]}_"
+    try:
+        assert generate(database_url, 1000, prefix, seed=1, chunk_size=300) == 1000
+
+        with db_engine.connect() as connection:
+            users = connection.execute(select(User).where(User.username.startswith(prefix))).all()
+    finally:
+        assert delete(database_url, prefix) == 1000
+
+    assert len({user.username for user in users}) == 1000
+    states = Counter(
+        "deleted" if user.is_deleted
+        else "pending_deletion" if user.deletion_requested_at is not None
+        else "deactivated" if not user.is_active
+        else "active"
+        for user in users
+    )
+    assert set(states) == {"active", "deactivated", "pending_deletion", "deleted"}
+    assert 750 < states["active"] < 950
+    assert all(user.deleted_at > user.deletion_requested_at for user in users if user.is_deleted)
+    # Pending deletions straddle the grace period, so the purge has both work and rows to leave.
+    due = datetime.utcnow() - DELETION_GRACE_PERIOD
+    pending = [user for user in users if not user.is_deleted and user.deletion_requested_at is not None]
+    assert {user.deletion_requested_at <= due for user in pending} == {True, False}
+
+
+def test_crud_user_queries_have_index_plans(test_db: Session):
+    users = [User(**UserRowFactory.build()) for _ in range(5)]
+    users += [User(**UserRowFactory.build(pending_deletion=True)) for _ in range(2)]
+    test_db.add_all(users)
+    test_db.flush()
+    connection = test_db.connection()
+    # The test table is tiny, so rule out the scans the planner would otherwise prefer.
+    connection.execute(text("SET LOCAL enable_seqscan = off"))
+    sample = {
+        column: getattr(users[0], column)
+        for column in ("id", "email", "username", "hashed_password", "created_at", "updated_at")
+    }
+
+    results = check_plans(connection, sample, max_buffers=math.inf, max_ms=math.inf)
+
+    assert {result.check: result.violations for result in results if result.violations} == {}
+    assert {result.check for result in results} == {check.name for check in CHECKS}
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import delete, event, select
+from sqlalchemy.orm import Session
+
+from app.core.revocation import TokenRevocationFilter, revocation_filter
+from app.models.revoked_token import RevokedToken
+
+
+async def login(client: AsyncClient) -> dict:
+    response = await client.post("/api/v1/token", data={"username": "testuser", "password": "testpassword"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.mark.asyncio()
+async def test_logout_revokes_only_the_presented_token(client: AsyncClient, test_db: Session, create_test_user_and_token):
+    _, token = create_test_user_and_token
+    headers = {"Authorization": f"Bearer {token}"}
+    other_headers = await login(client)
+
+    response = await client.post("/api/v1/logout", headers=headers)
+
+    assert response.status_code == 204
+    assert (await client.get("/api/v1/users/me", headers=headers)).status_code == 401
+    assert (await client.get("/api/v1/users/me", headers=other_headers)).status_code == 200
+    assert test_db.scalar(select(RevokedToken.expires_at)) > datetime.utcnow()
+
+
+@pytest.mark.asyncio()
+async def test_unrevoked_tokens_are_checked_without_a_query(
+    client: AsyncClient, test_db: Session, db_engine, create_test_user_and_token, admin_headers,
+):
+    _, token = create_test_user_and_token
+    headers = {"Authorization": f"Bearer {token}"}
+    await client.get("/api/v1/users/me", headers=headers)  # warm the user cache
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db_engine, "before_cursor_execute", record)
+    try:
+        response = await client.get("/api/v1/users/me", headers=headers)
+    finally:
+        event.remove(db_engine, "before_cursor_execute", record)
+
+    assert response.status_code == 200
+    assert statements == []
+    stats = (await client.get("/api/v1/internal/revocations", headers=admin_headers)).json()
+    assert stats["checks"] == 2
+    assert stats["answered_in_memory"] == 2
+
+
+@pytest.fixture()
+def revocation_rows(db_engine):
+    now = datetime.utcnow()
+    with db_engine.begin() as connection:
+        connection.execute(
+            RevokedToken.__table__.insert(),
+            [
+                {"jti": "live-1", "expires_at": now + timedelta(minutes=30)},
+                {"jti": "live-2", "expires_at": now + timedelta(minutes=30)},
+                {"jti": "expired", "expires_at": now - timedelta(minutes=1)},
+            ],
+        )
+    yield
+    with db_engine.begin() as connection:
+        connection.execute(delete(RevokedToken))
+
+
+def make_filter(db_engine) -> TokenRevocationFilter:
+    return TokenRevocationFilter(db_engine, capacity=100, error_rate=0.001, refresh_interval=5, rebuild_interval=300)
+
+
+def test_cold_filter_treats_every_token_as_a_possible_match(db_engine):
+    assert make_filter(db_engine).might_be_revoked("anything") is True
+
+
+def test_rebuild_loads_live_revocations_and_deletes_expired_rows(db_engine, revocation_rows):
+    bloom = make_filter(db_engine)
+
+    bloom.rebuild()
+
+    assert bloom.might_be_revoked("live-1") and bloom.might_be_revoked("live-2")
+    assert not bloom.might_be_revoked("never-revoked")
+    with db_engine.connect() as connection:
+        assert set(connection.scalars(select(RevokedToken.jti))) == {"live-1", "live-2"}
+
+
+def test_refresh_picks_up_revocations_from_other_workers(db_engine, revocation_rows):
+    bloom = make_filter(db_engine)
+    bloom.refresh()  # first refresh is a full rebuild
+    with db_engine.begin() as connection:
+        connection.execute(
+            RevokedToken.__table__.insert(),
+            {"jti": "revoked-elsewhere", "expires_at": datetime.utcnow() + timedelta(minutes=30)},
+        )
+
+    bloom.refresh()
+
+    assert bloom.might_be_revoked("revoked-elsewhere")
+    assert bloom.stats()["refreshes"] == 1
+    assert bloom.stats()["rebuilds"] == 1
+
+
+@pytest.mark.asyncio()
+async def test_revocation_check_is_disabled_by_setting(client: AsyncClient, test_db: Session, create_test_user_and_token):
+    _, token = create_test_user_and_token
+    headers = {"Authorization": f"Bearer {token}"}
+    await client.post("/api/v1/logout", headers=headers)
+
+    with patch.object(revocation_filter, "enabled", False):
+        assert (await client.get("/api/v1/users/me", headers=headers)).status_code == 200
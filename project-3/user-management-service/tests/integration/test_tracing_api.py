@@ -0,0 +1,82 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+
+pytest.importorskip("opentelemetry.sdk")
+
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter  # noqa: E402
+from opentelemetry.trace import StatusCode  # noqa: E402
+
+from app.core import tracing  # noqa: E402
+from app.db.instrumentation import instrument_engine  # noqa: E402
+from app.middleware.tracing import TracingMiddleware  # noqa: E402
+from main import app  # noqa: E402
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+
+@pytest.fixture()
+def exporter(db_engine):
+    # The test sessions use their own engine, not app.db.session's.
+    instrument_engine(db_engine)
+    user_middleware = list(app.user_middleware)
+    app.middleware_stack = None
+    app.add_middleware(TracingMiddleware)
+    exporter = InMemorySpanExporter()
+    tracing.configure_tracing(exporter, sample_rate=1.0)
+    yield exporter
+    tracing.shutdown_tracing()
+    app.user_middleware[:] = user_middleware
+    app.middleware_stack = None
+
+
+def finished(exporter: InMemorySpanExporter) -> list:
+    tracing.shutdown_tracing()
+    return list(exporter.get_finished_spans())
+
+
+def children(spans: list, parent) -> list[str]:
+    return sorted(span.name for span in spans if span.parent and span.parent.span_id == parent.context.span_id)
+
+
+@pytest.mark.asyncio()
+async def test_request_span_continues_the_inbound_trace(client: AsyncClient, create_test_user_and_token, exporter):
+    _, token = create_test_user_and_token
+
+    response = await client.get(
+        "/api/v1/users/me",
+        headers={"Authorization": f"Bearer {token}", "traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-01"},
+    )
+    assert response.status_code == 200
+
+    spans = finished(exporter)
+    assert {format(span.context.trace_id, "032x") for span in spans} == {TRACE_ID}
+    [request] = [span for span in spans if span.name == "GET /api/v1/users/me"]
+    assert request.attributes["http.response.status_code"] == 200
+    assert "get_current_user" in children(spans, request) or "get_current_identity" in children(spans, request)
+    assert any(span.name == "jwt.decode" for span in spans)
+    statements = [span for span in spans if span.name.startswith("db ")]
+    assert statements
+    assert all("%(" not in span.attributes["db.query.text"] for span in statements)
+
+
+@pytest.mark.asyncio()
+async def test_login_spans_cover_hashing_and_token_encoding(client: AsyncClient, create_test_user_and_token, exporter):
+    response = await client.post("/api/v1/token", data={"username": "testuser", "password": "testpassword"})
+    assert response.status_code == 200
+
+    spans = finished(exporter)
+    [job] = [span for span in spans if span.name == "password_hasher.job"]
+    assert children(spans, job) == ["password.verify"]
+    assert job.attributes["wait_seconds"] >= 0
+    assert any(span.name == "jwt.encode" for span in spans)
+
+
+def test_failed_statements_end_their_span(test_db, exporter):
+    with pytest.raises(ProgrammingError):
+        test_db.execute(text("SELECT * FROM no_such_table"))
+    assert not test_db.connection().info["statement_started"]
+
+    [failed] = [span for span in finished(exporter) if span.name == "db SELECT"]
+    assert failed.status.status_code is StatusCode.ERROR
@@ -0,0 +1,74 @@
+import time
+import uuid
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import Uuid, literal, select, text
+
+from app.core.user_cache import PostgresInvalidationBackend, user_cache
+from app.models.user import User
+
+
+@pytest.mark.asyncio()
+async def test_users_me_is_served_from_snapshot_cache(client: AsyncClient, create_test_user_and_token):
+    _, token = create_test_user_and_token
+    headers = {"Authorization": f"Bearer {token}"}
+
+    await client.get("/api/v1/users/me", headers=headers)
+    hits_before = user_cache.stats()["hits"]
+    response = await client.get("/api/v1/users/me", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["username"] == "testuser"
+    assert user_cache.stats()["hits"] == hits_before + 1
+
+
+@pytest.mark.asyncio()
+async def test_profile_update_invalidates_snapshot(client: AsyncClient, create_test_user_and_token):
+    _, token = create_test_user_and_token
+    headers = {"Authorization": f"Bearer {token}"}
+    await client.get("/api/v1/users/me", headers=headers)
+
+    await client.put("/api/v1/users/me", json={"full_name": "Fresh Name"}, headers=headers)
+    response = await client.get("/api/v1/users/me", headers=headers)
+
+    assert response.json()["full_name"] == "Fresh Name"
+
+
+def test_postgres_backend_delivers_invalidations_across_connections(db_engine):
+    received = []
+    backend = PostgresInvalidationBackend(received.append, channel="test_user_cache", dsn=str(db_engine.url))
+    backend.start()
+    try:
+        # The listener flushes on (re)connect; wait for that before notifying.
+        deadline = time.monotonic() + 10
+        while not received and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        with db_engine.connect() as connection:
+            connection.execute(backend.statement("payload"))
+            connection.commit()
+
+        while len(received) < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        backend.stop()
+
+    assert received[-1] == "payload"
+
+
+def test_returning_invalidation_payload_drops_the_written_user(db_engine):
+    user_id = uuid.uuid4()
+    backend = PostgresInvalidationBackend(lambda payload: None, channel="test_user_cache", dsn=str(db_engine.url))
+
+    with db_engine.connect() as connection:
+        connection.execute(text('LISTEN "test_user_cache"'))
+        connection.execute(select(backend.returning(literal(user_id, Uuid), literal("returning_user"))))
+        connection.commit()
+        notifies = connection.connection.dbapi_connection.notifies
+
+    user_cache.store(User(id=user_id, username="returning_user", email="r@example.com", hashed_password="hash"))
+    user_cache.handle_message(notifies[-1].payload)
+
+    assert user_cache.get_by_id(user_id) is None
+    assert user_cache.get_by_username("returning_user") is None
@@ -0,0 +1,81 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import delete, insert
+
+from app.models.user import User
+from app.services.user_export import EXPORTABLE_COLUMNS, iter_export
+
+
+@pytest.fixture()
+def exported_users(db_engine):
+    # The export streams over its own connection, so rows must be committed.
+    rows = [
+        {
+            "email": f"export{n}@example.com",
+            "username": f"export_user_{n}",
+            "hashed_password": "secret-hash",
+            "is_deleted": n == 4,
+        }
+        for n in range(5)
+    ]
+    with db_engine.begin() as connection:
+        connection.execute(insert(User), rows)
+    yield rows
+    with db_engine.begin() as connection:
+        connection.execute(delete(User).where(User.email.like("export%")))
+
+
+@pytest.mark.asyncio()
+async def test_export_streams_ndjson_without_password_hashes(client: AsyncClient, admin_headers, exported_users):
+    response = await client.get("/api/v1/users/export", headers=admin_headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(record["username"] for record in records) == [f"export_user_{n}" for n in range(4)]
+    assert set(records[0]) == set(EXPORTABLE_COLUMNS)
+    assert "secret-hash" not in response.text
+
+
+@pytest.mark.asyncio()
+async def test_export_gzipped_csv_with_projection(client: AsyncClient, admin_headers, exported_users):
+    response = await client.get(
+        "/api/v1/users/export",
+        params={"format": "csv", "columns": "username,is_deleted", "gzip": "true", "include_deleted": "true"},
+        headers=admin_headers,
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == 'attachment; filename="users.csv.gz"'
+    rows = list(csv.reader(io.StringIO(gzip.decompress(response.content).decode())))
+    assert rows[0] == ["username", "is_deleted"]
+    assert ["export_user_4", "True"] in rows[1:]
+    assert len(rows) == 6
+
+
+@pytest.mark.asyncio()
+async def test_export_rejects_password_column(client: AsyncClient, admin_headers):
+    response = await client.get(
+        "/api/v1/users/export", params={"columns": "id,hashed_password"}, headers=admin_headers,
+    )
+
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio()
+async def test_export_requires_admin(client: AsyncClient):
+    response = await client.get("/api/v1/users/export")
+
+    assert response.status_code == 403
+
+
+def test_iter_export_yields_one_chunk_per_partition(db_engine, exported_users):
+    chunks = list(iter_export(db_engine.connect, ["username"], batch_size=2))
+
+    assert len(chunks) == 2
+    assert b"".join(chunks).count(b"\n") == 4
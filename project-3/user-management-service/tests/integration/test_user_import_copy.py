@@ -0,0 +1,68 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import delete, select
+
+from app.core.security import verify_password
+from app.models.user import User
+from app.services.user_import import ImportReport, UserImporter, iter_records
+
+LEGACY_HASH = "$2b$12$" + "a" * 53
+
+CSV_INPUT = (
+    "email,username,full_name,password,hashed_password\n"
+    "import1@example.com,import_user_1,Import One,Password123,\n"
+    "import2@example.com,import_user_2,,,{legacy}\n"
+    "not-an-email,import_user_3,,Password123,\n"
+    "import1@example.com,import_user_4,,Password123,\n"
+    "import5@example.com,import_user_5,,Password123,\n"
+).format(legacy=LEGACY_HASH)
+
+
+@pytest.fixture()
+def import_connection(db_engine):
+    with db_engine.connect() as connection:
+        yield connection
+    with db_engine.begin() as connection:
+        connection.execute(delete(User).where(User.email.like("import%")))
+
+
+def test_importer_copies_valid_rows_and_reports_rejects(import_connection, tmp_path):
+    rejects = []
+    checkpoint = str(tmp_path / "import.ckpt")
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        importer = UserImporter(
+            import_connection,
+            executor,
+            batch_size=2,
+            on_reject=lambda line_no, record, reason: rejects.append((line_no, record, reason)),
+        )
+        report = importer.run(iter_records(io.StringIO(CSV_INPUT), "csv"), ImportReport(source="test"), checkpoint)
+
+    assert (report.read, report.imported, report.rejected, report.conflicts) == (5, 3, 1, 1)
+    assert report.last_line == 5
+    assert [line_no for line_no, _, _ in rejects] == [3, 4]
+    assert all("password" not in record for _, record, _ in rejects)
+
+    users = {
+        user.username: user
+        for user in import_connection.execute(select(User).where(User.email.like("import%"))).all()
+    }
+    assert set(users) == {"import_user_1", "import_user_2", "import_user_5"}
+    assert verify_password("Password123", users["import_user_1"].hashed_password)
+    assert users["import_user_2"].hashed_password == LEGACY_HASH
+
+
+def test_importer_resumes_after_checkpoint(import_connection):
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        importer = UserImporter(import_connection, executor, batch_size=10)
+        report = importer.run(
+            iter_records(io.StringIO(CSV_INPUT), "csv"),
+            ImportReport(source="test", last_line=4),
+        )
+
+    assert report.read == 1
+    assert report.imported == 1
+    emails = import_connection.execute(select(User.email).where(User.email.like("import%"))).scalars().all()
+    assert emails == ["import5@example.com"]
@@ -0,0 +1,76 @@
+from contextlib import contextmanager
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+@contextmanager
+def count_statements(engine):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        # The test session wraps each commit in a savepoint; those are not the endpoint's.
+        if not statement.startswith(("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")):
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture()
+async def auth_headers(client: AsyncClient, create_test_user_and_token) -> dict:
+    _, token = create_test_user_and_token
+    headers = {"Authorization": f"Bearer {token}"}
+    # Warm the user cache so authentication itself issues no statement.
+    await client.get("/api/v1/users/me", headers=headers)
+    return headers
+
+
+@pytest.mark.asyncio()
+@pytest.mark.parametrize(
+    ("method", "path", "body"),
+    [
+        ("PUT", "/api/v1/users/me", {"full_name": "Counted Name", "email": "counted@example.com"}),
+        ("PUT", "/api/v1/users/me/password", {"current_password": "testpassword", "new_password": "NewPassword123"}),
+        ("DELETE", "/api/v1/users/me", {"current_password": "testpassword"}),
+    ],
+    ids=["update-profile", "change-password", "delete-account"],
+)
+async def test_write_endpoints_issue_a_single_statement(
+    client: AsyncClient, test_db: Session, db_engine, auth_headers, method, path, body,
+):
+    with count_statements(db_engine) as statements:
+        response = await client.request(method, path, json=body, headers=auth_headers)
+
+    assert response.status_code < 300
+    assert len(statements) == 1, statements
+    assert statements[0].startswith("UPDATE users SET")
+    # The cache invalidation rides along in the RETURNING clause.
+    assert "pg_notify" in statements[0]
+
+
+@pytest.mark.asyncio()
+async def test_register_issues_a_single_statement(client: AsyncClient, test_db: Session, db_engine):
+    user = {"email": "counted@example.com", "username": "counted_user", "password": "CountedPassword123"}
+
+    with count_statements(db_engine) as statements:
+        response = await client.post("/api/v1/register", json=user)
+
+    assert response.status_code == 201
+    assert response.json()["created_at"] is not None
+    assert [statement.split()[0] for statement in statements] == ["INSERT"]
+
+
+@pytest.mark.asyncio()
+async def test_updated_at_is_set_by_the_database(client: AsyncClient, test_db: Session, auth_headers):
+    before = (await client.get("/api/v1/users/me", headers=auth_headers)).json()["updated_at"]
+
+    response = await client.put("/api/v1/users/me", json={"full_name": "Later Name"}, headers=auth_headers)
+
+    # now() is the transaction start; the fixture user was created with a 2023 timestamp.
+    assert response.json()["updated_at"] > before
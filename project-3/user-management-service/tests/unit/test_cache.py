@@ -0,0 +1,59 @@
+import time
+
+from app.core.cache import BloomFilter, LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_cache_honours_entry_expiry():
+    cache = LRUCache(max_size=10)
+    cache.set("expired", "value", expires_at=time.time() - 1)
+    cache.set("fresh", "value", expires_at=time.time() + 60)
+
+    assert cache.get("expired") is None
+    assert cache.get("fresh") == "value"
+    assert len(cache) == 1
+
+
+def test_lru_cache_counts_hits_and_misses():
+    cache = LRUCache(max_size=10, ttl=60)
+    cache.set("a", 1)
+
+    cache.get("a")
+    cache.get("missing")
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f"jti-{n}" for n in range(1000)]
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+    assert len(bloom) == 1000
+
+
+def test_bloom_filter_false_positive_rate_near_target():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for n in range(1000):
+        bloom.add(f"jti-{n}")
+
+    false_positives = sum(f"other-{n}" in bloom for n in range(10000))
+
+    assert false_positives < 10000 * 0.03
@@ -0,0 +1,42 @@
+from scripts.check_query_plans import plan_violations
+
+
+def explained(plan: dict, execution_ms: float = 0.5) -> list:
+    return [{"Plan": plan, "Planning Time": 0.1, "Execution Time": execution_ms}]
+
+
+def test_index_plan_within_budget_passes():
+    plan = {
+        "Node Type": "Limit",
+        "Shared Hit Blocks": 4,
+        "Shared Read Blocks": 0,
+        "Plans": [{"Node Type": "Index Scan", "Relation Name": "users", "Shared Hit Blocks": 4}],
+    }
+
+    assert plan_violations(explained(plan), max_buffers=10, max_ms=1) == []
+
+
+def test_nested_seq_scan_is_reported():
+    plan = {
+        "Node Type": "Update",
+        "Plans": [
+            {
+                "Node Type": "Nested Loop",
+                "Plans": [
+                    {"Node Type": "Seq Scan", "Relation Name": "users"},
+                    {"Node Type": "Index Scan", "Relation Name": "users"},
+                ],
+            },
+        ],
+    }
+
+    assert plan_violations(explained(plan), max_buffers=10, max_ms=1) == ["Seq Scan on users"]
+
+
+def test_buffer_and_time_budgets():
+    plan = {"Node Type": "Index Scan", "Relation Name": "users", "Shared Hit Blocks": 8, "Shared Read Blocks": 5}
+
+    assert plan_violations(explained(plan, execution_ms=2.5), max_buffers=10, max_ms=1) == [
+        "13 buffers > 10",
+        "2.50 ms > 1 ms",
+    ]
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from app.core.hashing import HashingQueueFullException, PasswordHasher
+
+
+@pytest.fixture()
+def hasher():
+    hasher = PasswordHasher(executor_type="thread", max_workers=2, max_queue_size=4)
+    yield hasher
+    hasher.shutdown()
+
+
+async def test_hash_and_verify_async_round_trip(hasher):
+    hashed = await hasher.hash_async("testpassword")
+
+    assert await hasher.verify_async("testpassword", hashed) is True
+    assert await hasher.verify_async("wrongpassword", hashed) is False
+
+
+async def test_stats_track_completed_jobs(hasher):
+    await hasher.hash_async("testpassword")
+
+    stats = hasher.stats()
+    assert stats["submitted"] == 1
+    assert stats["completed"] == 1
+    assert stats["queue_depth"] == 0
+    assert stats["wait_seconds_max"] >= 0
+
+
+async def test_rejects_when_queue_is_full():
+    hasher = PasswordHasher(executor_type="thread", max_workers=1, max_queue_size=1)
+    try:
+        first = asyncio.ensure_future(hasher.hash_async("testpassword"))
+        await asyncio.sleep(0)
+
+        with pytest.raises(HashingQueueFullException) as exc_info:
+            await hasher.hash_async("anotherpassword")
+
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.headers["Retry-After"] == "1"
+        await first
+        assert hasher.stats()["rejected"] == 1
+    finally:
+        hasher.shutdown()
+
+
+def test_rejects_unknown_executor_type():
+    with pytest.raises(ValueError):
+        PasswordHasher(executor_type="fiber")
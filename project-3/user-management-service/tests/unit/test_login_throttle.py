@@ -0,0 +1,95 @@
+import pytest
+
+from app.core.login_throttle import LoginThrottle, LoginThrottledException, MemoryRateLimitBackend
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_memory_backend_allows_a_burst_then_refills():
+    clock = FakeClock()
+    backend = MemoryRateLimitBackend(max_keys=10, clock=clock)
+
+    assert [backend.take("k", 3, 0.5) for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Empty: the next token arrives after 1 / 0.5 seconds.
+    assert backend.take("k", 3, 0.5) == pytest.approx(2.0)
+
+    clock.now += 2.0
+    assert backend.take("k", 3, 0.5) == 0.0
+    assert backend.take("k", 3, 0.5) > 0
+
+
+def test_memory_backend_never_refills_past_capacity():
+    clock = FakeClock()
+    backend = MemoryRateLimitBackend(max_keys=10, clock=clock)
+    backend.take("k", 2, 1.0)
+
+    clock.now += 3600
+    assert [backend.take("k", 2, 1.0) > 0 for _ in range(3)] == [False, False, True]
+
+
+def test_memory_backend_is_bounded_and_prunes_idle_buckets():
+    clock = FakeClock()
+    backend = MemoryRateLimitBackend(max_keys=2, clock=clock)
+    for key in ("a", "b", "c"):
+        backend.take(key, 5, 1.0)
+    assert list(backend._buckets) == ["b", "c"]
+
+    clock.now += 10
+    backend.take("c", 5, 1.0)
+    backend.prune(max_idle_seconds=5)
+    assert list(backend._buckets) == ["c"]
+
+
+def make_throttle(**overrides) -> LoginThrottle:
+    options = {"username_burst": 2, "username_per_minute": 1, "ip_burst": 3, "ip_per_minute": 1}
+    return LoginThrottle(**{**options, **overrides})
+
+
+def test_throttle_limits_usernames_case_insensitively():
+    throttle = make_throttle()
+    throttle.check("alice", "10.0.0.1")
+    throttle.check("ALICE", "10.0.0.2")
+
+    with pytest.raises(LoginThrottledException) as exc_info:
+        throttle.check("Alice", "10.0.0.3")
+
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.headers["Retry-After"] == "60"
+    assert throttle.stats()["rejected_username"] == 1
+
+
+def test_throttle_limits_client_ips_across_usernames():
+    throttle = make_throttle()
+    for username in ("a", "b", "c"):
+        throttle.check(username, "10.0.0.1")
+
+    with pytest.raises(LoginThrottledException):
+        throttle.check("d", "10.0.0.1")
+
+    stats = throttle.stats()
+    assert stats["checked"] == 4
+    assert stats["allowed"] == 3
+    assert stats["rejected_ip"] == 1
+    assert stats["verifications_avoided"] == 1
+
+
+def test_throttle_fails_open_when_the_backend_errors(mocker):
+    throttle = make_throttle()
+    mocker.patch.object(throttle.backend, "take", side_effect=RuntimeError("store down"))
+
+    throttle.check("alice", "10.0.0.1")
+
+    assert throttle.stats()["backend_errors"] == 1
+
+
+def test_disabled_throttle_allows_everything():
+    throttle = make_throttle(enabled=False)
+    for _ in range(10):
+        throttle.check("alice", "10.0.0.1")
+    assert throttle.stats()["checked"] == 0
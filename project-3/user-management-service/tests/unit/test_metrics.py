@@ -0,0 +1,79 @@
+import gc
+import threading
+
+import pytest
+
+from app.core.metrics import MetricsRegistry
+
+
+def sample_lines(registry: MetricsRegistry) -> list[str]:
+    return [line for line in registry.render().splitlines() if line and not line.startswith("#")]
+
+
+def test_counter_adds_up_per_thread_cells():
+    registry = MetricsRegistry()
+    counter = registry.counter("jobs_total", "Jobs.", ("kind",))
+
+    def work():
+        for _ in range(1000):
+            counter.labels("a").inc()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counter.labels("a").inc(0.5)
+
+    assert sample_lines(registry) == ['jobs_total{kind="a"} 8000.5']
+
+
+def test_exited_threads_are_folded_into_retired_totals():
+    registry = MetricsRegistry()
+    gauge = registry.gauge("in_flight", "In flight.")
+    series = gauge.labels()
+
+    thread = threading.Thread(target=gauge.inc, args=(3,))
+    thread.start()
+    thread.join()
+    del thread
+    gc.collect()
+    gauge.dec()
+
+    assert len(series._cells) == 1  # only this thread's cell is left
+    assert series.values() == [2.0]
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.labels('/a"b').observe(value)
+
+    assert sample_lines(registry) == [
+        'latency_seconds_bucket{route="/a\\"b",le="0.1"} 2.0',
+        'latency_seconds_bucket{route="/a\\"b",le="1.0"} 3.0',
+        'latency_seconds_bucket{route="/a\\"b",le="+Inf"} 4.0',
+        'latency_seconds_sum{route="/a\\"b"} 3.65',
+        'latency_seconds_count{route="/a\\"b"} 4.0',
+    ]
+
+
+def test_callback_metrics_are_read_at_scrape_time():
+    registry = MetricsRegistry()
+    depth = {"value": 1}
+    registry.callback("queue_depth", "Depth.", "gauge", lambda: {("jobs",): depth["value"]}, ("queue",))
+    depth["value"] = 7
+
+    assert "# TYPE queue_depth gauge" in registry.render()
+    assert sample_lines(registry) == ['queue_depth{queue="jobs"} 7.0']
+
+
+def test_label_count_and_duplicate_names_are_rejected():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "Requests.", ("route",))
+
+    with pytest.raises(ValueError):
+        counter.labels("a", "b")
+    with pytest.raises(ValueError):
+        registry.counter("requests_total", "Requests.")
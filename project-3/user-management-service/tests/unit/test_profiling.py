@@ -0,0 +1,102 @@
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.core.config import settings
+from app.core.profiling import (
+    AllocationTracker,
+    ProfileStore,
+    SamplingProfiler,
+    sign_profile_request,
+    verify_profile_request,
+)
+
+
+@pytest.fixture(autouse=True)
+def admin_key():
+    with patch.object(settings, "ADMIN_API_KEY", "test-admin-key"):
+        yield
+
+
+def checksum(values: range) -> int:
+    return sum(value % 7 for value in values)
+
+
+def busy_loop(stop: threading.Event):
+    while not stop.is_set():
+        checksum(range(1000))
+
+
+def test_signed_profile_requests_are_bound_to_method_and_path():
+    value = sign_profile_request("GET", "/api/v1/users/me", mode="memory")
+
+    assert verify_profile_request(value, "GET", "/api/v1/users/me") == "memory"
+    assert verify_profile_request(value, "GET", "/api/v1/users") is None
+    assert verify_profile_request(value, "DELETE", "/api/v1/users/me") is None
+    assert verify_profile_request(value.replace("memory", "cpu", 1), "GET", "/api/v1/users/me") is None
+    assert verify_profile_request("cpu.x.y", "GET", "/api/v1/users/me") is None
+
+
+def test_signed_profile_requests_expire():
+    value = sign_profile_request("GET", "/api/v1/users/me", ttl_seconds=-1)
+
+    assert verify_profile_request(value, "GET", "/api/v1/users/me") is None
+
+
+def test_profile_requests_cannot_be_signed_or_verified_without_an_admin_key():
+    value = sign_profile_request("GET", "/")
+    with patch.object(settings, "ADMIN_API_KEY", None):
+        assert verify_profile_request(value, "GET", "/") is None
+        with pytest.raises(ValueError, match="ADMIN_API_KEY"):
+            sign_profile_request("GET", "/")
+
+
+def test_sampling_profiler_records_busy_threads_in_speedscope_format():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name="busy-worker")
+    worker.start()
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    time.sleep(0.1)
+    profiler.stop()
+    stop.set()
+    worker.join()
+
+    document = profiler.speedscope("GET /test")
+    frames = document["shared"]["frames"]
+    [profile] = [profile for profile in document["profiles"] if profile["name"] == "busy-worker"]
+    assert profile["type"] == "sampled"
+    assert len(profile["samples"]) == len(profile["weights"]) > 10
+    assert profile["endValue"] == pytest.approx(sum(profile["weights"]))
+    leaves = {frames[stack[-1]]["name"] for stack in profile["samples"]}
+    assert leaves & {"busy_loop", "checksum", "checksum.<locals>.<genexpr>"}
+
+
+def test_allocation_tracker_reports_allocations_and_stops_tracing():
+    tracker = AllocationTracker(limit=5)
+    tracker.start()
+    retained = [bytearray(1024) for _ in range(1000)]
+    tracker.stop()
+
+    assert tracker.report["allocated_bytes"] >= 1_000_000
+    assert tracker.report["top"][0]["location"].startswith(__file__)
+    assert len(tracker.report["top"]) <= 5
+    del retained
+
+
+def test_profile_store_keeps_the_newest_profiles(tmp_path):
+    store = ProfileStore(str(tmp_path), max_files=2)
+    for name in ("20260101T000000-get-a", "20260101T000001-get-b", "20260101T000002-get-c"):
+        store.save(name, {"profiles": []}, memory={"top": []})
+
+    assert [artifact["name"] for artifact in store.artifacts()] == [
+        "20260101T000002-get-c.speedscope.json",
+        "20260101T000002-get-c.memory.json",
+        "20260101T000001-get-b.speedscope.json",
+        "20260101T000001-get-b.memory.json",
+    ]
+    assert store.path("20260101T000001-get-b.speedscope.json") is not None
+    assert store.path("20260101T000000-get-a.speedscope.json") is None
+    assert store.path("../secrets.speedscope.json") is None
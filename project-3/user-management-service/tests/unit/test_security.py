@@ -2,6 +2,7 @@ from datetime import UTC, datetime, timedelta
 from unittest.mock import patch
 
 import pytest
+from jose import JWTError
 
 from app.core import security
 from app.core.config import settings  # Import settings to patch it
@@ -42,6 +43,11 @@ def test_create_access_token():
     assert expiration_time > datetime.now(UTC) + timedelta(minutes=59)
     assert expiration_time < datetime.now(UTC) + timedelta(minutes=61)
 
+def test_create_access_token_assigns_unique_jti():
+    first = security.decode_access_token(security.create_access_token({"sub": "testuser"}))
+    second = security.decode_access_token(security.create_access_token({"sub": "testuser"}))
+    assert first["jti"] and first["jti"] != second["jti"]
+
 def test_create_access_token_with_custom_expiry():
     data = {"sub": "testuser"}
     expires_delta = timedelta(minutes=5)
@@ -53,3 +59,51 @@ def test_create_access_token_with_custom_expiry():
     # Check expiration time with custom delta
     assert expiration_time > datetime.now(UTC) + timedelta(minutes=4)
     assert expiration_time < datetime.now(UTC) + timedelta(minutes=6)
+
+def test_decode_access_token_caches_verified_claims():
+    security.token_cache.clear()
+    token = security.create_access_token({"sub": "testuser"})
+
+    assert security.decode_access_token(token)["sub"] == "testuser"
+    assert security.decode_access_token(token)["sub"] == "testuser"
+
+    stats = security.token_cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+def test_decode_access_token_cache_opt_out():
+    security.token_cache.clear()
+    token = security.create_access_token({"sub": "testuser"})
+
+    with patch.object(settings, "TOKEN_CACHE_ENABLED", False):
+        security.decode_access_token(token)
+
+    assert len(security.token_cache) == 0
+
+def test_decode_access_token_rejects_invalid_signature():
+    token = security.create_access_token({"sub": "testuser"}) + "tampered"
+
+    with pytest.raises(JWTError):
+        security.decode_access_token(token)
+
+def test_password_context_flags_hashes_at_another_cost():
+    context = security.build_password_context(scheme="bcrypt", bcrypt_rounds=5)
+
+    assert context.hash("testpassword").startswith("$2b$05$")
+    assert not context.needs_update(context.hash("testpassword"))
+    assert context.needs_update(security.build_password_context(bcrypt_rounds=4).hash("testpassword"))
+    assert context.needs_update(security.build_password_context(bcrypt_rounds=6).hash("testpassword"))
+
+def test_argon2_context_deprecates_bcrypt_hashes():
+    context = security.build_password_context(
+        scheme="argon2", argon2_time_cost=1, argon2_memory_cost=8192, argon2_parallelism=1,
+    )
+    legacy_hash = security.build_password_context(bcrypt_rounds=4).hash("testpassword")
+
+    assert context.hash("testpassword").startswith("$argon2id$v=19$m=8192,t=1,p=1$")
+    assert context.verify("testpassword", legacy_hash)
+    assert context.needs_update(legacy_hash)
+
+def test_password_context_rejects_unknown_scheme():
+    with pytest.raises(ValueError, match="Unknown password hash scheme"):
+        security.build_password_context(scheme="md5_crypt")
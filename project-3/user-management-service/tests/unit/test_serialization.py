@@ -0,0 +1,49 @@
+import json
+import uuid
+from datetime import datetime
+
+from app.models.user import User
+from app.schemas import serialization
+from app.schemas.user import UserPage, UserRead
+
+
+def make_user(n: int = 0) -> User:
+    return User(
+        id=uuid.uuid4(),
+        email=f"fast{n}@example.com",
+        username=f"fast{n}",
+        full_name=None,
+        hashed_password="hashed",
+        is_active=True,
+        is_deleted=False,
+        created_at=datetime(2024, 1, 1, 12, 0, 0, 123456),
+        updated_at=datetime(2024, 1, 2, 12, 0, 0),
+        deleted_at=None,
+        deletion_requested_at=datetime(2024, 1, 3),
+    )
+
+
+def test_trusted_serializer_matches_validated_output():
+    user = make_user()
+
+    trusted = json.loads(serialization.user_read.to_json(user))
+
+    assert trusted == UserRead.model_validate(user).model_dump(mode="json")
+    assert "hashed_password" not in trusted
+
+
+def test_trusted_response_sets_status_headers_and_media_type():
+    response = serialization.user_read.response(make_user(), status_code=201, headers={"ETag": '"tag"'})
+
+    assert response.status_code == 201
+    assert response.headers["ETag"] == '"tag"'
+    assert response.media_type == "application/json"
+
+
+def test_user_page_matches_validated_output():
+    users = [make_user(n) for n in range(3)]
+
+    response = serialization.model_response(serialization.user_page(users, next_cursor="abc"))
+
+    expected = UserPage(items=users, next_cursor="abc").model_dump(mode="json")
+    assert json.loads(response.body) == expected
@@ -0,0 +1,73 @@
+import logging
+
+import pytest
+
+from app.db.statement_stats import StatementStats, fingerprint
+
+
+def test_fingerprint_ignores_bound_values_and_list_lengths():
+    one = fingerprint("SELECT users.id FROM users WHERE users.email IN (%(email_1_1)s) LIMIT %(param_1)s")
+    three = fingerprint(
+        "SELECT users.id\n  FROM users WHERE users.email IN (%(email_1_1)s, %(email_1_2)s, %(email_1_3)s) LIMIT 5",
+    )
+
+    assert one == three
+    assert one[1] == "SELECT users.id FROM users WHERE users.email IN (...) LIMIT ?"
+    assert fingerprint(
+        "INSERT INTO users (id, email) VALUES (%(id__0)s::UUID, %(email__0)s), (%(id__1)s::UUID, %(email__1)s)",
+    )[1] == "INSERT INTO users (id, email) VALUES (...)"
+    assert fingerprint("SELECT 1 FROM users WHERE lower(username) = lower($1) AND name = 'o''brien'")[1] == (
+        "SELECT ? FROM users WHERE lower(username) = lower(?) AND name = ?"
+    )
+
+
+def test_record_aggregates_by_fingerprint():
+    stats = StatementStats(slow_query_ms=None)
+    stats.record("SELECT * FROM users WHERE id = %(id_1)s", 0.002, 1)
+    stats.record("SELECT * FROM users WHERE id = %(id_2)s", 0.004, 0)
+    stats.record("UPDATE users SET full_name = %(full_name)s", 0.001, -1)
+
+    report = stats.stats(order_by="calls")
+
+    assert report["entries"] == 2
+    top = report["statements"][0]
+    assert top["query"] == "SELECT * FROM users WHERE id = ?"
+    assert top["calls"] == 2
+    assert top["rows"] == 1
+    assert top["total_time"] == pytest.approx(6.0)
+    assert top["mean_time"] == pytest.approx(3.0)
+    assert top["min_time"] == pytest.approx(2.0)
+    assert top["max_time"] == pytest.approx(4.0)
+    with pytest.raises(ValueError):
+        stats.stats(order_by="nonsense")
+
+
+def test_full_registry_evicts_least_called_entries():
+    stats = StatementStats(max_entries=3, slow_query_ms=None)
+    for _ in range(3):
+        stats.record("SELECT a FROM t", 0.001, 0)
+    stats.record("SELECT b FROM t", 0.001, 0)
+    stats.record("SELECT b FROM t", 0.001, 0)
+    stats.record("SELECT c FROM t", 0.001, 0)
+
+    stats.record("SELECT d FROM t", 0.001, 0)
+
+    report = stats.stats(order_by="calls")
+    assert [statement["query"] for statement in report["statements"]] == [
+        "SELECT a FROM t", "SELECT b FROM t", "SELECT d FROM t",
+    ]
+    assert report["evicted"] == 1
+
+
+def test_slow_statements_are_logged_with_their_route(caplog):
+    stats = StatementStats(slow_query_ms=50)
+
+    with caplog.at_level(logging.WARNING, logger="app.db.statement_stats"):
+        stats.record("SELECT * FROM users WHERE id = %(id_1)s", 0.01, 1, route="/api/v1/users/me")
+        stats.record("SELECT * FROM users WHERE id = %(id_1)s", 0.2, 1, route="/api/v1/users/me")
+
+    [record] = caplog.records
+    assert record.route == "/api/v1/users/me"
+    assert record.duration_ms == pytest.approx(200.0)
+    assert record.query == "SELECT * FROM users WHERE id = ?"
+    assert stats.stats()["slow_queries"] == 1
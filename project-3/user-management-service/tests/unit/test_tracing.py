@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+pytest.importorskip("opentelemetry.sdk")
+
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter  # noqa: E402
+
+from app.core import tracing  # noqa: E402
+from app.core.tracing_exporters import JsonLinesSpanExporter  # noqa: E402
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+
+@pytest.fixture()
+def exporter():
+    exporter = InMemorySpanExporter()
+    tracing.configure_tracing(exporter, sample_rate=1.0)
+    yield exporter
+    tracing.shutdown_tracing()
+
+
+def finished(exporter: InMemorySpanExporter) -> dict:
+    tracing.shutdown_tracing()  # flushes the batch processor
+    return {span.name: span for span in exporter.get_finished_spans()}
+
+
+@tracing.traced("double")
+def double(value: int) -> int:
+    return value * 2
+
+
+@tracing.traced("double_async")
+async def double_async(value: int) -> int:
+    return double(value)
+
+
+def test_disabled_tracing_records_nothing():
+    assert not tracing.tracing_enabled()
+    assert double(2) == 4
+    with tracing.span("work") as span:
+        assert span is None
+    assert tracing.start_span("work") is None
+
+
+@pytest.mark.asyncio()
+async def test_traced_functions_nest_under_the_current_span(exporter):
+    with tracing.span("outer"):
+        assert await double_async(3) == 6
+
+    spans = finished(exporter)
+    assert spans["double"].parent.span_id == spans["double_async"].context.span_id
+    assert spans["double_async"].parent.span_id == spans["outer"].context.span_id
+
+
+def test_server_span_continues_an_inbound_traceparent(exporter):
+    headers = {"traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-01"}
+    with tracing.server_span("GET /things", headers):
+        double(1)
+
+    spans = finished(exporter)
+    assert {format(span.context.trace_id, "032x") for span in spans.values()} == {TRACE_ID}
+    assert spans["GET /things"].parent.span_id == 0x00F067AA0BA902B7
+
+
+def test_sample_rate_applies_only_to_new_traces():
+    exporter = InMemorySpanExporter()
+    tracing.configure_tracing(exporter, sample_rate=0.0)
+    with tracing.server_span("GET /new", {}):
+        double(1)
+    with tracing.server_span("GET /sampled", {"traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-01"}):
+        pass
+
+    assert set(finished(exporter)) == {"GET /sampled"}
+
+
+def test_json_lines_exporter_appends_one_span_per_line(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracing.configure_tracing(JsonLinesSpanExporter(str(path)))
+    with tracing.span("outer", {"answer": 42}):
+        double(1)
+    tracing.shutdown_tracing()
+
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [span["name"] for span in spans] == ["double", "outer"]
+    assert spans[1]["attributes"] == {"answer": 42}
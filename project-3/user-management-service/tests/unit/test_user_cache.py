@@ -0,0 +1,84 @@
+import json
+import uuid
+
+from sqlalchemy import inspect
+
+from app.core.user_cache import FLUSH_ALL, MAX_NOTIFY_USERS, UserSnapshotCache
+from app.models.user import User
+
+
+def make_user(username="cacheduser"):
+    return User(
+        id=uuid.uuid4(),
+        email=f"{username}@example.com",
+        username=username,
+        hashed_password="hashed",
+        is_active=True,
+        is_deleted=False,
+        token_version=0,
+    )
+
+
+def test_snapshot_lookup_by_username_and_id_returns_detached_copies():
+    cache = UserSnapshotCache(max_size=10, ttl=60)
+    user = make_user()
+    cache.store(user)
+
+    by_username = cache.get_by_username("cacheduser")
+    by_id = cache.get_by_id(user.id)
+
+    assert by_username.id == user.id
+    assert by_id.username == "cacheduser"
+    assert by_username is not by_id
+    assert inspect(by_username).detached
+
+
+def test_invalidate_drops_both_keys():
+    cache = UserSnapshotCache(max_size=10, ttl=60)
+    user = make_user()
+    cache.store(user)
+
+    cache.invalidate([user])
+
+    assert cache.get_by_username("cacheduser") is None
+    assert cache.get_by_id(user.id) is None
+
+
+def test_handle_message_applies_remote_invalidations():
+    cache = UserSnapshotCache(max_size=10, ttl=60)
+    first, second = make_user("first"), make_user("second")
+    cache.store(first)
+    cache.store(second)
+
+    cache.handle_message(json.dumps([{"id": str(first.id), "username": "first"}]))
+    assert cache.get_by_username("first") is None
+    assert cache.get_by_username("second") is not None
+
+    cache.handle_message(FLUSH_ALL)
+    assert cache.get_by_username("second") is None
+
+
+def test_large_batches_flush_everything():
+    users = [make_user(f"user{i}") for i in range(MAX_NOTIFY_USERS + 1)]
+
+    assert UserSnapshotCache._payload(users) == FLUSH_ALL
+
+
+def test_disabled_cache_never_serves_snapshots():
+    cache = UserSnapshotCache(max_size=10, ttl=60, enabled=False)
+    cache.store(make_user())
+
+    assert cache.get_by_username("cacheduser") is None
+
+
+def test_token_version_comes_from_its_own_entry_or_the_snapshot_and_is_invalidated():
+    cache = UserSnapshotCache(max_size=10, ttl=60)
+    snapshotted, version_only = make_user("snapshotted"), make_user("versiononly")
+    cache.store(snapshotted)
+    cache.store_token_version(version_only.id, 3)
+
+    assert cache.get_token_version(snapshotted.id) == 0
+    assert cache.get_token_version(version_only.id) == 3
+
+    cache.handle_message(json.dumps([{"id": str(version_only.id), "username": "versiononly"}]))
+    assert cache.get_token_version(version_only.id) is None
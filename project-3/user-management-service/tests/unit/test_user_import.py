@@ -0,0 +1,54 @@
+import io
+
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.user import UserImportRow
+from app.services.user_import import ImportReport, iter_records, load_checkpoint, save_checkpoint
+
+LEGACY_HASH = "$2b$12$" + "a" * 53
+
+
+def test_iter_records_reads_csv_and_blanks_empty_cells():
+    stream = io.StringIO("email,username,full_name,password\na@example.com,alice,,Password123\n")
+
+    records = list(iter_records(stream, "csv"))
+
+    assert records == [(1, {"email": "a@example.com", "username": "alice", "full_name": None, "password": "Password123"})]
+
+
+def test_iter_records_reads_ndjson_and_flags_bad_lines():
+    stream = io.StringIO('{"email": "a@example.com"}\n\nnot json\n')
+
+    records = list(iter_records(stream, "ndjson"))
+
+    assert records[0] == (1, {"email": "a@example.com"})
+    assert records[1][0] == 2
+    assert "__error__" in records[1][1]
+
+
+def test_import_row_accepts_plaintext_or_legacy_hash():
+    assert UserImportRow(email="a@example.com", username="alice", password="Password123").password
+    assert UserImportRow(email="a@example.com", username="alice", hashed_password=LEGACY_HASH).hashed_password
+
+
+@pytest.mark.parametrize(
+    "fields",
+    [
+        {},
+        {"password": "Password123", "hashed_password": LEGACY_HASH},
+        {"password": "short"},
+        {"hashed_password": "not-a-bcrypt-hash"},
+    ],
+)
+def test_import_row_rejects_invalid_passwords(fields):
+    with pytest.raises(ValidationError):
+        UserImportRow(email="a@example.com", username="alice", **fields)
+
+
+def test_checkpoint_round_trip(tmp_path):
+    path = str(tmp_path / "import.ckpt")
+    save_checkpoint(path, ImportReport(source="users.csv", last_line=42, read=42, imported=40))
+
+    assert load_checkpoint(path, "users.csv").last_line == 42
+    assert load_checkpoint(path, "other.csv").last_line == 0
@@ -4,26 +4,33 @@ from unittest.mock import MagicMock
 
 import pytest
 from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
 
 from app.core import security
 from app.models.user import User
 from app.schemas.user import PasswordUpdate, UserCreate, UserUpdate
 from app.services.user_service import (
+    PreconditionFailedException,
     change_user_password_service,
     create_user_service,
     delete_user_account,
+    etag_matches,
+    expected_updated_at,
     update_user_profile,
+    user_etag,
 )
 
 
+def unique_violation(constraint_name: str) -> IntegrityError:
+    orig = MagicMock()
+    orig.diag.constraint_name = constraint_name
+    return IntegrityError("INSERT INTO users ...", {}, orig)
+
+
 def test_create_user_service_success(mocker):
     db_mock = MagicMock()
     user_create = UserCreate(email="test@example.com", username="testuser", password="password123")
 
-    # Mock crud_user functions
-    mock_get_user_by_email = mocker.patch("app.services.user_service.crud_user.get_user_by_email", return_value=None)
-    mock_get_user_by_username = mocker.patch("app.services.user_service.crud_user.get_user_by_username", return_value=None)
-
     # Mock security.get_password_hash
     mock_get_password_hash = mocker.patch("app.services.user_service.get_password_hash", return_value="hashed_password_mock")
 
@@ -36,53 +43,50 @@ def test_create_user_service_success(mocker):
         is_active=True,
     )
     mock_create_user = mocker.patch("app.services.user_service.crud_user.create_user", return_value=mock_created_user)
+    mock_get_user_by_email = mocker.patch("app.services.user_service.crud_user.get_user_by_email")
 
     # Call the service function
     created_user = create_user_service(db=db_mock, user=user_create)
 
-    # Assertions
+    # Assertions: the INSERT is the only database call, with no existence checks first
     assert created_user == mock_created_user
-    mock_get_user_by_email.assert_called_once_with(db_mock, email=user_create.email)
-    mock_get_user_by_username.assert_called_once_with(db_mock, username=user_create.username)
     mock_get_password_hash.assert_called_once_with(user_create.password)
     mock_create_user.assert_called_once_with(
         db=db_mock, user=user_create, hashed_password="hashed_password_mock",
     )
-
-def test_create_user_service_email_exists(mocker):
+    mock_get_user_by_email.assert_not_called()
+
+@pytest.mark.parametrize(
+    ("constraint_name", "detail"),
+    [
+        ("ix_users_email", "Email already registered"),
+        ("ix_users_lower_email_live", "Email already registered"),
+        ("ix_users_username", "Username already registered"),
+        ("ix_users_lower_username_live", "Username already registered"),
+    ],
+)
+def test_create_user_service_maps_unique_violations(mocker, constraint_name, detail):
     db_mock = MagicMock()
-    user_create = UserCreate(email="existing@example.com", username="testuser", password="password123")
-
-    # Mock get_user_by_email to return an existing user
-    mock_get_user_by_email = mocker.patch("app.services.user_service.crud_user.get_user_by_email", return_value=User())
+    user_create = UserCreate(email="existing@example.com", username="existinguser", password="password123")
+    mocker.patch("app.services.user_service.get_password_hash", return_value="hashed_password_mock")
+    mocker.patch(
+        "app.services.user_service.crud_user.create_user", side_effect=unique_violation(constraint_name),
+    )
 
     with pytest.raises(HTTPException) as exc_info:
         create_user_service(db=db_mock, user=user_create)
 
     assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
-    assert exc_info.value.detail == "Email already registered"
-    mock_get_user_by_email.assert_called_once_with(db_mock, email=user_create.email)
-    mocker.patch("app.services.user_service.crud_user.get_user_by_username").assert_not_called()
-    mocker.patch("app.services.user_service.get_password_hash").assert_not_called()
-    mocker.patch("app.services.user_service.crud_user.create_user").assert_not_called()
+    assert exc_info.value.detail == detail
 
-def test_create_user_service_username_exists(mocker):
-    db_mock = MagicMock()
-    user_create = UserCreate(email="test@example.com", username="existinguser", password="password123")
-
-    # Mock get_user_by_email to return None, then get_user_by_username to return an existing user
-    mock_get_user_by_email = mocker.patch("app.services.user_service.crud_user.get_user_by_email", return_value=None)
-    mock_get_user_by_username = mocker.patch("app.services.user_service.crud_user.get_user_by_username", return_value=User())
-
-    with pytest.raises(HTTPException) as exc_info:
-        create_user_service(db=db_mock, user=user_create)
+def test_create_user_service_reraises_other_integrity_errors(mocker):
+    mocker.patch("app.services.user_service.get_password_hash", return_value="hashed_password_mock")
+    mocker.patch("app.services.user_service.crud_user.create_user", side_effect=unique_violation("users_pkey"))
 
-    assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
-    assert exc_info.value.detail == "Username already registered"
-    mock_get_user_by_email.assert_called_once_with(db_mock, email=user_create.email)
-    mock_get_user_by_username.assert_called_once_with(db_mock, username=user_create.username)
-    mocker.patch("app.services.user_service.get_password_hash").assert_not_called()
-    mocker.patch("app.services.user_service.crud_user.create_user").assert_not_called()
+    with pytest.raises(IntegrityError):
+        create_user_service(
+            db=MagicMock(), user=UserCreate(email="test@example.com", username="testuser", password="password123"),
+        )
 
 
 def test_change_user_password_service_success(mocker):
@@ -122,36 +126,38 @@ def test_update_user_profile_success(mocker):
     user_id = uuid.uuid4()
     user_update = UserUpdate(full_name="New Name", email="new@example.com")
 
-    # Mock existing user
-    db_user_mock = User(id=user_id, email="old@example.com", username="testuser", hashed_password="hashed_password", is_active=True)
-    mocker.patch("app.services.user_service.crud_user.get_user", return_value=db_user_mock)
-
-    # Mock email check
-    mocker.patch("app.services.user_service.crud_user.get_user_by_email", return_value=None)
-
-    # Mock update_user
-    def mock_update_user_side_effect(db, db_user, obj_in):
-        for field, value in obj_in.items():
-            setattr(db_user, field, value)
-        return db_user
-    mocker.patch("app.services.user_service.crud_user.update_user", side_effect=mock_update_user_side_effect)
+    # Mock update_user to return the row hydrated from RETURNING
+    def mock_update_user_side_effect(db, user_id, obj_in, expected_updated_at):
+        return User(id=user_id, username="testuser", hashed_password="hashed_password", is_active=True, **obj_in)
+    mock_update_user = mocker.patch(
+        "app.services.user_service.crud_user.update_user", side_effect=mock_update_user_side_effect,
+    )
+    mock_get_user = mocker.patch("app.services.user_service.crud_user.get_user")
+    mock_get_user_by_email = mocker.patch("app.services.user_service.crud_user.get_user_by_email")
 
     updated_user = update_user_profile(db_mock, user_id, user_update)
 
     assert updated_user.full_name == "New Name"
     assert updated_user.email == "new@example.com"
+    # The UPDATE is the only statement: no read of the user or email check first
+    mock_update_user.assert_called_once_with(
+        db_mock,
+        user_id=user_id,
+        obj_in={"full_name": "New Name", "email": "new@example.com"},
+        expected_updated_at=None,
+    )
+    mock_get_user.assert_not_called()
+    mock_get_user_by_email.assert_not_called()
 
 def test_update_user_profile_duplicate_email(mocker):
     db_mock = MagicMock()
     user_id = uuid.uuid4()
     user_update = UserUpdate(email="duplicate@example.com")
 
-    # Mock existing user
-    db_user_mock = User(id=user_id, email="old@example.com", username="testuser", hashed_password="hashed_password", is_active=True)
-    mocker.patch("app.services.user_service.crud_user.get_user", return_value=db_user_mock)
-
-    # Mock email check to return an existing user with a different ID
-    mocker.patch("app.services.user_service.crud_user.get_user_by_email", return_value=User(id=uuid.uuid4(), email="duplicate@example.com"))
+    # The unique email index rejects the UPDATE
+    mocker.patch(
+        "app.services.user_service.crud_user.update_user", side_effect=unique_violation("ix_users_lower_email_live"),
+    )
 
     with pytest.raises(HTTPException) as exc_info:
         update_user_profile(db_mock, user_id, user_update)
@@ -164,8 +170,8 @@ def test_update_user_profile_user_not_found(mocker):
     user_id = uuid.uuid4()
     user_update = UserUpdate(full_name="New Name")
 
-    # Mock get_user to return None
-    mocker.patch("app.services.user_service.crud_user.get_user", return_value=None)
+    # No row came back from the UPDATE
+    mocker.patch("app.services.user_service.crud_user.update_user", return_value=None)
 
     with pytest.raises(HTTPException) as exc_info:
         update_user_profile(db_mock, user_id, user_update)
@@ -173,129 +179,80 @@ def test_update_user_profile_user_not_found(mocker):
     assert exc_info.value.status_code == status.HTTP_404_NOT_FOUND
     assert exc_info.value.detail == "User not found"
 
-def test_update_user_profile_updated_at_handled_by_db(mocker):
-    db_mock = MagicMock()
-    user_id = uuid.uuid4()
-    user_update = UserUpdate(full_name="New Name")
+def test_update_user_profile_precondition_failed(mocker):
+    # The If-Match condition in the UPDATE matched no row
+    mocker.patch("app.services.user_service.crud_user.update_user", return_value=None)
+
+    with pytest.raises(PreconditionFailedException):
+        update_user_profile(MagicMock(), uuid.uuid4(), UserUpdate(full_name="New Name"), datetime(2024, 1, 1))
 
-    db_user_mock = User(id=user_id, email="old@example.com", username="testuser", hashed_password="hashed_password", is_active=True)
-    mocker.patch("app.services.user_service.crud_user.get_user", return_value=db_user_mock)
-    mocker.patch("app.services.user_service.crud_user.get_user_by_email", return_value=None)
+def test_user_etag_round_trips_through_if_match():
+    user = User(id=uuid.uuid4(), updated_at=datetime(2024, 5, 6, 7, 8, 9, 123456))
+    etag = user_etag(user)
 
-    mock_update_user = mocker.patch("app.services.user_service.crud_user.update_user", return_value=db_user_mock)
+    assert expected_updated_at(etag, user.id) == user.updated_at
+    assert expected_updated_at(f'W/{etag}, "junk", {etag}', user.id) == user.updated_at
+    assert expected_updated_at("*", user.id) is None
+    assert expected_updated_at(None, user.id) is None
+    with pytest.raises(PreconditionFailedException):
+        expected_updated_at(etag, uuid.uuid4())
+    with pytest.raises(PreconditionFailedException):
+        expected_updated_at(f"W/{etag}", user.id)
 
-    update_user_profile(db_mock, user_id, user_update)
+def test_etag_matches_uses_weak_comparison():
+    etag = '"abc-1"'
 
-    # Verify that update_user was called, implying the database handles updated_at
-    mock_update_user.assert_called_once()
-    # Further assertion could be made if the mock_update_user returned a user with an updated timestamp
-    # For now, just checking that the update function was called is sufficient for this test's scope.
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"abc-2"', etag)
+    assert not etag_matches(None, etag)
 
-def test_delete_user_account_success(mocker):
+def test_delete_user_account_marks_for_delayed_deletion(mocker):
     db_mock = MagicMock()
-    user_id = uuid.uuid4()
-    current_password = "any_password"
+    current_password = "correct_password"
     hashed_password = security.get_password_hash(current_password)
+    user = User(id=uuid.uuid4(), email="test@example.com", username="testuser", hashed_password=hashed_password, is_active=True)
 
-    # Mock get_user to return an existing user
-    db_user_mock = User(id=user_id, email="test@example.com", username="testuser", hashed_password=hashed_password, is_active=True, is_deleted=False, deletion_requested_at=None)
-    mocker.patch("app.services.user_service.crud_user.get_user", return_value=db_user_mock)
-    mocker.patch("app.services.user_service.verify_password", return_value=True)
-
-    # Ensure crud_user.delete_user is NOT called directly
-    mock_crud_delete_user = mocker.patch("app.services.user_service.crud_user.delete_user", autospec=True)
+    mock_verify_password = mocker.patch("app.services.user_service.verify_password", return_value=True)
+    mock_mark_user_for_deletion = mocker.patch(
+        "app.services.user_service.crud_user.mark_user_for_deletion", return_value=user,
+    )
+    # Ensure the user is neither re-read nor hard deleted
+    mock_get_user = mocker.patch("app.services.user_service.crud_user.get_user")
+    mock_crud_delete_user = mocker.patch("app.services.user_service.crud_user.delete_user")
 
-    delete_user_account(db_mock, user_id, current_password)
+    delete_user_account(db_mock, user, current_password)
 
-    assert db_user_mock.is_active is False
-    assert db_user_mock.deletion_requested_at is not None
-    assert isinstance(db_user_mock.deletion_requested_at, datetime)
-    assert db_user_mock.is_deleted is False
-    assert db_user_mock.deleted_at is None
+    mock_verify_password.assert_called_once_with(current_password, hashed_password)
+    mock_mark_user_for_deletion.assert_called_once_with(db_mock, user_id=user.id)
+    mock_get_user.assert_not_called()
     mock_crud_delete_user.assert_not_called()
-    db_mock.commit.assert_called_once()
 
 def test_delete_user_account_user_not_found(mocker):
     db_mock = MagicMock()
-    user_id = uuid.uuid4()
+    user = User(id=uuid.uuid4(), hashed_password="hashed_password")
 
-    # Mock get_user to return None
-    mocker.patch("app.services.user_service.crud_user.get_user", return_value=None)
+    mocker.patch("app.services.user_service.verify_password", return_value=True)
+    # The user was deleted since authenticating, so the UPDATE matched no row
+    mocker.patch("app.services.user_service.crud_user.mark_user_for_deletion", return_value=None)
     from app.services.user_service import UserNotFoundException
     with pytest.raises(UserNotFoundException):
-        delete_user_account(db_mock, user_id, "any_password")
-    mocker.patch("app.services.user_service.crud_user.delete_user").assert_not_called()
-
-def test_delete_user_account_reauthentication_success(mocker):
-    db_mock = MagicMock()
-    user_id = uuid.uuid4()
-    current_password = "correct_password"
-    hashed_password = security.get_password_hash(current_password)
-
-    db_user_mock = User(id=user_id, email="test@example.com", username="testuser", hashed_password=hashed_password, is_active=True, is_deleted=False, deletion_requested_at=None)
-    mock_get_user = mocker.patch("app.services.user_service.crud_user.get_user", return_value=db_user_mock)
-    mock_verify_password = mocker.patch("app.services.user_service.verify_password", return_value=True)
-    mock_crud_delete_user = mocker.patch("app.services.user_service.crud_user.delete_user", autospec=True)
-
-    delete_user_account(db_mock, user_id, current_password)
-
-    mock_get_user.assert_called_once_with(db_mock, user_id=user_id)
-    mock_verify_password.assert_called_once_with(current_password, hashed_password)
-    assert db_user_mock.is_active is False
-    assert db_user_mock.deletion_requested_at is not None
-    assert isinstance(db_user_mock.deletion_requested_at, datetime)
-    assert db_user_mock.is_deleted is False
-    assert db_user_mock.deleted_at is None
-    mock_crud_delete_user.assert_not_called()
-    db_mock.commit.assert_called_once()
+        delete_user_account(db_mock, user, "any_password")
 
 def test_delete_user_account_reauthentication_incorrect_password(mocker):
     db_mock = MagicMock()
-    user_id = uuid.uuid4()
     current_password = "incorrect_password"
     hashed_password = security.get_password_hash("correct_password")
+    user = User(id=uuid.uuid4(), email="test@example.com", username="testuser", hashed_password=hashed_password, is_active=True)
 
-    db_user_mock = User(id=user_id, email="test@example.com", username="testuser", hashed_password=hashed_password, is_active=True)
-    mock_get_user = mocker.patch("app.services.user_service.crud_user.get_user", return_value=db_user_mock)
     mock_verify_password = mocker.patch("app.services.user_service.verify_password", return_value=False)
-    mock_delete_user = mocker.patch("app.services.user_service.crud_user.delete_user")
+    mock_mark_user_for_deletion = mocker.patch("app.services.user_service.crud_user.mark_user_for_deletion")
 
     with pytest.raises(HTTPException) as exc_info:
-        delete_user_account(db_mock, user_id, current_password)
+        delete_user_account(db_mock, user, current_password)
 
     assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
     assert exc_info.value.detail == "Incorrect current password"
-    mock_get_user.assert_called_once_with(db_mock, user_id=user_id)
     mock_verify_password.assert_called_once_with(current_password, hashed_password)
-    mock_delete_user.assert_not_called()
-
-def test_delete_user_account_marks_for_delayed_deletion(mocker):
-    db_mock = MagicMock()
-    user_id = uuid.uuid4()
-    current_password = "correct_password"
-    hashed_password = security.get_password_hash(current_password)
-
-    db_user_mock = User(id=user_id, email="test@example.com", username="testuser", hashed_password=hashed_password, is_active=True, is_deleted=False, deletion_requested_at=None)
-    mock_get_user = mocker.patch("app.services.user_service.crud_user.get_user", return_value=db_user_mock)
-    mock_verify_password = mocker.patch("app.services.user_service.verify_password", return_value=True)
-
-    # Ensure crud_user.delete_user is NOT called directly
-    mock_crud_delete_user = mocker.patch("app.services.user_service.crud_user.delete_user", autospec=True)
-
-    delete_user_account(db_mock, user_id, current_password)
-
-    mock_get_user.assert_called_once_with(db_mock, user_id=user_id)
-    mock_verify_password.assert_called_once_with(current_password, hashed_password)
-
-    # Assert that is_active is set to False and deletion_requested_at is set
-    assert db_user_mock.is_active == False
-    assert db_user_mock.deletion_requested_at is not None
-    assert isinstance(db_user_mock.deletion_requested_at, datetime)
-
-    # Assert that is_deleted remains False and deleted_at remains None at this stage
-    assert db_user_mock.is_deleted == False
-    assert db_user_mock.deleted_at is None
-
-    # Verify that crud_user.delete_user was NOT called
-    mock_crud_delete_user.assert_not_called()
-    db_mock.commit.assert_called_once()
+    mock_mark_user_for_deletion.assert_not_called()